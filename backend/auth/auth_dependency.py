@@ -1,19 +1,30 @@
 from fastapi import Header, HTTPException
 from db.database import get_item
+from auth.session_cache import get_cached_session, cache_session, seconds_until_expiry
 
 
 def get_current_user(authorization: str = Header(...)):
     """
     Minimal auth dependency.
     Expects header: Authorization: Bearer <token>
+    Hot tokens are served from the session cache.
     """
     if not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Invalid auth header")
 
     token = authorization.split(" ")[1]
 
+    phone = get_cached_session(token)
+    if phone is not None:
+        return phone
+
     session = get_item("sessions", token)
     if not session:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
+    remaining = seconds_until_expiry(session)
+    if remaining <= 0:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    cache_session(token, session["phone"], remaining)
     return session["phone"]  # or user_id if you map it
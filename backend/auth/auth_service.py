@@ -1,8 +1,10 @@
 from datetime import datetime, timedelta
-from auth.password_utils import hash_password, verify_password
+from auth.password_utils import hash_password, verify_password, needs_rehash
+from auth.kdf_pool import KDFPoolSaturated
 from auth.otp_service import send_otp, verify_otp
+from auth.session_cache import evict_session, purge_expired_sessions
 
-from db.database import get_item, put_item, delete_item
+from db.database import get_item, put_item, delete_item, delete_expired_sessions
 
 def register_user(
     phone: str,
@@ -70,6 +72,14 @@ def login_user(phone: str, password: str, otp: str = None) -> dict:
     if not verify_password(password, user["password_hash"]):
         raise ValueError("Invalid credentials")
 
+    # Transparently upgrade hashes made with older KDF parameters
+    if needs_rehash(user["password_hash"]):
+        try:
+            user["password_hash"] = hash_password(password)
+            put_item("users", phone, user)
+        except KDFPoolSaturated:
+            pass  # retry on a later login
+
     # If OTP is provided, verify it
     if otp:
         if not verify_otp(phone, otp):
@@ -119,3 +129,13 @@ def logout_user(token: str) -> None:
     Logout user
     """
     delete_item("sessions", token)
+    evict_session(token)
+
+
+def sweep_expired_sessions() -> int:
+    """
+    Background job: drop expired sessions from DB and cache in bulk
+    """
+    purge_expired_sessions()
+    return delete_expired_sessions(datetime.utcnow().isoformat())
+
@@ -0,0 +1,92 @@
+"""
+KDF WORKER POOL
+---------------
+Dedicated, bounded executor for password hashing so a login burst
+can't occupy the request threadpool. When every worker is busy and the
+wait queue is full, callers get KDFPoolSaturated (mapped to HTTP 429).
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+KDF_WORKERS = int(os.getenv("ARTHA_KDF_WORKERS", "4"))
+KDF_MAX_QUEUED = int(os.getenv("ARTHA_KDF_MAX_QUEUED", "16"))
+
+
+class KDFPoolSaturated(Exception):
+    pass
+
+
+class BoundedExecutor:
+    """
+    Thread pool that admits at most `workers + max_queued` tasks at once.
+    """
+
+    def __init__(self, workers: int, max_queued: int):
+        self.workers = workers
+        self.max_queued = max_queued
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kdf")
+        self._slots = threading.BoundedSemaphore(workers + max_queued)
+        self._lock = threading.Lock()
+
+        # ---- Metrics ----
+        self._admitted = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_queue_wait = 0.0
+        self._total_run = 0.0
+
+    def run(self, func: Callable[..., Any], *args) -> Any:
+        """Run func(*args) on the pool and block until it finishes"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise KDFPoolSaturated("Too many concurrent password operations, retry shortly")
+
+        queued_at = time.monotonic()
+        with self._lock:
+            self._admitted += 1
+
+        def task():
+            started = time.monotonic()
+            with self._lock:
+                self._running += 1
+                self._total_queue_wait += started - queued_at
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+                    self._total_run += time.monotonic() - started
+
+        try:
+            return self._executor.submit(task).result()
+        finally:
+            with self._lock:
+                self._admitted -= 1
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queued": self.max_queued,
+                "running": self._running,
+                "queue_depth": self._admitted - self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_queue_wait_ms": round(self._total_queue_wait / self._completed * 1000, 2) if self._completed else 0.0,
+                "avg_run_ms": round(self._total_run / self._completed * 1000, 2) if self._completed else 0.0,
+            }
+
+
+kdf_executor = BoundedExecutor(KDF_WORKERS, KDF_MAX_QUEUED)
+
+
+def get_kdf_stats() -> Dict[str, Any]:
+    return kdf_executor.stats()
@@ -1,33 +1,78 @@
 import hashlib
+import hmac
 import os
+from dataclasses import dataclass
 
+from auth.kdf_pool import kdf_executor
 
-def hash_password(password: str) -> str:
-    """
-    Hash password with salt using SHA-256
-    """
-    salt = os.urandom(16)
-    pwd_hash = hashlib.pbkdf2_hmac(
-        "sha256",
+
+@dataclass(frozen=True)
+class KDFParams:
+    algorithm: str    # hashlib digest name for PBKDF2-HMAC
+    iterations: int
+    salt_bytes: int = 16
+
+
+# Parameters for NEW hashes. Tune iterations against /health/kdf avg_run_ms;
+# older hashes are upgraded transparently on the next successful login.
+CURRENT_KDF = KDFParams(
+    algorithm=os.getenv("ARTHA_KDF_ALGORITHM", "sha256"),
+    iterations=int(os.getenv("ARTHA_KDF_ITERATIONS", "100000")),
+)
+
+# Hashes stored before versioning: "<salt_hex>:<hash_hex>"
+LEGACY_KDF = KDFParams(algorithm="sha256", iterations=100_000)
+
+
+def _derive(password: str, salt: bytes, params: KDFParams) -> bytes:
+    return hashlib.pbkdf2_hmac(
+        params.algorithm,
         password.encode("utf-8"),
         salt,
-        100_000
+        params.iterations
     )
-    return salt.hex() + ":" + pwd_hash.hex()
+
+
+def _parse(stored_hash: str):
+    """
+    -> (params, salt, hash_bytes)
+    Format: "pbkdf2_<algorithm>$<iterations>$<salt_hex>$<hash_hex>"
+    """
+    if "$" not in stored_hash:
+        salt_hex, hash_hex = stored_hash.split(":")
+        return LEGACY_KDF, bytes.fromhex(salt_hex), bytes.fromhex(hash_hex)
+
+    scheme, iterations, salt_hex, hash_hex = stored_hash.split("$")
+    params = KDFParams(algorithm=scheme.removeprefix("pbkdf2_"), iterations=int(iterations))
+    return params, bytes.fromhex(salt_hex), bytes.fromhex(hash_hex)
+
+
+def hash_password(password: str) -> str:
+    """
+    Hash password with salt using PBKDF2 (CURRENT_KDF), on the KDF pool
+    """
+    params = CURRENT_KDF
+    salt = os.urandom(params.salt_bytes)
+    pwd_hash = kdf_executor.run(_derive, password, salt, params)
+    return f"pbkdf2_{params.algorithm}${params.iterations}${salt.hex()}${pwd_hash.hex()}"
 
 
 def verify_password(password: str, stored_hash: str) -> bool:
     """
-    Verify password against stored hash
+    Verify password against stored hash (any supported parameter set)
     """
-    salt_hex, hash_hex = stored_hash.split(":")
-    salt = bytes.fromhex(salt_hex)
+    params, salt, expected = _parse(stored_hash)
+    pwd_hash = kdf_executor.run(_derive, password, salt, params)
+    return hmac.compare_digest(pwd_hash, expected)
 
-    pwd_hash = hashlib.pbkdf2_hmac(
-        "sha256",
-        password.encode("utf-8"),
-        salt,
-        100_000
-    )
 
-    return pwd_hash.hex() == hash_hex
\ No newline at end of file
+def needs_rehash(stored_hash: str) -> bool:
+    """
+    True if the hash was made with parameters other than CURRENT_KDF
+    """
+    params, salt, _ = _parse(stored_hash)
+    return (
+        params.algorithm != CURRENT_KDF.algorithm
+        or params.iterations != CURRENT_KDF.iterations
+        or len(salt) != CURRENT_KDF.salt_bytes
+    )
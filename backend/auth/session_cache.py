@@ -0,0 +1,50 @@
+"""
+SESSION CACHE
+-------------
+LRU + TTL cache of session tokens -> phone.
+Each entry lives until the session's own expires_at.
+"""
+
+import os
+from datetime import datetime
+
+from utils.cache import TTLCache
+
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv("ARTHA_SESSION_CACHE_SIZE", "10000"))
+SESSION_CACHE_MAX_TTL_SECONDS = 12 * 60 * 60  # matches session lifetime
+
+_sessions = TTLCache(
+    max_entries=SESSION_CACHE_MAX_ENTRIES,
+    ttl_seconds=SESSION_CACHE_MAX_TTL_SECONDS,
+)
+
+
+def seconds_until_expiry(session: dict) -> float:
+    """
+    Remaining lifetime of a stored session (<= 0 means expired).
+    Sessions without expires_at are treated as expired.
+    """
+    expires_at = session.get("expires_at")
+    if not expires_at:
+        return 0
+    return (datetime.fromisoformat(expires_at) - datetime.utcnow()).total_seconds()
+
+
+def get_cached_session(token: str):
+    return _sessions.get(token)
+
+
+def cache_session(token: str, phone: str, ttl_seconds: float):
+    _sessions.set(token, phone, ttl_seconds=min(ttl_seconds, SESSION_CACHE_MAX_TTL_SECONDS))
+
+
+def evict_session(token: str):
+    _sessions.delete(token)
+
+
+def purge_expired_sessions() -> int:
+    return _sessions.purge_expired()
+
+
+def get_session_cache_stats() -> dict:
+    return _sessions.stats()
@@ -0,0 +1,206 @@
+"""
+CANONICAL ENCODING
+------------------
+The one place that turns a record into the bytes we hash onto the chain.
+
+Canonical form (byte-identical to the original
+`json.dumps(payload, sort_keys=True, separators=(",", ":"))`, so every
+hash already anchored keeps verifying):
+- keys sorted, no whitespace, non-ASCII escaped (ensure_ascii)
+- floats use Python's repr; NaN / Infinity encode as NaN / Infinity,
+  exactly like the original
+- datetime / date / time -> isoformat() and Decimal -> str(); the original
+  raised TypeError for these, so no anchored hash contains them
+
+When orjson is installed it encodes first. Non-ASCII characters and DEL
+(which orjson writes raw) are escaped as \\uXXXX like ensure_ascii does;
+anything else it formats differently falls back to the stdlib encoder:
+- orjson errors (non-str keys, ints beyond 64 bits, unsupported types)
+- exponent floats and small floats (stdlib `1e+16` / `1e-05` vs orjson
+  `1e16` / `0.00001`)
+- `null` next to a NaN / Infinity somewhere in the payload (orjson
+  writes those as null)
+
+On top of that: bulk hashing and a memo keyed by row version (table,
+key, change_seq) so the same row is hashed once across audits.
+
+Run `python -m blockchain.canonical` from backend/ for a benchmark.
+"""
+
+import datetime
+import hashlib
+import json
+import math
+import re
+from decimal import Decimal
+from typing import Any, Hashable, Iterable, List
+
+from utils.cache import TTLCache
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder produces the same bytes
+    orjson = None
+
+HASH_MEMO_SIZE = 50_000
+HASH_MEMO_TTL_SECONDS = 3600
+
+
+def _default(value: Any):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not canonically encodable")
+
+
+_encoder = json.JSONEncoder(
+    sort_keys=True,
+    separators=(",", ":"),
+    default=_default,
+)
+
+# orjson float forms the stdlib writes differently: exponents (1e16, 1e-7;
+# stdlib 1e+16, 1e-07) and 0.0000x (stdlib 1e-05). Starting with a literal
+# keeps the scan fast; matches inside strings only cost a fallback.
+_ORJSON_EXPONENT = re.compile(rb"e-?[0-9]")
+_ORJSON_SMALL_FLOAT = b"0.0000"
+# Characters ensure_ascii escapes that orjson writes raw
+_NON_ASCII = re.compile("[^\x00-\x7e]")
+_ORJSON_OPTIONS = (
+    orjson.OPT_SORT_KEYS
+    | orjson.OPT_PASSTHROUGH_SUBCLASS
+    | orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+) if orjson else 0
+
+# row version -> hash; change_seq changes on every write, so entries never go stale
+_hash_memo = TTLCache(max_entries=HASH_MEMO_SIZE, ttl_seconds=HASH_MEMO_TTL_SECONDS)
+
+
+def _has_non_finite(value: Any) -> bool:
+    if isinstance(value, float):
+        return not math.isfinite(value)
+    if isinstance(value, dict):
+        return any(_has_non_finite(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_has_non_finite(v) for v in value)
+    return False
+
+
+def _escape_char(match) -> str:
+    code = ord(match.group())
+    if code <= 0xFFFF:
+        return f"\\u{code:04x}"
+    code -= 0x10000
+    return f"\\u{0xD800 | (code >> 10):04x}\\u{0xDC00 | (code & 0x3FF):04x}"
+
+
+def _stdlib_bytes(payload: Any) -> bytes:
+    return _encoder.encode(payload).encode("utf-8")
+
+
+def _orjson_bytes(payload: Any) -> bytes:
+    try:
+        encoded = orjson.dumps(payload, default=_default, option=_ORJSON_OPTIONS)
+    except (orjson.JSONEncodeError, TypeError):
+        return _stdlib_bytes(payload)
+
+    if _ORJSON_SMALL_FLOAT in encoded or _ORJSON_EXPONENT.search(encoded):
+        return _stdlib_bytes(payload)
+    if b"null" in encoded and _has_non_finite(payload):
+        return _stdlib_bytes(payload)
+    if not encoded.isascii() or b"\x7f" in encoded:
+        # Only string contents can be non-ASCII, so escaping them in place is safe
+        return _NON_ASCII.sub(_escape_char, encoded.decode("utf-8")).encode("ascii")
+    return encoded
+
+
+def canonical_bytes(payload: Any) -> bytes:
+    return _orjson_bytes(payload) if orjson else _stdlib_bytes(payload)
+
+
+def canonical_hash(payload: Any) -> str:
+    return hashlib.sha256(canonical_bytes(payload)).hexdigest()
+
+
+def hash_many(payloads: Iterable[Any]) -> List[str]:
+    """Bulk canonical_hash (same order as the input)"""
+    encode = _orjson_bytes if orjson else _stdlib_bytes
+    sha256 = hashlib.sha256
+    return [sha256(encode(p)).hexdigest() for p in payloads]
+
+
+def hash_row(table: str, key: Hashable, version: int, payload: Any) -> str:
+    """
+    canonical_hash memoized by row version. `version` must change whenever
+    the row does (change_seq); pass None to skip the memo.
+    """
+    if version is None:
+        return canonical_hash(payload)
+
+    memo_key = (table, key, version)
+    cached = _hash_memo.get(memo_key)
+    if cached is not None:
+        return cached
+
+    digest = canonical_hash(payload)
+    _hash_memo.set(memo_key, digest)
+    return digest
+
+
+def get_hash_memo_stats():
+    return _hash_memo.stats()
+
+
+# =========================
+# BENCHMARK
+# =========================
+
+if __name__ == "__main__":
+    import random
+    import timeit
+
+    def legacy_sha256_hash(payload: dict) -> str:
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    random.seed(7)
+    records = [
+        {
+            "loan_id": f"LOAN-{i:06d}",
+            "user_id": f"98{i:08d}",
+            "amount": random.randint(5_000, 500_000),
+            "interest_rate": round(random.uniform(8, 24), 2),
+            "tenure_months": random.choice([3, 6, 12, 24]),
+            "purpose": "Education – semester fees",
+            "status": "ACTIVE",
+            "credit_score": random.randint(300, 900),
+            "emi_schedule": [{"month": m, "emi": 1234.56, "principal": 1000.0} for m in range(12)],
+        }
+        for i in range(2_000)
+    ]
+
+    assert [legacy_sha256_hash(r) for r in records] == hash_many(records), "canonical form drifted"
+
+    runs = 5
+    legacy = min(timeit.repeat(lambda: [legacy_sha256_hash(r) for r in records], number=1, repeat=runs))
+    single = min(timeit.repeat(lambda: [canonical_hash(r) for r in records], number=1, repeat=runs))
+    bulk = min(timeit.repeat(lambda: hash_many(records), number=1, repeat=runs))
+
+    for r in records:
+        hash_row("loans", r["loan_id"], 1, r)
+    memo = min(timeit.repeat(
+        lambda: [hash_row("loans", r["loan_id"], 1, r) for r in records], number=1, repeat=runs
+    ))
+
+    n = len(records)
+    print(f"{n} loan records, best of {runs}")
+    print(f"orjson: {'yes' if orjson else 'no (stdlib encoder)'}")
+    for name, seconds in [
+        ("legacy json.dumps", legacy),
+        ("canonical_hash", single),
+        ("hash_many", bulk),
+        ("hash_row (memo hit)", memo),
+    ]:
+        print(f"  {name:<22} {seconds * 1000:8.2f} ms  {n / seconds:>10,.0f} rec/s  x{legacy / seconds:.2f}")
@@ -1,5 +1,5 @@
 from blockchain.utils import sha256_hash
-from multichain_rpc import publish_to_stream
+from blockchain.outbox import enqueue_publish
 
 IDENTITY_STREAM = "identity_proofs"
 
@@ -10,7 +10,7 @@ def record_identity_proof(identity_payload: dict, user_id: str) -> str:
     """
     identity_hash = sha256_hash(identity_payload)
 
-    publish_to_stream(
+    enqueue_publish(
         stream=IDENTITY_STREAM,
         key=user_id,
         value=identity_hash
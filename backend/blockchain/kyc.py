@@ -1,5 +1,5 @@
 from blockchain.utils import sha256_hash
-from multichain_rpc import publish_to_stream
+from blockchain.outbox import enqueue_publish
 
 KYC_STREAM = "kyc_results"
 
@@ -9,7 +9,7 @@ def record_kyc_result(kyc_payload: dict, user_id: str) -> str:
     """
     kyc_hash = sha256_hash(kyc_payload)
 
-    publish_to_stream(
+    enqueue_publish(
         stream=KYC_STREAM,
         key=user_id,
         value=kyc_hash
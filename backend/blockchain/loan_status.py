@@ -1,5 +1,5 @@
 from blockchain.utils import sha256_hash
-from multichain_rpc import publish_to_stream
+from blockchain.outbox import enqueue_publish
 
 LOAN_STATUS_STREAM = "loan_status"
 
@@ -10,7 +10,7 @@ def record_loan_status(status_payload: dict, loan_id: str) -> str:
     """
     status_hash = sha256_hash(status_payload)
 
-    publish_to_stream(
+    enqueue_publish(
         stream=LOAN_STATUS_STREAM,
         key=loan_id,
         value=status_hash
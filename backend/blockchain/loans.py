@@ -1,7 +1,7 @@
 # backend/blockchain/loans.py
 
 from blockchain.utils import sha256_hash
-from multichain_rpc import publish_to_stream
+from blockchain.outbox import enqueue_publish
 
 LOAN_REQUEST_STREAM = "loan_requests"
 LOAN_ACCEPT_STREAM = "loan_acceptance"
@@ -13,7 +13,7 @@ def record_loan_request(loan_payload: dict, loan_id: str) -> str:
     """
     loan_hash = sha256_hash(loan_payload)
 
-    publish_to_stream(
+    enqueue_publish(
         stream=LOAN_REQUEST_STREAM,
         key=loan_id,
         value=loan_hash
@@ -28,7 +28,7 @@ def record_loan_acceptance(acceptance_payload: dict, loan_id: str) -> str:
     """
     acceptance_hash = sha256_hash(acceptance_payload)
 
-    publish_to_stream(
+    enqueue_publish(
         stream=LOAN_ACCEPT_STREAM,
         key=loan_id,
         value=acceptance_hash
@@ -0,0 +1,61 @@
+"""
+MERKLE TREE
+-----------
+Binary Merkle tree over event hashes (RFC 6962 style domain separation:
+leaves are hashed with a 0x00 prefix, inner nodes with 0x01, and an odd
+node at the end of a level is carried up unchanged).
+
+Proofs are lists of [side, sibling_hex] where side is "L" or "R"
+(the sibling's position), from the leaf up to the root.
+"""
+
+import hashlib
+from typing import List, Tuple
+
+
+def leaf_hash(stream: str, key: str, value: str) -> str:
+    payload = "\x1f".join([stream, key, value]).encode("utf-8")
+    return hashlib.sha256(b"\x00" + payload).hexdigest()
+
+
+def _node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def build_merkle_tree(leaves: List[str]) -> Tuple[str, List[list]]:
+    """
+    leaves: hex leaf hashes
+    -> (root_hex, proofs) with proofs[i] proving leaves[i]
+    """
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+
+    level = [bytes.fromhex(leaf) for leaf in leaves]
+    positions = list(range(len(leaves)))  # index of each leaf's node in the current level
+    proofs = [[] for _ in leaves]
+
+    while len(level) > 1:
+        for leaf_index, pos in enumerate(positions):
+            sibling = pos ^ 1
+            if sibling < len(level):
+                side = "L" if sibling < pos else "R"
+                proofs[leaf_index].append([side, level[sibling].hex()])
+
+        next_level = []
+        for i in range(0, len(level) - 1, 2):
+            next_level.append(_node_hash(level[i], level[i + 1]))
+        if len(level) % 2:
+            next_level.append(level[-1])
+
+        level = next_level
+        positions = [pos // 2 for pos in positions]
+
+    return level[0].hex(), proofs
+
+
+def verify_merkle_proof(leaf_hex: str, proof: List[list], root_hex: str) -> bool:
+    node = bytes.fromhex(leaf_hex)
+    for side, sibling_hex in proof:
+        sibling = bytes.fromhex(sibling_hex)
+        node = _node_hash(sibling, node) if side == "L" else _node_hash(node, sibling)
+    return node.hex() == root_hex
@@ -0,0 +1,260 @@
+"""
+STREAM MIRROR
+-------------
+Keeps a local, indexed copy of every MultiChain stream in SQLite
+(`stream_items`) so public-ledger and audit reads never scan a stream
+over RPC.
+
+- Each stream is tailed incrementally: `liststreamitems stream false
+  count start` from the stored checkpoint (stream_sync_state.next_seq).
+- Items with fewer than MIRROR_SETTLED_CONFIRMATIONS confirmations are
+  re-read so blocktime / confirmations stay current, at most
+  MIRROR_REFRESH_LIMIT per stream per pass.
+- A stream that has never been synced is read straight from the node.
+  Keyed pages need the mirror (cursors are global positions), so they
+  raise StreamNotMirrored until the background job's first sync finishes.
+- Key lookups are served from the mirror only while it holds every item
+  the node has; otherwise they go to the node.
+"""
+
+import json
+import os
+import threading
+import time
+
+from multichain_rpc import call_rpc, get_stream_key_items as rpc_stream_key_items
+from blockchain.outbox import IDEMPOTENCY_KEY_PREFIX, MERKLE_ROOT_STREAM
+from db.database import (
+    get_stream_sync_state,
+    save_mirrored_items,
+    get_min_unsettled_seq,
+    update_mirrored_confirmations,
+    list_mirrored_items,
+)
+
+MIRRORED_STREAMS = [
+    "transactions",
+    "loan_requests",
+    "repayments",
+    "kyc_results",
+    "identity_proofs",
+    "loan_status",
+    "fee_allocation",
+    "loan_acceptance",
+    "loan_agreements",
+    MERKLE_ROOT_STREAM,
+]
+
+MIRROR_SYNC_SECONDS = float(os.getenv("ARTHA_MIRROR_SYNC_SECONDS", "5"))
+MIRROR_PAGE_SIZE = int(os.getenv("ARTHA_MIRROR_PAGE_SIZE", "500"))
+MIRROR_SETTLED_CONFIRMATIONS = int(os.getenv("ARTHA_MIRROR_SETTLED_CONFIRMATIONS", "6"))
+# Max unsettled items re-read per stream per pass (a backlog is walked over several passes)
+MIRROR_REFRESH_LIMIT = int(os.getenv("ARTHA_MIRROR_REFRESH_LIMIT", "500"))
+EXPORT_PAGE_SIZE = 1000
+
+
+class StreamNotMirrored(Exception):
+    """The stream's first sync has not finished; retry after the next pass"""
+
+
+_stats_lock = threading.Lock()
+# stream -> next position to refresh (resumes where the previous pass stopped)
+_refresh_cursors = {}
+_stats = {"passes": 0, "items_mirrored": 0, "confirmations_refreshed": 0, "errors": 0, "last_error": None}
+
+
+# =========================
+# INTERNAL HELPERS
+# =========================
+
+def _item_keys(item: dict):
+    """Business keys of an item (outbox idempotency keys are not mirrored)"""
+    keys = item.get("keys")
+    if keys is None:
+        keys = [item["key"]] if item.get("key") is not None else []
+    keys = [k for k in keys if not str(k).startswith(IDEMPOTENCY_KEY_PREFIX)]
+    return keys or [""]
+
+
+def _to_rows(items: list, first_seq: int):
+    rows = []
+    for offset, item in enumerate(items):
+        data = item.get("data")
+        if data is not None and not isinstance(data, str):
+            data = json.dumps(data, sort_keys=True)
+
+        for key in _item_keys(item):
+            rows.append({
+                "seq": first_seq + offset,
+                "item_key": key,
+                "txid": item["txid"],
+                "data": data,
+                "publishers": json.dumps(item.get("publishers", [])),
+                "blocktime": item.get("blocktime"),
+                "confirmations": item.get("confirmations", 0),
+            })
+    return rows
+
+
+def _public_item(row: dict) -> dict:
+    """Mirror row -> the shape liststreamitems returns"""
+    return {
+        "stream": row["stream"],
+        "key": row["item_key"],
+        "txid": row["txid"],
+        "data": row["data"],
+        "publishers": json.loads(row["publishers"] or "[]"),
+        "blocktime": row["blocktime"],
+        "confirmations": row["confirmations"],
+    }
+
+
+def _tail_stream(stream: str) -> int:
+    state = get_stream_sync_state(stream)
+    next_seq = state["next_seq"] if state else 0
+    synced = state is not None
+    mirrored = 0
+
+    while True:
+        items = call_rpc("liststreamitems", [stream, False, MIRROR_PAGE_SIZE, next_seq])
+        if not items and synced:
+            break
+
+        save_mirrored_items(stream, _to_rows(items, next_seq), next_seq + len(items), int(time.time()))
+        synced = True
+        next_seq += len(items)
+        mirrored += len(items)
+
+        if len(items) < MIRROR_PAGE_SIZE:
+            break
+
+    return mirrored
+
+
+def _refresh_confirmations(stream: str) -> int:
+    """
+    Re-read at most MIRROR_REFRESH_LIMIT unsettled items, continuing from
+    where the previous pass stopped and wrapping to the first unsettled one
+    """
+    first_unsettled = get_min_unsettled_seq(stream, MIRROR_SETTLED_CONFIRMATIONS)
+    if first_unsettled is None:
+        _refresh_cursors.pop(stream, None)
+        return 0
+
+    state = get_stream_sync_state(stream)
+    start = _refresh_cursors.get(stream, first_unsettled)
+    if start < first_unsettled or start >= state["next_seq"]:
+        start = first_unsettled
+
+    count = min(state["next_seq"] - start, MIRROR_REFRESH_LIMIT)
+    if count <= 0:
+        return 0
+
+    items = call_rpc("liststreamitems", [stream, False, count, start])
+    _refresh_cursors[stream] = start + len(items)
+
+    updates = {item["txid"]: (item.get("blocktime"), item.get("confirmations", 0)) for item in items}
+    update_mirrored_confirmations(
+        stream,
+        [(txid, blocktime, confirmations) for txid, (blocktime, confirmations) in updates.items()],
+        int(time.time()),
+    )
+    return len(updates)
+
+
+# =========================
+# SYNC WORKER
+# =========================
+
+def sync_stream(stream: str):
+    """Pull new items for one stream and refresh unsettled confirmations"""
+    mirrored = _tail_stream(stream)
+    refreshed = _refresh_confirmations(stream)
+    with _stats_lock:
+        _stats["items_mirrored"] += mirrored
+        _stats["confirmations_refreshed"] += refreshed
+    return mirrored
+
+
+def sync_all_streams():
+    """Periodic job: one sync pass over every mirrored stream"""
+    for stream in MIRRORED_STREAMS:
+        try:
+            sync_stream(stream)
+        except Exception as e:
+            # A missing stream or node hiccup must not stop the others
+            with _stats_lock:
+                _stats["errors"] += 1
+                _stats["last_error"] = f"{stream}: {e}"
+    with _stats_lock:
+        _stats["passes"] += 1
+
+
+def get_mirror_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["streams"] = {}
+    for stream in MIRRORED_STREAMS:
+        state = get_stream_sync_state(stream)
+        stats["streams"][stream] = state and {
+            "next_seq": state["next_seq"],
+            "last_synced_at": state["last_synced_at"],
+        }
+    return stats
+
+
+# =========================
+# READS
+# =========================
+
+def is_stream_mirrored(stream: str) -> bool:
+    return get_stream_sync_state(stream) is not None
+
+
+def _node_item_count(stream: str) -> int:
+    return call_rpc("liststreams", [stream])[0]["items"]
+
+
+def get_stream_key_items(stream: str, key: str):
+    """
+    Items published under a key, oldest first. Served from the mirror when
+    it holds every item on the node; when items were published since the
+    last sync pass (or the stream was never synced) the node is asked.
+    """
+    state = get_stream_sync_state(stream)
+    if state is not None and state["next_seq"] >= _node_item_count(stream):
+        return [_public_item(row) for row in list_mirrored_items(stream, key)]
+    return rpc_stream_key_items(stream, key)
+
+
+def get_stream_page(stream: str, start: int = 0, limit: int = 100, since_blocktime=None, key=None):
+    """
+    One page of a stream in stream order -> (items, next_start).
+    next_start is None once the end of the stream is reached.
+    `start` / next_start are always global stream positions (liststreamitems
+    start, the mirror's seq), keyed or not, so a cursor stays valid across
+    the first sync.
+    """
+    if not is_stream_mirrored(stream):
+        if key is not None:
+            # liststreamkeyitems counts positions within the key, not the
+            # stream; walking the whole stream here would put an unbounded
+            # RPC scan on the request path
+            raise StreamNotMirrored(f"Stream {stream} is not mirrored yet")
+        items = call_rpc("liststreamitems", [stream, False, limit, start])
+        next_start = start + len(items) if len(items) == limit else None
+        if since_blocktime is not None:
+            items = [i for i in items if i.get("blocktime") is None or i["blocktime"] >= since_blocktime]
+        return items, next_start
+
+    rows = list_mirrored_items(stream, key, start=start, limit=limit, since_blocktime=since_blocktime)
+    next_start = rows[-1]["seq"] + 1 if len(rows) == limit else None
+    return [_public_item(row) for row in rows], next_start
+
+
+def iter_stream_items(stream: str, since_blocktime=None, key=None):
+    """Every matching item of a stream, fetched EXPORT_PAGE_SIZE at a time"""
+    start = 0
+    while start is not None:
+        items, start = get_stream_page(stream, start, EXPORT_PAGE_SIZE, since_blocktime, key)
+        yield from items
@@ -0,0 +1,207 @@
+"""
+CHAIN OUTBOX
+------------
+Stream writes are stored in the `chain_outbox` table inside the same
+SQLite transaction as the business change, then published by a
+background worker. Request latency no longer depends on the node, and a
+failed publish is retried instead of lost.
+
+Every item is published under two keys: its business key (loan_id,
+user_id, tx_id) and `outbox:<idempotency_key>`. Before retrying an item
+whose earlier attempt may have reached the node (e.g. a timeout), the
+worker looks that key up so the item is never published twice.
+
+ANCHOR MODES (ARTHA_ANCHOR_MODE)
+- "item"   : every event becomes its own stream item (default)
+- "merkle" : events are collected for MERKLE_BATCH_SIZE items or
+             MERKLE_MAX_WAIT_SECONDS, and only the Merkle root is published
+             to the `merkle_roots` stream (key = batch id). Inclusion proofs
+             are kept in SQLite (anchor_proofs) for audit verification.
+"""
+
+import os
+import time
+import uuid
+
+from multichain_rpc import publish_batch, publish_to_stream, get_stream_key_items
+from blockchain.merkle import leaf_hash, build_merkle_tree
+from db.database import (
+    add_outbox_item,
+    get_pending_outbox_items,
+    mark_outbox_published,
+    mark_outbox_failed,
+    seal_anchor_batch,
+    get_pending_anchor_batches,
+    mark_anchor_batch_published,
+    mark_anchor_batch_failed,
+)
+
+OUTBOX_BATCH_SIZE = int(os.getenv("ARTHA_OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_SECONDS = float(os.getenv("ARTHA_OUTBOX_POLL_SECONDS", "2"))
+OUTBOX_MAX_BACKOFF_SECONDS = 300
+
+IDEMPOTENCY_KEY_PREFIX = "outbox:"
+
+ANCHOR_MODE = os.getenv("ARTHA_ANCHOR_MODE", "item")
+MERKLE_ROOT_STREAM = "merkle_roots"
+MERKLE_BATCH_SIZE = int(os.getenv("ARTHA_MERKLE_BATCH_SIZE", "256"))
+MERKLE_MAX_WAIT_SECONDS = int(os.getenv("ARTHA_MERKLE_MAX_WAIT_SECONDS", "60"))
+
+
+def enqueue_publish(stream: str, key: str, value: str, idempotency_key: str = None) -> str:
+    """
+    Queue a stream write. Returns the idempotency key.
+    """
+    idempotency_key = idempotency_key or uuid.uuid4().hex
+    add_outbox_item(idempotency_key, stream, key, value, int(time.time()))
+    return idempotency_key
+
+
+def _backoff_seconds(attempts: int) -> int:
+    return min(2 ** attempts, OUTBOX_MAX_BACKOFF_SECONDS)
+
+
+def _chain_keys(row: dict) -> list:
+    return [row["item_key"], IDEMPOTENCY_KEY_PREFIX + row["idempotency_key"]]
+
+
+def _already_on_chain(row: dict):
+    """txid of an earlier attempt that did reach the chain, else None"""
+    items = get_stream_key_items(row["stream"], IDEMPOTENCY_KEY_PREFIX + row["idempotency_key"])
+    return items[0]["txid"] if items else None
+
+
+def _publish_rows(rows: list, now: int):
+    """Publish rows as one publishmulti; record success or schedule retries"""
+    try:
+        with publish_batch() as batch:
+            for row in rows:
+                publish_to_stream(row["stream"], _chain_keys(row), row["value"])
+    except Exception as e:
+        mark_outbox_failed(
+            [(row["id"], now + _backoff_seconds(row["attempts"] + 1)) for row in rows],
+            str(e),
+        )
+        print(f"[OUTBOX] Publish of {len(rows)} item(s) failed: {e}")
+        return 0
+
+    mark_outbox_published([(row["id"], item.txid) for row, item in zip(rows, batch)], now)
+    return len(rows)
+
+
+def drain_outbox(batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """
+    Background job entry point for the configured ANCHOR_MODE
+    """
+    if ANCHOR_MODE == "merkle":
+        return anchor_merkle_batches()
+    return publish_outbox_items(batch_size)
+
+
+def publish_outbox_items(batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """
+    Publish due outbox items one stream item each. Returns how many were published.
+
+    First attempts go out together in one publishmulti. Retried items are
+    checked against the chain and then published one by one, so a single bad
+    item can't keep failing a whole batch.
+    """
+    now = int(time.time())
+    rows = get_pending_outbox_items(now, batch_size)
+    if not rows:
+        return 0
+
+    fresh = [row for row in rows if row["attempts"] == 0]
+    retries = [row for row in rows if row["attempts"] > 0]
+
+    published = _publish_rows(fresh, now) if fresh else 0
+
+    for row in retries:
+        try:
+            txid = _already_on_chain(row)
+        except Exception as e:
+            mark_outbox_failed([(row["id"], now + _backoff_seconds(row["attempts"] + 1))], str(e))
+            continue
+
+        if txid:
+            mark_outbox_published([(row["id"], txid)], now)
+            published += 1
+        else:
+            published += _publish_rows([row], now)
+
+    return published
+
+
+# =========================
+# MERKLE ANCHORING
+# =========================
+
+def seal_merkle_batch(now: int, force: bool = False):
+    """
+    Build a Merkle batch from pending outbox items once MERKLE_BATCH_SIZE items
+    are waiting or the oldest has waited MERKLE_MAX_WAIT_SECONDS.
+    Returns the batch id, or None if nothing was sealed.
+    """
+    rows = get_pending_outbox_items(now, MERKLE_BATCH_SIZE)
+    if not rows:
+        return None
+
+    full = len(rows) >= MERKLE_BATCH_SIZE
+    overdue = rows[0]["created_at"] <= now - MERKLE_MAX_WAIT_SECONDS
+    if not (full or overdue or force):
+        return None
+
+    leaves = [leaf_hash(row["stream"], row["item_key"], row["value"]) for row in rows]
+    root, proofs = build_merkle_tree(leaves)
+
+    batch_id = f"MB-{now}-{uuid.uuid4().hex[:8]}"
+    seal_anchor_batch(
+        batch_id,
+        root,
+        now,
+        [
+            {
+                "outbox_id": row["id"],
+                "stream": row["stream"],
+                "item_key": row["item_key"],
+                "value": row["value"],
+                "leaf_hash": leaf,
+                "proof": proof,
+            }
+            for row, leaf, proof in zip(rows, leaves, proofs)
+        ],
+    )
+    return batch_id
+
+
+def _publish_root(batch: dict, now: int) -> bool:
+    try:
+        # The batch id doubles as idempotency key for retries
+        existing = get_stream_key_items(MERKLE_ROOT_STREAM, batch["batch_id"]) if batch["attempts"] else []
+        if existing:
+            txid = existing[0]["txid"]
+        else:
+            txid = publish_to_stream(MERKLE_ROOT_STREAM, batch["batch_id"], batch["root"])
+    except Exception as e:
+        mark_anchor_batch_failed(batch["batch_id"], now + _backoff_seconds(batch["attempts"] + 1), str(e))
+        print(f"[OUTBOX] Merkle root publish for {batch['batch_id']} failed: {e}")
+        return False
+
+    mark_anchor_batch_published(batch["batch_id"], txid, now)
+    return True
+
+
+def anchor_merkle_batches() -> int:
+    """
+    Seal ready events into Merkle batches and publish pending roots.
+    Returns how many events were anchored.
+    """
+    now = int(time.time())
+    while seal_merkle_batch(now):
+        pass
+
+    anchored = 0
+    for batch in get_pending_anchor_batches(now, limit=20):
+        if _publish_root(batch, now):
+            anchored += batch["size"]
+    return anchored
@@ -1,7 +1,7 @@
 # backend/blockchain/transactions.py
 
 from blockchain.utils import sha256_hash
-from multichain_rpc import publish_to_stream
+from blockchain.outbox import enqueue_publish
 
 TXN_STREAM = "transactions"
 REPAYMENT_STREAM = "repayments"
@@ -14,7 +14,7 @@ def record_transaction_receipt(txn_payload: dict, tx_id: str) -> str:
     """
     txn_hash = sha256_hash(txn_payload)
 
-    publish_to_stream(
+    enqueue_publish(
         stream=TXN_STREAM,
         key=tx_id,
         value=txn_hash
@@ -29,7 +29,7 @@ def record_repayment(repayment_payload: dict, loan_id: str) -> str:
     """
     repayment_hash = sha256_hash(repayment_payload)
 
-    publish_to_stream(
+    enqueue_publish(
         stream=REPAYMENT_STREAM,
         key=loan_id,
         value=repayment_hash
@@ -44,7 +44,7 @@ def record_fee_allocation(fee_payload: dict, loan_id: str) -> str:
     """
     fee_hash = sha256_hash(fee_payload)
 
-    publish_to_stream(
+    enqueue_publish(
         stream=FEE_STREAM,
         key=loan_id,
         value=fee_hash
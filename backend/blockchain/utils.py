@@ -1,9 +1,8 @@
-import hashlib
-import json
+from blockchain.canonical import canonical_hash
 
 def sha256_hash(payload: dict) -> str:
     """
     Convert dict → canonical JSON → SHA256 hash
+    (see blockchain/canonical.py for the encoding rules)
     """
-    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
-    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    return canonical_hash(payload)
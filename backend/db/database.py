@@ -1,192 +1,831 @@
 import sqlite3
 import json
 import os
-from typing import Any, Dict, List, Optional
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.due_dates import compute_due_at, to_epoch
+from utils.emi_calculator import generate_installments
 
 DB_FILE = "artha.db"
 
-def get_connection():
-    conn = sqlite3.connect(DB_FILE)
+# ---- CONNECTION POOL SETTINGS ----
+POOL_SIZE = int(os.getenv("ARTHA_DB_POOL_SIZE", "8"))
+POOL_TIMEOUT_SECONDS = float(os.getenv("ARTHA_DB_POOL_TIMEOUT", "10"))
+STATEMENT_CACHE_SIZE = 256  # prepared statements kept per connection
+METRICS_WINDOW_SECONDS = 60
+IN_CLAUSE_CHUNK = 500  # max keys per IN (...) query
+
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",   # safe with WAL, avoids fsync per commit
+    "PRAGMA cache_size=-16000",    # ~16 MB page cache per connection
+    "PRAGMA mmap_size=268435456",  # 256 MB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+PK_MAP = {
+    "users": "phone",
+    "sessions": "token",
+    "otps": "phone",
+    "kyc": "user_id",
+    "loans": "loan_id",
+    "transactions": "loan_id",  # transaction_service stores receipts by loan_id
+    "financial_data": "user_id",
+    "agreement_executions": "loan_id",
+    "loan_acceptances": "loan_id",
+    "repayments": "repayment_id",
+}
+
+
+# Loan fields promoted to indexed columns (column -> declared type)
+LOAN_INDEX_COLUMNS = {
+    "user_id": "TEXT",
+    "lender_id": "TEXT",
+    "status": "TEXT",
+    "start_timestamp": "",  # ISO string or unix int depending on the flow
+    "due_at": "INTEGER",    # unix seconds, set at activation
+    "created_at": "INTEGER",
+    # Marketplace filter / sort columns
+    "amount": "REAL",
+    "interest_rate": "REAL",
+    "tenure_months": "INTEGER",
+    "credit_score": "INTEGER",
+    "purpose": "TEXT",
+}
+
+# Tables whose rows are hashed onto the chain; every write stamps a
+# monotonically increasing change_seq so the reconciler can walk changes
+CHANGE_TRACKED_TABLES = (
+    "kyc",
+    "loans",
+    "transactions",
+    "agreement_executions",
+    "loan_acceptances",
+    "repayments",
+)
+
+# Keyset-paginated loan sorts: name -> (column, direction)
+LOAN_PAGE_SORTS = {
+    "newest": ("created_at", "DESC"),
+    "oldest": ("created_at", "ASC"),
+    "amount_asc": ("amount", "ASC"),
+    "amount_desc": ("amount", "DESC"),
+    "rate_asc": ("interest_rate", "ASC"),
+    "rate_desc": ("interest_rate", "DESC"),
+    "credit_score_desc": ("credit_score", "DESC"),
+}
+
+
+def _open_connection(db_file: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        db_file,
+        check_same_thread=False,  # pooled connections move between request threads
+        cached_statements=STATEMENT_CACHE_SIZE,
+    )
     conn.row_factory = sqlite3.Row
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
     return conn
 
+
+def get_connection():
+    """Open a standalone (non-pooled) connection, e.g. for debug scripts"""
+    return _open_connection(DB_FILE)
+
+
+# =========================
+# CONNECTION POOL
+# =========================
+
+class ConnectionPool:
+    """
+    Bounded pool of long-lived SQLite connections.
+    Connections are opened lazily up to `size`; callers beyond that
+    wait for a release (up to `timeout` seconds).
+    """
+
+    def __init__(self, db_file: str, size: int, timeout: float):
+        self.db_file = db_file
+        self.size = size
+        self.timeout = timeout
+
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+
+        # ---- Metrics ----
+        self._checkouts = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._recent_checkouts = deque()
+        self._started_at = time.monotonic()
+
+    def acquire(self) -> sqlite3.Connection:
+        started = time.monotonic()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open_or_wait()
+
+        now = time.monotonic()
+        waited = now - started
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+            self._recent_checkouts.append(now)
+            self._prune_recent(now)
+        return conn
+
+    def _open_or_wait(self) -> sqlite3.Connection:
+        with self._lock:
+            can_open = self._created < self.size
+            if can_open:
+                self._created += 1
+
+        if can_open:
+            try:
+                return _open_connection(self.db_file)
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            with self._lock:
+                self._timeouts += 1
+            raise TimeoutError("Database connection pool exhausted")
+
+    def release(self, conn: sqlite3.Connection):
+        with self._lock:
+            self._in_use -= 1
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # Broken connection: drop it and let the pool open a fresh one
+            conn.close()
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put_nowait(conn)
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+    def _prune_recent(self, now: float):
+        cutoff = now - METRICS_WINDOW_SECONDS
+        while self._recent_checkouts and self._recent_checkouts[0] < cutoff:
+            self._recent_checkouts.popleft()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            self._prune_recent(now)
+            window = min(METRICS_WINDOW_SECONDS, max(now - self._started_at, 1e-9))
+            return {
+                "db_file": self.db_file,
+                "pool_size": self.size,
+                "open_connections": self._created,
+                "in_use": self._in_use,
+                "idle": self._idle.qsize(),
+                "checkouts_total": self._checkouts,
+                "checkouts_per_second": round(len(self._recent_checkouts) / window, 2),
+                "avg_wait_ms": round(self._total_wait / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+                "max_wait_ms": round(self._max_wait * 1000, 3),
+                "timeouts": self._timeouts,
+            }
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None or _pool.db_file != DB_FILE:
+        with _pool_lock:
+            if _pool is None or _pool.db_file != DB_FILE:
+                if _pool is not None:
+                    _pool.close()
+                _pool = ConnectionPool(DB_FILE, POOL_SIZE, POOL_TIMEOUT_SECONDS)
+    return _pool
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Pool size, wait times and checkout rate for the health endpoint"""
+    return get_pool().stats()
+
+
+def check_db_health() -> bool:
+    with _cursor() as cursor:
+        cursor.execute("SELECT 1")
+        return cursor.fetchone()[0] == 1
+
+
+def _chunks(keys: List[Any], size: int = IN_CLAUSE_CHUNK) -> List[List[Any]]:
+    """Split keys so IN (...) lists stay under SQLite's bound-parameter limit"""
+    return [keys[i:i + size] for i in range(0, len(keys), size)]
+
+
+# Connection bound to the current thread by `transaction()`
+_local = threading.local()
+
+
+@contextmanager
+def _cursor():
+    """
+    Check out a pooled connection and yield a cursor.
+    Commits on success, rolls back on error.
+    Inside `transaction()` the bound connection is reused and left uncommitted.
+    """
+    bound = getattr(_local, "conn", None)
+    if bound is not None:
+        yield bound.cursor()
+        return
+
+    pool = get_pool()
+    conn = pool.acquire()
+    try:
+        yield conn.cursor()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        pool.release(conn)
+
+
+@contextmanager
+def transaction():
+    """
+    Unit of work: every helper call made inside the block (on this thread)
+    shares one connection and is committed once, or rolled back on error.
+
+        with transaction():
+            put_item("loans", loan_id, loan)
+            put_item("loan_acceptances", loan_id, acceptance)
+
+    Nested blocks join the outermost transaction.
+    """
+    if getattr(_local, "conn", None) is not None:
+        yield
+        return
+
+    pool = get_pool()
+    conn = pool.acquire()
+    _local.conn = conn
+    try:
+        # Take the write lock up front so read-then-write flows can't deadlock
+        conn.execute("BEGIN IMMEDIATE")
+        yield
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        _local.conn = None
+        pool.release(conn)
+
+
+def in_transaction() -> bool:
+    return getattr(_local, "conn", None) is not None
+
+
 def init_db():
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    # 1. Users Table (Key-Value)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        phone TEXT PRIMARY KEY,
-        json_data TEXT
-    )
-    """)
+    with _cursor() as cursor:
+        # 1. Users Table (Key-Value)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            phone TEXT PRIMARY KEY,
+            json_data TEXT
+        )
+        """)
 
-    # 2. Sessions Table (Key-Value)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS sessions (
-        token TEXT PRIMARY KEY,
-        json_data TEXT
-    )
-    """)
+        # 2. Sessions Table (Key-Value)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            token TEXT PRIMARY KEY,
+            json_data TEXT
+        )
+        """)
 
-    # 3. OTPs Table (Key-Value)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS otps (
-        phone TEXT PRIMARY KEY,
-        json_data TEXT
-    )
-    """)
+        # 3. OTPs Table (Key-Value)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS otps (
+            phone TEXT PRIMARY KEY,
+            json_data TEXT
+        )
+        """)
 
-    # 4. KYC Table (Key-Value)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS kyc (
-        user_id TEXT PRIMARY KEY,
-        json_data TEXT
-    )
-    """)
+        # 4. KYC Table (Key-Value)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS kyc (
+            user_id TEXT PRIMARY KEY,
+            json_data TEXT
+        )
+        """)
 
-    # 5. Credit Scores Table (Key-Value)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS credit_scores (
-        user_id TEXT PRIMARY KEY,
-        score INTEGER
-    )
-    """)
+        # 5. Credit Scores Table (Key-Value)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS credit_scores (
+            user_id TEXT PRIMARY KEY,
+            score INTEGER
+        )
+        """)
 
-    # 6. Loans Table (Key-Value)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS loans (
-        loan_id TEXT PRIMARY KEY,
-        json_data TEXT
-    )
-    """)
+        # 6. Loans Table (Key-Value)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS loans (
+            loan_id TEXT PRIMARY KEY,
+            json_data TEXT
+        )
+        """)
 
-    # 7. Transactions Table (Key-Value - Receipt)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS transactions (
-        loan_id TEXT PRIMARY KEY,
-        json_data TEXT
-    )
-    """)
-    
-    # 8. Financial Data Table (Key-Value)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS financial_data (
-        user_id TEXT PRIMARY KEY,
-        json_data TEXT
-    )
-    """)
-    
-    # 9. Repayments Table (Relational / List Storage)
-    # Storing individual repayments relationally allows easy query by loan_id
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS repayments (
-        repayment_id TEXT PRIMARY KEY,
-        loan_id TEXT,
-        json_data TEXT
-    )
-    """)
+        # 7. Transactions Table (Key-Value - Receipt)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS transactions (
+            loan_id TEXT PRIMARY KEY,
+            json_data TEXT
+        )
+        """)
 
-    # 10. Audit/Other Stores (Agreement Execution)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS agreement_executions (
-        loan_id TEXT PRIMARY KEY,
-        json_data TEXT
-    )
-    """)
+        # 8. Financial Data Table (Key-Value)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS financial_data (
+            user_id TEXT PRIMARY KEY,
+            json_data TEXT
+        )
+        """)
+
+        # 9. Repayments Table (Relational / List Storage)
+        # Storing individual repayments relationally allows easy query by loan_id
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS repayments (
+            repayment_id TEXT PRIMARY KEY,
+            loan_id TEXT,
+            json_data TEXT
+        )
+        """)
+
+        # 10. Audit/Other Stores (Agreement Execution)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS agreement_executions (
+            loan_id TEXT PRIMARY KEY,
+            json_data TEXT
+        )
+        """)
+
+        # 11. Loan Acceptance Store (Audit)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS loan_acceptances (
+            loan_id TEXT PRIMARY KEY,
+            json_data TEXT
+        )
+        """)
+
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_repayments_loan ON repayments (loan_id)")
+
+        # Session expiry (for bulk sweeps of expired tokens)
+        _add_generated_columns(cursor, "sessions", {"expires_at": "TEXT"})
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)")
+
+        # 12. Repayment Totals (per-loan aggregate, maintained by add_repayment)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS repayment_totals (
+            loan_id TEXT PRIMARY KEY,
+            total_repaid REAL NOT NULL DEFAULT 0,
+            paid_emis INTEGER NOT NULL DEFAULT 0
+        )
+        """)
+        # Backfill loans that have repayments but no aggregate row yet
+        cursor.execute("""
+        INSERT OR IGNORE INTO repayment_totals (loan_id, total_repaid, paid_emis)
+        SELECT loan_id, SUM(json_extract(json_data, '$.amount')), COUNT(*)
+        FROM repayments
+        GROUP BY loan_id
+        """)
+
+        # 13. Loan lookup columns (generated from json_data, always in sync)
+        _add_generated_columns(cursor, "loans", LOAN_INDEX_COLUMNS)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_loans_user_status ON loans (user_id, status)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_loans_lender_status ON loans (lender_id, status)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_loans_status_start ON loans (status, start_timestamp)")
+        # Default detection walks ACTIVE loans by deadline
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_loans_status_due ON loans (status, due_at, loan_id)")
+        # One (status, sort column, loan_id) index per marketplace sort, for keyset pagination
+        cursor.execute("DROP INDEX IF EXISTS idx_loans_status_created")
+        for column in sorted({column for column, _ in LOAN_PAGE_SORTS.values()}):
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_loans_status_{column} ON loans (status, {column}, loan_id)"
+            )
+
+        # 14. Chain Outbox (stream writes committed with the business change)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS chain_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            idempotency_key TEXT NOT NULL UNIQUE,
+            stream TEXT NOT NULL,
+            item_key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'PENDING',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            txid TEXT,
+            created_at INTEGER NOT NULL,
+            published_at INTEGER
+        )
+        """)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_chain_outbox_pending ON chain_outbox (status, next_attempt_at, id)"
+        )
+
+        # 15. Merkle Anchoring (one chain item per batch root + local inclusion proofs)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS anchor_batches (
+            batch_id TEXT PRIMARY KEY,
+            root TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'PENDING',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            txid TEXT,
+            created_at INTEGER NOT NULL,
+            published_at INTEGER
+        )
+        """)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_anchor_batches_pending ON anchor_batches (status, next_attempt_at)"
+        )
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS anchor_proofs (
+            outbox_id INTEGER PRIMARY KEY,
+            batch_id TEXT NOT NULL,
+            stream TEXT NOT NULL,
+            item_key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            leaf_hash TEXT NOT NULL,
+            proof TEXT NOT NULL
+        )
+        """)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_anchor_proofs_item ON anchor_proofs (stream, item_key, outbox_id)"
+        )
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_anchor_proofs_batch ON anchor_proofs (batch_id)")
 
-    # 11. Loan Acceptance Store (Audit)
+        # 16. Stream Mirror (local indexed copy of MultiChain stream items)
+        # seq = item position in liststreamitems; one row per key of multi-key items
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stream_items (
+            stream TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            item_key TEXT NOT NULL,
+            txid TEXT NOT NULL,
+            data TEXT,
+            publishers TEXT,
+            blocktime INTEGER,
+            confirmations INTEGER NOT NULL DEFAULT 0,
+            synced_at INTEGER NOT NULL,
+            PRIMARY KEY (stream, seq, item_key)
+        )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_stream_items_key ON stream_items (stream, item_key, seq)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_stream_items_txid ON stream_items (stream, txid)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_stream_items_confirmations ON stream_items (stream, confirmations)")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stream_sync_state (
+            stream TEXT PRIMARY KEY,
+            next_seq INTEGER NOT NULL DEFAULT 0,
+            last_synced_at INTEGER
+        )
+        """)
+
+        # 17. Change tracking + DB-vs-chain reconciliation
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS change_sequence (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            value INTEGER NOT NULL
+        )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO change_sequence (id, value) VALUES (1, 0)")
+        for table in CHANGE_TRACKED_TABLES:
+            _add_change_seq_column(cursor, table)
+        _backfill_due_dates(cursor)  # needs change_seq (section 13 adds due_at)
+
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS reconcile_checkpoints (
+            table_name TEXT PRIMARY KEY,
+            last_seq INTEGER NOT NULL DEFAULT 0,
+            last_run_at INTEGER,
+            checked_total INTEGER NOT NULL DEFAULT 0
+        )
+        """)
+        # status: PENDING (may still be in the outbox) -> MISMATCH after the grace period
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS reconcile_mismatches (
+            table_name TEXT NOT NULL,
+            record_key TEXT NOT NULL,
+            check_name TEXT NOT NULL,
+            db_hash TEXT,
+            chain_hash TEXT,
+            status TEXT NOT NULL DEFAULT 'PENDING',
+            first_seen_at INTEGER NOT NULL,
+            last_checked_at INTEGER NOT NULL,
+            PRIMARY KEY (table_name, record_key)
+        )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_reconcile_mismatches_status ON reconcile_mismatches (status, first_seen_at)")
+
+        # 18. EMI Installments (materialized schedule, repayments applied oldest first)
+        # status: DUE -> PARTIAL -> PAID
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS installments (
+            loan_id TEXT NOT NULL,
+            installment_no INTEGER NOT NULL,
+            user_id TEXT NOT NULL,
+            lender_id TEXT,
+            due_at INTEGER NOT NULL,
+            emi REAL NOT NULL,
+            principal REAL NOT NULL,
+            interest REAL NOT NULL,
+            paid_amount REAL NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'DUE',
+            paid_at INTEGER,
+            PRIMARY KEY (loan_id, installment_no)
+        )
+        """)
+        # Partial indexes: only unpaid installments are ever searched by date
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_installments_unpaid_due ON installments (due_at, loan_id, installment_no) WHERE status != 'PAID'")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_installments_unpaid_user ON installments (user_id, due_at) WHERE status != 'PAID'")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_installments_unpaid_lender ON installments (lender_id, due_at) WHERE status != 'PAID'")
+        _backfill_installments(cursor)
+
+        # 19. Credit score recomputation (dirty set + score history)
+        # One row per user whose inputs changed; every re-mark bumps `version`
+        # so the worker only clears marks it has actually recomputed
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS credit_score_dirty (
+            user_id TEXT PRIMARY KEY,
+            reason TEXT NOT NULL,
+            marked_at INTEGER NOT NULL,
+            version INTEGER NOT NULL DEFAULT 1
+        )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_credit_score_dirty_queue ON credit_score_dirty (marked_at, user_id)")
+        # Append-only score series, clustered by (user_id, scored_at): WITHOUT
+        # ROWID keeps each user's points contiguous so range reads are one
+        # b-tree seek. reason is a 1-byte code and features a packed 12-byte
+        # snapshot (utils/score_codec). credit_scores stays the head (latest value).
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS credit_score_history (
+            user_id TEXT NOT NULL,
+            scored_at INTEGER NOT NULL,
+            score INTEGER NOT NULL,
+            reason INTEGER NOT NULL,
+            features BLOB,
+            PRIMARY KEY (user_id, scored_at)
+        ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_credit_score_history_time ON credit_score_history (scored_at)")
+
+
+def _add_generated_columns(cursor, table: str, columns: Dict[str, str]):
+    """
+    Add VIRTUAL columns extracted from json_data (idempotent).
+    Existing rows need no backfill; indexes on them are kept current by SQLite.
+    """
+    cursor.execute(f"PRAGMA table_xinfo({table})")
+    existing = {row["name"] for row in cursor.fetchall()}
+
+    for column, col_type in columns.items():
+        if column in existing:
+            continue
+        cursor.execute(
+            f"ALTER TABLE {table} ADD COLUMN {column} {col_type} "
+            f"GENERATED ALWAYS AS (json_extract(json_data, '$.{column}')) VIRTUAL"
+        )
+
+def _backfill_due_dates(cursor):
+    """Give ACTIVE loans activated before due_at existed their deadline (idempotent)"""
+    cursor.execute("SELECT loan_id, json_data FROM loans WHERE status = 'ACTIVE' AND due_at IS NULL")
+    updates = []
+    for row in cursor.fetchall():
+        data = json.loads(row["json_data"])
+        try:
+            due_at = compute_due_at(data.get("start_timestamp"), data.get("tenure_months"))
+        except ValueError:
+            due_at = None
+        if due_at is not None:
+            data["due_at"] = due_at
+            updates.append((row["loan_id"], data))
+
+    if updates:
+        first = _next_change_seqs(cursor, len(updates))
+        cursor.executemany(
+            "UPDATE loans SET json_data = ?, change_seq = ? WHERE loan_id = ?",
+            [(json.dumps(data), first + i, loan_id) for i, (loan_id, data) in enumerate(updates)],
+        )
+        print(f"[DB] Backfilled due_at for {len(updates)} active loans")
+
+def _backfill_installments(cursor):
+    """Materialize schedules for ACTIVE loans activated before installments existed (idempotent)"""
     cursor.execute("""
-    CREATE TABLE IF NOT EXISTS loan_acceptances (
-        loan_id TEXT PRIMARY KEY,
-        json_data TEXT
-    )
+    SELECT l.loan_id, l.json_data FROM loans l
+    WHERE l.status = 'ACTIVE'
+      AND NOT EXISTS (SELECT 1 FROM installments i WHERE i.loan_id = l.loan_id)
     """)
-    
-    conn.commit()
-    conn.close()
+    loans = [(row["loan_id"], json.loads(row["json_data"])) for row in cursor.fetchall()]
+
+    created = 0
+    for loan_id, loan in loans:
+        try:
+            start = to_epoch(loan.get("start_timestamp"))
+            if start is None or not loan.get("tenure_months"):
+                continue
+            schedule = generate_installments(
+                loan["amount"], loan.get("interest_rate", 0), loan["tenure_months"], start
+            )
+        except (ValueError, ZeroDivisionError, KeyError):
+            continue
+
+        _insert_installments(cursor, loan_id, loan["user_id"], loan.get("lender_id"), schedule)
+        cursor.execute("SELECT total_repaid FROM repayment_totals WHERE loan_id = ?", (loan_id,))
+        row = cursor.fetchone()
+        if row and row[0]:
+            _allocate_payment(cursor, loan_id, row[0], None)
+        created += 1
+
+    if created:
+        print(f"[DB] Materialized installments for {created} active loans")
+
+def _add_change_seq_column(cursor, table: str):
+    """
+    Add the change_seq column + index (idempotent). Rows written before the
+    column existed get sequence numbers in rowid order.
+    """
+    cursor.execute(f"PRAGMA table_xinfo({table})")
+    if "change_seq" not in {row["name"] for row in cursor.fetchall()}:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN change_seq INTEGER")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_change_seq ON {table} (change_seq)")
+
+    cursor.execute(f"SELECT rowid FROM {table} WHERE change_seq IS NULL ORDER BY rowid")
+    rowids = [row[0] for row in cursor.fetchall()]
+    if rowids:
+        first = _next_change_seqs(cursor, len(rowids))
+        cursor.executemany(
+            f"UPDATE {table} SET change_seq = ? WHERE rowid = ?",
+            [(first + i, rowid) for i, rowid in enumerate(rowids)],
+        )
+
+def _next_change_seqs(cursor, count: int) -> int:
+    """
+    Reserve `count` change sequence numbers; returns the first.
+    The counter row is written inside the caller's transaction, so
+    sequence order matches commit order (SQLite has a single writer).
+    """
+    cursor.execute("UPDATE change_sequence SET value = value + ? WHERE id = 1", (count,))
+    cursor.execute("SELECT value FROM change_sequence WHERE id = 1")
+    return cursor.fetchone()[0] - count + 1
 
 # ---- GENERIC HELPERS ----
 
 def put_item(table: str, key: str, data: Dict[str, Any]):
     """Store a dict as JSON"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    # For credit_scores table, it's just user_id and score(int)
-    if table == 'credit_scores':
-        cursor.execute(f"INSERT OR REPLACE INTO {table} (user_id, score) VALUES (?, ?)", (key, data))
-    else:
+    with _cursor() as cursor:
+        # For credit_scores table, it's just user_id and score(int)
+        if table == 'credit_scores':
+            cursor.execute(f"INSERT OR REPLACE INTO {table} (user_id, score) VALUES (?, ?)", (key, data))
+            return
+
         # Standard Key-Value JSON Tables (users, sessions, otps, kyc, loans, transactions, etc)
-        # Note: PK column name varies, we assume standard schema has 2 cols: PK and json_data.
-        # But we need to know the PK column name.
-        # Let's verify PK name map.
-        pk_map = {
-            "users": "phone",
-            "sessions": "token",
-            "otps": "phone",
-            "kyc": "user_id",
-            "loans": "loan_id",
-            "transactions": "loan_id", # Based on transaction_service usage: key is loan_id? No, verify_transaction assumes tx_id. 
-                                       # Wait, transaction_service uses TRANSACTION_STORE[loan_id]. 
-                                       # Actually line 63: TRANSACTION_STORE[loan_id] = receipt_data. 
-                                       # But audit_service verify_transaction uses tx_id.
-                                       # Let's fix this inconsistency in the caller. 
-                                       # For now, generic helper assumes first col is PK.
-            "financial_data": "user_id",
-            "agreement_executions": "loan_id",
-            "loan_acceptances": "loan_id",
-            "repayments": "repayment_id" 
-        }
-        
-        pk_col = pk_map.get(table)
+        pk_col = PK_MAP.get(table)
         if not pk_col:
-             raise ValueError(f"Unknown table: {table}")
+            raise ValueError(f"Unknown table: {table}")
 
-        cursor.execute(f"INSERT OR REPLACE INTO {table} ({pk_col}, json_data) VALUES (?, ?)", 
+        if table in CHANGE_TRACKED_TABLES:
+            cursor.execute(f"INSERT OR REPLACE INTO {table} ({pk_col}, json_data, change_seq) VALUES (?, ?, ?)",
+                           (key, json.dumps(data), _next_change_seqs(cursor, 1)))
+            return
+
+        cursor.execute(f"INSERT OR REPLACE INTO {table} ({pk_col}, json_data) VALUES (?, ?)",
                        (key, json.dumps(data)))
-    
-    conn.commit()
-    conn.close()
 
 def get_item(table: str, key: str) -> Optional[Dict[str, Any]]:
     """Retrieve dict from JSON"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    if table == 'credit_scores':
-        cursor.execute(f"SELECT score FROM {table} WHERE user_id = ?", (key,))
+    with _cursor() as cursor:
+        if table == 'credit_scores':
+            cursor.execute(f"SELECT score FROM {table} WHERE user_id = ?", (key,))
+            row = cursor.fetchone()
+            return row['score'] if row else None
+
+        pk_col = PK_MAP[table]
+        cursor.execute(f"SELECT json_data FROM {table} WHERE {pk_col} = ?", (key,))
         row = cursor.fetchone()
-        conn.close()
-        return row['score'] if row else None
-    
-    pk_map = {
-        "users": "phone",
-        "sessions": "token",
-        "otps": "phone",
-        "kyc": "user_id",
-        "loans": "loan_id",
-        "transactions": "loan_id",
-        "financial_data": "user_id",
-        "agreement_executions": "loan_id",
-        "loan_acceptances": "loan_id",
-        "repayments": "repayment_id"
-    }
-    pk_col = pk_map[table]
-    
-    cursor.execute(f"SELECT json_data FROM {table} WHERE {pk_col} = ?", (key,))
-    row = cursor.fetchone()
-    conn.close()
-    
+
     if row:
         return json.loads(row['json_data'])
     return None
 
+def get_items(table: str, keys: List[str]) -> Dict[str, Any]:
+    """
+    Bulk get_item: one IN (...) query per chunk of keys.
+    Returns key -> data for the keys that exist.
+    """
+    unique_keys = list(dict.fromkeys(keys))
+    result = {}
+
+    with _cursor() as cursor:
+        if table == 'credit_scores':
+            for chunk in _chunks(unique_keys):
+                cursor.execute(
+                    f"SELECT user_id, score FROM {table} WHERE user_id IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                )
+                for row in cursor.fetchall():
+                    result[row['user_id']] = row['score']
+            return result
+
+        pk_col = PK_MAP[table]
+        for chunk in _chunks(unique_keys):
+            cursor.execute(
+                f"SELECT {pk_col}, json_data FROM {table} WHERE {pk_col} IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            )
+            for row in cursor.fetchall():
+                result[row[pk_col]] = json.loads(row['json_data'])
+    return result
+
+def get_versioned_items(table: str, keys: List[str]) -> Dict[str, Tuple[int, Dict[str, Any]]]:
+    """
+    get_items for change-tracked tables, with each row's change_seq:
+    key -> (change_seq, data)
+    """
+    pk_col = PK_MAP[table]
+    result = {}
+    with _cursor() as cursor:
+        for chunk in _chunks(list(dict.fromkeys(keys))):
+            cursor.execute(
+                f"SELECT {pk_col}, change_seq, json_data FROM {table} "
+                f"WHERE {pk_col} IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            )
+            for row in cursor.fetchall():
+                result[row[pk_col]] = (row['change_seq'], json.loads(row['json_data']))
+    return result
+
+def put_items(table: str, mapping: Dict[str, Any]):
+    """Bulk put_item: a single executemany in one commit"""
+    if not mapping:
+        return
+
+    with _cursor() as cursor:
+        if table == 'credit_scores':
+            cursor.executemany(f"INSERT OR REPLACE INTO {table} (user_id, score) VALUES (?, ?)",
+                               list(mapping.items()))
+            return
+
+        pk_col = PK_MAP.get(table)
+        if not pk_col:
+            raise ValueError(f"Unknown table: {table}")
+
+        if table in CHANGE_TRACKED_TABLES:
+            first = _next_change_seqs(cursor, len(mapping))
+            cursor.executemany(f"INSERT OR REPLACE INTO {table} ({pk_col}, json_data, change_seq) VALUES (?, ?, ?)",
+                               [(key, json.dumps(data), first + i) for i, (key, data) in enumerate(mapping.items())])
+            return
+
+        cursor.executemany(f"INSERT OR REPLACE INTO {table} ({pk_col}, json_data) VALUES (?, ?)",
+                           [(key, json.dumps(data)) for key, data in mapping.items()])
+
 def delete_item(table: str, key: str):
-    conn = get_connection()
-    cursor = conn.cursor()
-    
     pk_map = {
         "users": "phone",
         "sessions": "token",
@@ -196,16 +835,18 @@ def delete_item(table: str, key: str):
     pk_col = pk_map.get(table, "user_id") # Default risky
     if table in ["otps", "users", "sessions"]:
          pk_col = pk_map[table]
-    
-    cursor.execute(f"DELETE FROM {table} WHERE {pk_col} = ?", (key,))
-    conn.commit()
-    conn.close()
+
+    with _cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE {pk_col} = ?", (key,))
+
+def delete_expired_sessions(now_iso: str) -> int:
+    """Bulk-delete sessions whose expires_at (UTC ISO string) is before now_iso"""
+    with _cursor() as cursor:
+        cursor.execute("DELETE FROM sessions WHERE expires_at < ?", (now_iso,))
+        return cursor.rowcount
 
 def get_all_items(table: str) -> Dict[str, Any]:
     """Return all items as a dict (key -> data) to mimic full dictionary access"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
     pk_map = {
         "loans": "loan_id",
         "users": "phone",
@@ -213,15 +854,15 @@ def get_all_items(table: str) -> Dict[str, Any]:
         "otps": "phone",
         "credit_scores": "user_id"
     }
-    
+
     if table not in pk_map:
         return {} # Only supporting loans for marketplace listing currently
-        
+
     pk_col = pk_map[table]
-    cursor.execute(f"SELECT {pk_col}, json_data FROM {table}")
-    rows = cursor.fetchall()
-    conn.close()
-    
+    with _cursor() as cursor:
+        cursor.execute(f"SELECT {pk_col}, json_data FROM {table}")
+        rows = cursor.fetchall()
+
     result = {}
     for row in rows:
         result[row[pk_col]] = json.loads(row['json_data'])
@@ -229,18 +870,818 @@ def get_all_items(table: str) -> Dict[str, Any]:
 
 def get_repayments(loan_id: str) -> List[Dict[str, Any]]:
     """Specific helper for fetching list of repayments"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT json_data FROM repayments WHERE loan_id = ?", (loan_id,))
-    rows = cursor.fetchall()
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("SELECT json_data FROM repayments WHERE loan_id = ?", (loan_id,))
+        rows = cursor.fetchall()
     return [json.loads(row['json_data']) for row in rows]
 
+def get_repayments_for_loans(loan_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Bulk get_repayments: loan_id -> repayments (loans without any are omitted)"""
+    result: Dict[str, List[Dict[str, Any]]] = {}
+    with _cursor() as cursor:
+        for chunk in _chunks(list(dict.fromkeys(loan_ids))):
+            cursor.execute(
+                f"SELECT loan_id, json_data FROM repayments WHERE loan_id IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            )
+            for row in cursor.fetchall():
+                result.setdefault(row['loan_id'], []).append(json.loads(row['json_data']))
+    return result
+
+def get_all_keys(table: str) -> List[str]:
+    """Primary keys of a table, without loading json_data"""
+    pk_col = PK_MAP[table]
+    with _cursor() as cursor:
+        cursor.execute(f"SELECT {pk_col} FROM {table} ORDER BY rowid")
+        return [row[0] for row in cursor.fetchall()]
+
+def get_repayment(repayment_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """(loan_id, repayment) for one repayment"""
+    with _cursor() as cursor:
+        cursor.execute("SELECT loan_id, json_data FROM repayments WHERE repayment_id = ?", (repayment_id,))
+        row = cursor.fetchone()
+    return (row['loan_id'], json.loads(row['json_data'])) if row else None
+
 def add_repayment(repayment_id: str, loan_id: str, data: Dict[str, Any]):
     """Specific helper for adding repayment"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO repayments (repayment_id, loan_id, json_data) VALUES (?, ?, ?)",
-                   (repayment_id, loan_id, json.dumps(data)))
-    conn.commit()
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("INSERT INTO repayments (repayment_id, loan_id, json_data, change_seq) VALUES (?, ?, ?, ?)",
+                       (repayment_id, loan_id, json.dumps(data), _next_change_seqs(cursor, 1)))
+        # Keep the running total in the same commit as the repayment row
+        cursor.execute("""
+        INSERT INTO repayment_totals (loan_id, total_repaid, paid_emis) VALUES (?, ?, 1)
+        ON CONFLICT(loan_id) DO UPDATE SET
+            total_repaid = total_repaid + excluded.total_repaid,
+            paid_emis = paid_emis + 1
+        """, (loan_id, data["amount"]))
+
+def get_repayment_totals(loan_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Bulk lookup of per-loan repayment aggregates.
+    Loans without repayments get zero totals.
+    """
+    totals = {loan_id: {"total_repaid": 0, "paid_emis": 0} for loan_id in loan_ids}
+
+    with _cursor() as cursor:
+        for chunk in _chunks(list(totals)):
+            cursor.execute(
+                f"SELECT loan_id, total_repaid, paid_emis FROM repayment_totals "
+                f"WHERE loan_id IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            )
+            for row in cursor.fetchall():
+                totals[row["loan_id"]] = {
+                    "total_repaid": row["total_repaid"],
+                    "paid_emis": row["paid_emis"],
+                }
+    return totals
+
+# ---- LOAN QUERIES ----
+
+def find_loans(
+    user_id: Optional[str] = None,
+    lender_id: Optional[str] = None,
+    status: Optional[str] = None,
+    status_in: Optional[List[str]] = None,
+    status_not_in: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Indexed loan lookup. Returns loan_id -> data (same shape as get_all_items("loans"))
+    for matching rows only.
+    """
+    clauses = []
+    params: List[Any] = []
+
+    if user_id is not None:
+        clauses.append("user_id = ?")
+        params.append(user_id)
+    if lender_id is not None:
+        clauses.append("lender_id = ?")
+        params.append(lender_id)
+    if status is not None:
+        clauses.append("status = ?")
+        params.append(status)
+    if status_in:
+        clauses.append(f"status IN ({', '.join('?' * len(status_in))})")
+        params.extend(status_in)
+    if status_not_in:
+        clauses.append(f"(status IS NULL OR status NOT IN ({', '.join('?' * len(status_not_in))}))")
+        params.extend(status_not_in)
+
+    sql = "SELECT loan_id, json_data FROM loans"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY rowid"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    with _cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    return {row["loan_id"]: json.loads(row["json_data"]) for row in rows}
+
+
+def find_loans_page(
+    status: str,
+    sort: str = "newest",
+    after: Optional[Tuple[Any, str]] = None,
+    limit: int = 50,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    min_interest_rate: Optional[float] = None,
+    max_interest_rate: Optional[float] = None,
+    min_tenure_months: Optional[int] = None,
+    max_tenure_months: Optional[int] = None,
+    min_credit_score: Optional[int] = None,
+    max_credit_score: Optional[int] = None,
+    purpose: Optional[str] = None,
+) -> Tuple[List[Tuple[str, Dict[str, Any]]], Optional[Tuple[Any, str]]]:
+    """
+    Keyset-paginated loan listing.
+    `after` is the (sort value, loan_id) of the last row of the previous page.
+    Returns ([(loan_id, data), ...], next_after) where next_after is None on the last page.
+    """
+    if sort not in LOAN_PAGE_SORTS:
+        raise ValueError(f"Unknown sort: {sort}")
+    column, direction = LOAN_PAGE_SORTS[sort]
+
+    clauses = ["status = ?"]
+    params: List[Any] = [status]
+
+    ranges = [
+        ("amount", min_amount, max_amount),
+        ("interest_rate", min_interest_rate, max_interest_rate),
+        ("tenure_months", min_tenure_months, max_tenure_months),
+        ("credit_score", min_credit_score, max_credit_score),
+    ]
+    for range_col, low, high in ranges:
+        if low is not None:
+            clauses.append(f"{range_col} >= ?")
+            params.append(low)
+        if high is not None:
+            clauses.append(f"{range_col} <= ?")
+            params.append(high)
+
+    if purpose:
+        clauses.append("purpose = ? COLLATE NOCASE")
+        params.append(purpose)
+
+    if after is not None:
+        # SQLite sorts NULLs first in ASC and last in DESC; a row-value
+        # comparison with NULL is NULL, so NULL sort values get their own branch
+        after_value, after_id = after
+        if direction == "ASC":
+            if after_value is None:
+                clauses.append(f"(({column} IS NULL AND loan_id > ?) OR {column} IS NOT NULL)")
+                params.append(after_id)
+            else:
+                clauses.append(f"({column}, loan_id) > (?, ?)")
+                params.extend(after)
+        else:
+            if after_value is None:
+                clauses.append(f"({column} IS NULL AND loan_id < ?)")
+                params.append(after_id)
+            else:
+                clauses.append(f"(({column}, loan_id) < (?, ?) OR {column} IS NULL)")
+                params.extend(after)
+
+    sql = (
+        f"SELECT loan_id, {column} AS sort_value, json_data FROM loans "
+        f"WHERE {' AND '.join(clauses)} "
+        f"ORDER BY {column} {direction}, loan_id {direction} "
+        f"LIMIT ?"
+    )
+    params.append(limit + 1)  # one extra row tells us whether another page exists
+
+    with _cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    next_after = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_after = (rows[-1]["sort_value"], rows[-1]["loan_id"])
+
+    return [(row["loan_id"], json.loads(row["json_data"])) for row in rows], next_after
+
+
+def find_due_loans(
+    now: int,
+    after: Optional[Tuple[int, str]] = None,
+    limit: int = 500,
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    ACTIVE loans whose due_at has passed, oldest deadline first.
+    `after` is the (due_at, loan_id) of the last row of the previous chunk.
+    Only overdue rows are touched (idx_loans_status_due).
+    """
+    sql = "SELECT loan_id, due_at, json_data FROM loans WHERE status = 'ACTIVE' AND due_at <= ?"
+    params: List[Any] = [now]
+    if after is not None:
+        sql += " AND (due_at, loan_id) > (?, ?)"
+        params.extend(after)
+    sql += " ORDER BY due_at, loan_id LIMIT ?"
+    params.append(limit)
+
+    with _cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(row["loan_id"], json.loads(row["json_data"])) for row in cursor.fetchall()]
+
+
+# ---- CHAIN OUTBOX ----
+
+def add_outbox_item(idempotency_key: str, stream: str, item_key: str, value: str, created_at: int):
+    """Queue a stream write; call inside transaction() to commit it with the business change"""
+    with _cursor() as cursor:
+        cursor.execute(
+            "INSERT OR IGNORE INTO chain_outbox (idempotency_key, stream, item_key, value, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (idempotency_key, stream, item_key, value, created_at),
+        )
+
+def get_pending_outbox_items(now: int, limit: int) -> List[Dict[str, Any]]:
+    """Oldest PENDING items that are due for a (re)try"""
+    with _cursor() as cursor:
+        cursor.execute(
+            "SELECT * FROM chain_outbox WHERE status = 'PENDING' AND next_attempt_at <= ? "
+            "ORDER BY id LIMIT ?",
+            (now, limit),
+        )
+        return [dict(row) for row in cursor.fetchall()]
+
+def mark_outbox_published(results: List[Tuple[int, str]], published_at: int):
+    """results: [(outbox id, txid), ...]"""
+    with _cursor() as cursor:
+        cursor.executemany(
+            "UPDATE chain_outbox SET status = 'PUBLISHED', txid = ?, published_at = ?, last_error = NULL "
+            "WHERE id = ?",
+            [(txid, published_at, outbox_id) for outbox_id, txid in results],
+        )
+
+def mark_outbox_failed(retries: List[Tuple[int, int]], error: str):
+    """retries: [(outbox id, next_attempt_at), ...]"""
+    with _cursor() as cursor:
+        cursor.executemany(
+            "UPDATE chain_outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? "
+            "WHERE id = ?",
+            [(next_attempt_at, error, outbox_id) for outbox_id, next_attempt_at in retries],
+        )
+
+def get_outbox_stats() -> Dict[str, Any]:
+    with _cursor() as cursor:
+        cursor.execute("SELECT status, COUNT(*) AS n FROM chain_outbox GROUP BY status")
+        counts = {row["status"]: row["n"] for row in cursor.fetchall()}
+        cursor.execute(
+            "SELECT MIN(created_at) AS oldest, MAX(attempts) AS max_attempts "
+            "FROM chain_outbox WHERE status = 'PENDING'"
+        )
+        row = cursor.fetchone()
+        cursor.execute("SELECT COUNT(*) FROM anchor_batches WHERE status = 'PENDING'")
+        pending_batches = cursor.fetchone()[0]
+    return {
+        "pending": counts.get("PENDING", 0),
+        "batched": counts.get("BATCHED", 0),
+        "published": counts.get("PUBLISHED", 0),
+        "oldest_pending_at": row["oldest"],
+        "max_attempts": row["max_attempts"] or 0,
+        "pending_anchor_batches": pending_batches,
+    }
+
+
+# ---- MERKLE ANCHORING ----
+
+def seal_anchor_batch(batch_id: str, root: str, created_at: int, leaves: List[Dict[str, Any]]):
+    """
+    Store a Merkle batch and its inclusion proofs, and move its outbox items
+    to BATCHED, in one commit.
+    leaves: [{"outbox_id", "stream", "item_key", "value", "leaf_hash", "proof"}, ...]
+    """
+    with transaction():
+        with _cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO anchor_batches (batch_id, root, size, created_at) VALUES (?, ?, ?, ?)",
+                (batch_id, root, len(leaves), created_at),
+            )
+            cursor.executemany(
+                "INSERT INTO anchor_proofs (outbox_id, batch_id, stream, item_key, value, leaf_hash, proof) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (leaf["outbox_id"], batch_id, leaf["stream"], leaf["item_key"], leaf["value"],
+                     leaf["leaf_hash"], json.dumps(leaf["proof"]))
+                    for leaf in leaves
+                ],
+            )
+            cursor.executemany(
+                "UPDATE chain_outbox SET status = 'BATCHED' WHERE id = ?",
+                [(leaf["outbox_id"],) for leaf in leaves],
+            )
+
+def get_pending_anchor_batches(now: int, limit: int) -> List[Dict[str, Any]]:
+    with _cursor() as cursor:
+        cursor.execute(
+            "SELECT * FROM anchor_batches WHERE status = 'PENDING' AND next_attempt_at <= ? "
+            "ORDER BY created_at LIMIT ?",
+            (now, limit),
+        )
+        return [dict(row) for row in cursor.fetchall()]
+
+def mark_anchor_batch_published(batch_id: str, txid: str, published_at: int):
+    """Batch root is on chain: the batch and all its outbox items are published"""
+    with transaction():
+        with _cursor() as cursor:
+            cursor.execute(
+                "UPDATE anchor_batches SET status = 'PUBLISHED', txid = ?, published_at = ?, last_error = NULL "
+                "WHERE batch_id = ?",
+                (txid, published_at, batch_id),
+            )
+            cursor.execute(
+                "UPDATE chain_outbox SET status = 'PUBLISHED', txid = ?, published_at = ? "
+                "WHERE id IN (SELECT outbox_id FROM anchor_proofs WHERE batch_id = ?)",
+                (txid, published_at, batch_id),
+            )
+
+def mark_anchor_batch_failed(batch_id: str, next_attempt_at: int, error: str):
+    with _cursor() as cursor:
+        cursor.execute(
+            "UPDATE anchor_batches SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? "
+            "WHERE batch_id = ?",
+            (next_attempt_at, error, batch_id),
+        )
+
+def get_latest_anchor_proof(stream: str, item_key: str) -> Optional[Dict[str, Any]]:
+    """Most recent anchored event for stream/key, with its proof and batch root"""
+    with _cursor() as cursor:
+        cursor.execute(
+            "SELECT p.*, b.root, b.status AS batch_status, b.txid "
+            "FROM anchor_proofs p JOIN anchor_batches b ON b.batch_id = p.batch_id "
+            "WHERE p.stream = ? AND p.item_key = ? "
+            "ORDER BY p.outbox_id DESC LIMIT 1",
+            (stream, item_key),
+        )
+        row = cursor.fetchone()
+
+    if not row:
+        return None
+    result = dict(row)
+    result["proof"] = json.loads(result["proof"])
+    return result
+
+
+def get_anchor_proofs(stream: str, item_key: str) -> List[Dict[str, Any]]:
+    """Every anchored event for stream/key, oldest first, with proofs and batch roots"""
+    with _cursor() as cursor:
+        cursor.execute(
+            "SELECT p.*, b.root, b.status AS batch_status, b.txid "
+            "FROM anchor_proofs p JOIN anchor_batches b ON b.batch_id = p.batch_id "
+            "WHERE p.stream = ? AND p.item_key = ? "
+            "ORDER BY p.outbox_id",
+            (stream, item_key),
+        )
+        rows = [dict(row) for row in cursor.fetchall()]
+
+    for row in rows:
+        row["proof"] = json.loads(row["proof"])
+    return rows
+
+
+# ---- STREAM MIRROR ----
+
+def get_stream_sync_state(stream: str) -> Optional[Dict[str, Any]]:
+    with _cursor() as cursor:
+        cursor.execute("SELECT * FROM stream_sync_state WHERE stream = ?", (stream,))
+        row = cursor.fetchone()
+    return dict(row) if row else None
+
+def save_mirrored_items(stream: str, rows: List[Dict[str, Any]], next_seq: int, synced_at: int):
+    """Append newly tailed stream items and advance the stream's checkpoint in one commit"""
+    with transaction():
+        with _cursor() as cursor:
+            cursor.executemany(
+                "INSERT OR REPLACE INTO stream_items "
+                "(stream, seq, item_key, txid, data, publishers, blocktime, confirmations, synced_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (stream, row["seq"], row["item_key"], row["txid"], row["data"], row["publishers"],
+                     row["blocktime"], row["confirmations"], synced_at)
+                    for row in rows
+                ],
+            )
+            cursor.execute(
+                "INSERT INTO stream_sync_state (stream, next_seq, last_synced_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(stream) DO UPDATE SET next_seq = excluded.next_seq, "
+                "last_synced_at = excluded.last_synced_at",
+                (stream, next_seq, synced_at),
+            )
+
+def get_min_unsettled_seq(stream: str, min_confirmations: int) -> Optional[int]:
+    """First stream position whose confirmations are still below min_confirmations"""
+    with _cursor() as cursor:
+        cursor.execute(
+            "SELECT MIN(seq) FROM stream_items WHERE stream = ? AND confirmations < ?",
+            (stream, min_confirmations),
+        )
+        return cursor.fetchone()[0]
+
+def update_mirrored_confirmations(stream: str, updates: List[Tuple[str, Optional[int], int]], synced_at: int):
+    """updates: [(txid, blocktime, confirmations), ...]"""
+    with _cursor() as cursor:
+        cursor.executemany(
+            "UPDATE stream_items SET blocktime = ?, confirmations = ?, synced_at = ? "
+            "WHERE stream = ? AND txid = ?",
+            [(blocktime, confirmations, synced_at, stream, txid) for txid, blocktime, confirmations in updates],
+        )
+
+def list_mirrored_items(
+    stream: str,
+    item_key: Optional[str] = None,
+    start: int = 0,
+    limit: Optional[int] = None,
+    since_blocktime: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Mirrored items of a stream in stream order, from position `start`.
+    Without item_key a multi-key item is returned once (not once per key).
+    Unconfirmed items (no blocktime yet) always pass since_blocktime.
+    """
+    sql = "SELECT * FROM stream_items WHERE stream = ? AND seq >= ?"
+    params: List[Any] = [stream, start]
+    if item_key is not None:
+        sql += " AND item_key = ?"
+        params.append(item_key)
+    if since_blocktime is not None:
+        sql += " AND (blocktime IS NULL OR blocktime >= ?)"
+        params.append(since_blocktime)
+    if item_key is None:
+        sql += " GROUP BY seq"
+    sql += " ORDER BY seq"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    with _cursor() as cursor:
+        cursor.execute(sql, params)
+        return [dict(row) for row in cursor.fetchall()]
+
+
+# ---- RECONCILIATION ----
+
+def get_reconcile_checkpoint(table: str) -> Dict[str, Any]:
+    with _cursor() as cursor:
+        cursor.execute("SELECT * FROM reconcile_checkpoints WHERE table_name = ?", (table,))
+        row = cursor.fetchone()
+    return dict(row) if row else {"table_name": table, "last_seq": 0, "last_run_at": None, "checked_total": 0}
+
+def get_changed_records(table: str, after_seq: int, limit: int) -> List[Dict[str, Any]]:
+    """
+    Rows of a change-tracked table written after `after_seq`, in change order:
+    [{"key", "change_seq", "data", "loan_id" (repayments only)}, ...]
+    """
+    pk_col = PK_MAP[table]
+    extra = ", loan_id" if table == "repayments" else ""
+    with _cursor() as cursor:
+        cursor.execute(
+            f"SELECT {pk_col} AS key, change_seq, json_data{extra} FROM {table} "
+            f"WHERE change_seq > ? ORDER BY change_seq LIMIT ?",
+            (after_seq, limit),
+        )
+        rows = cursor.fetchall()
+
+    result = []
+    for row in rows:
+        record = {"key": row["key"], "change_seq": row["change_seq"], "data": json.loads(row["json_data"])}
+        if extra:
+            record["loan_id"] = row["loan_id"]
+        result.append(record)
+    return result
+
+def count_changes_after(table: str, after_seq: int) -> int:
+    """Rows changed since a checkpoint (reconciler lag)"""
+    with _cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE change_seq > ?", (after_seq,))
+        return cursor.fetchone()[0]
+
+def save_reconcile_results(
+    table: str,
+    last_seq: int,
+    checked: int,
+    run_at: int,
+    mismatches: List[Dict[str, Any]],
+    resolved_keys: List[str],
+):
+    """
+    Record one reconciliation batch: upsert mismatches (keeping first_seen_at),
+    clear resolved ones and advance the checkpoint, all in one commit
+    """
+    with transaction():
+        with _cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO reconcile_mismatches "
+                "(table_name, record_key, check_name, db_hash, chain_hash, status, first_seen_at, last_checked_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(table_name, record_key) DO UPDATE SET "
+                "check_name = excluded.check_name, db_hash = excluded.db_hash, "
+                "chain_hash = excluded.chain_hash, status = excluded.status, "
+                "first_seen_at = CASE WHEN excluded.status = 'PENDING' AND status != 'PENDING' "
+                "THEN excluded.first_seen_at ELSE first_seen_at END, "
+                "last_checked_at = excluded.last_checked_at",
+                [
+                    (table, m["record_key"], m["check_name"], m["db_hash"], m["chain_hash"],
+                     m["status"], run_at, run_at)
+                    for m in mismatches
+                ],
+            )
+            for chunk in _chunks(resolved_keys):
+                cursor.execute(
+                    f"DELETE FROM reconcile_mismatches WHERE table_name = ? "
+                    f"AND record_key IN ({', '.join('?' * len(chunk))})",
+                    [table] + chunk,
+                )
+            cursor.execute(
+                "INSERT INTO reconcile_checkpoints (table_name, last_seq, last_run_at, checked_total) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(table_name) DO UPDATE SET "
+                "last_seq = MAX(last_seq, excluded.last_seq), last_run_at = excluded.last_run_at, "
+                "checked_total = checked_total + excluded.checked_total",
+                (table, last_seq, run_at, checked),
+            )
+
+def get_pending_mismatches(limit: int) -> List[Dict[str, Any]]:
+    """PENDING mismatches, oldest first, for re-checking"""
+    with _cursor() as cursor:
+        cursor.execute(
+            "SELECT * FROM reconcile_mismatches WHERE status = 'PENDING' ORDER BY first_seen_at LIMIT ?",
+            (limit,),
+        )
+        return [dict(row) for row in cursor.fetchall()]
+
+def get_mismatches(status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+    sql = "SELECT * FROM reconcile_mismatches"
+    params: List[Any] = []
+    if status:
+        sql += " WHERE status = ?"
+        params.append(status)
+    sql += " ORDER BY first_seen_at LIMIT ?"
+    params.append(limit)
+
+    with _cursor() as cursor:
+        cursor.execute(sql, params)
+        return [dict(row) for row in cursor.fetchall()]
+
+def get_mismatch_counts() -> Dict[str, int]:
+    with _cursor() as cursor:
+        cursor.execute("SELECT status, COUNT(*) FROM reconcile_mismatches GROUP BY status")
+        return {row[0]: row[1] for row in cursor.fetchall()}
+
+
+# ---- INSTALLMENTS ----
+
+def _insert_installments(cursor, loan_id: str, user_id: str, lender_id: Optional[str], schedule: List[Dict[str, Any]]):
+    cursor.executemany(
+        "INSERT OR IGNORE INTO installments "
+        "(loan_id, installment_no, user_id, lender_id, due_at, emi, principal, interest) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (loan_id, i["installment_no"], user_id, lender_id, i["due_at"], i["emi"], i["principal"], i["interest"])
+            for i in schedule
+        ],
+    )
+
+def _allocate_payment(cursor, loan_id: str, amount: float, paid_at: Optional[int]) -> float:
+    """Apply a payment to the oldest unpaid installments; returns any excess"""
+    cursor.execute(
+        "SELECT installment_no, emi, paid_amount FROM installments "
+        "WHERE loan_id = ? AND status != 'PAID' ORDER BY installment_no",
+        (loan_id,),
+    )
+    remaining = round(amount, 2)
+    updates = []
+    for row in cursor.fetchall():
+        if remaining <= 0:
+            break
+        outstanding = round(row["emi"] - row["paid_amount"], 2)
+        applied = min(outstanding, remaining)
+        remaining = round(remaining - applied, 2)
+        paid = round(row["paid_amount"] + applied, 2)
+        status = "PAID" if paid >= row["emi"] else "PARTIAL"
+        updates.append((paid, status, paid_at if status == "PAID" else None, loan_id, row["installment_no"]))
+
+    cursor.executemany(
+        "UPDATE installments SET paid_amount = ?, status = ?, paid_at = ? "
+        "WHERE loan_id = ? AND installment_no = ?",
+        updates,
+    )
+    return remaining
+
+def create_installments(loan_id: str, user_id: str, lender_id: Optional[str], schedule: List[Dict[str, Any]]):
+    """Materialize a loan's schedule; call inside the activation transaction"""
+    with _cursor() as cursor:
+        _insert_installments(cursor, loan_id, user_id, lender_id, schedule)
+
+def apply_repayment_to_installments(loan_id: str, amount: float, paid_at: int) -> float:
+    """Call inside the repayment transaction; returns the overpaid amount"""
+    with _cursor() as cursor:
+        return _allocate_payment(cursor, loan_id, amount, paid_at)
+
+def get_installments(loan_id: str) -> List[Dict[str, Any]]:
+    with _cursor() as cursor:
+        cursor.execute("SELECT * FROM installments WHERE loan_id = ? ORDER BY installment_no", (loan_id,))
+        return [dict(row) for row in cursor.fetchall()]
+
+def find_overdue_installments(
+    as_of: int,
+    after: Optional[Tuple[int, str, int]] = None,
+    limit: int = 500,
+) -> List[Dict[str, Any]]:
+    """
+    Unpaid installments due before `as_of`, oldest first (idx_installments_unpaid_due).
+    `after` is the (due_at, loan_id, installment_no) of the previous page's last row.
+    """
+    sql = "SELECT * FROM installments WHERE status != 'PAID' AND due_at < ?"
+    params: List[Any] = [as_of]
+    if after is not None:
+        sql += " AND (due_at, loan_id, installment_no) > (?, ?, ?)"
+        params.extend(after)
+    sql += " ORDER BY due_at, loan_id, installment_no LIMIT ?"
+    params.append(limit)
+
+    with _cursor() as cursor:
+        cursor.execute(sql, params)
+        return [dict(row) for row in cursor.fetchall()]
+
+def get_next_due_installments(user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Earliest unpaid installment per borrower (idx_installments_unpaid_user)"""
+    result = {}
+    with _cursor() as cursor:
+        for chunk in _chunks(list(dict.fromkeys(user_ids))):
+            # SQLite returns the row holding MIN(due_at) for the bare columns
+            cursor.execute(
+                f"SELECT *, MIN(due_at) FROM installments "
+                f"WHERE status != 'PAID' AND user_id IN ({', '.join('?' * len(chunk))}) "
+                f"GROUP BY user_id",
+                chunk,
+            )
+            for row in cursor.fetchall():
+                item = dict(row)
+                item.pop("MIN(due_at)", None)
+                result[item["user_id"]] = item
+    return result
+
+def get_overdue_summary(column: str, key: str, as_of: int) -> Dict[str, Any]:
+    """Overdue count / amount for a borrower (column='user_id') or lender (column='lender_id')"""
+    if column not in ("user_id", "lender_id"):
+        raise ValueError(f"Unknown column: {column}")
+    with _cursor() as cursor:
+        cursor.execute(
+            f"SELECT COUNT(*) AS overdue_installments, "
+            f"COALESCE(SUM(emi - paid_amount), 0) AS overdue_amount "
+            f"FROM installments WHERE {column} = ? AND status != 'PAID' AND due_at < ?",
+            (key, as_of),
+        )
+        row = cursor.fetchone()
+    return {"overdue_installments": row[0], "overdue_amount": round(row[1], 2)}
+
+# ---- CREDIT SCORING ----
+
+def load_financial_columns(
+    fields: Tuple[str, ...],
+    user_ids: Optional[List[str]] = None,
+) -> Tuple[List[str], List[Tuple[float, ...]]]:
+    """
+    financial_data rows (all, or only `user_ids`) as (user_ids, rows) with
+    `fields` pulled out by json_extract in SQLite (missing values -> 0),
+    ready for np.array.
+    """
+    columns = ", ".join("COALESCE(json_extract(json_data, ?), 0)" for _ in fields)
+    paths = [f"$.{field}" for field in fields]
+    rows = []
+    with _cursor() as cursor:
+        if user_ids is None:
+            cursor.execute(f"SELECT user_id, {columns} FROM financial_data ORDER BY user_id", paths)
+            rows = cursor.fetchall()
+        else:
+            for chunk in _chunks(list(dict.fromkeys(user_ids))):
+                cursor.execute(
+                    f"SELECT user_id, {columns} FROM financial_data "
+                    f"WHERE user_id IN ({', '.join('?' * len(chunk))})",
+                    paths + chunk,
+                )
+                rows.extend(cursor.fetchall())
+    return [row[0] for row in rows], [tuple(row)[1:] for row in rows]
+
+def mark_credit_dirty(user_ids: List[str], reason: str, marked_at: int):
+    """Queue users for score recomputation; call inside the event's transaction"""
+    with _cursor() as cursor:
+        cursor.executemany(
+            "INSERT INTO credit_score_dirty (user_id, reason, marked_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET reason = excluded.reason, version = version + 1",
+            [(user_id, reason, marked_at) for user_id in dict.fromkeys(user_ids)],
+        )
+
+def get_dirty_credit_users(limit: int) -> List[Dict[str, Any]]:
+    """Oldest marks first (marked_at is the first mark since the last recompute)"""
+    with _cursor() as cursor:
+        cursor.execute(
+            "SELECT user_id, reason, marked_at, version FROM credit_score_dirty "
+            "ORDER BY marked_at, user_id LIMIT ?",
+            (limit,),
+        )
+        return [dict(row) for row in cursor.fetchall()]
+
+def clear_credit_dirty(claimed: List[Tuple[str, int]]):
+    """Drop recomputed marks by (user_id, version); a user re-marked since stays queued"""
+    with _cursor() as cursor:
+        cursor.executemany(
+            "DELETE FROM credit_score_dirty WHERE user_id = ? AND version = ?",
+            claimed,
+        )
+
+def count_dirty_credit_users() -> int:
+    with _cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM credit_score_dirty")
+        return cursor.fetchone()[0]
+
+def add_score_history(rows: List[Tuple[str, int, int, int, Optional[bytes]]]):
+    """
+    Append (user_id, scored_at, score, reason_code, features_blob) points.
+    Two points for a user in the same second keep the later one.
+    """
+    with _cursor() as cursor:
+        cursor.executemany(
+            "INSERT OR REPLACE INTO credit_score_history "
+            "(user_id, scored_at, score, reason, features) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+
+def get_score_history(
+    user_id: str,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    limit: int = 500,
+) -> List[Dict[str, Any]]:
+    """Points with start <= scored_at < end, newest first (primary-key range scan)"""
+    sql = "SELECT scored_at, score, reason, features FROM credit_score_history WHERE user_id = ?"
+    params: List[Any] = [user_id]
+    if start is not None:
+        sql += " AND scored_at >= ?"
+        params.append(start)
+    if end is not None:
+        sql += " AND scored_at < ?"
+        params.append(end)
+    sql += " ORDER BY scored_at DESC LIMIT ?"
+    params.append(limit)
+
+    with _cursor() as cursor:
+        cursor.execute(sql, params)
+        return [dict(row) for row in cursor.fetchall()]
+
+def get_score_buckets(user_id: str, start: int, end: int, bucket_seconds: int) -> List[Dict[str, Any]]:
+    """
+    Downsampled series: one row per bucket with min / max / avg and the
+    last score in the bucket, oldest first.
+    """
+    with _cursor() as cursor:
+        # last_score is looked up by primary key at each bucket's MAX(scored_at)
+        cursor.execute(
+            "SELECT b.*, ("
+            "  SELECT h.score FROM credit_score_history h "
+            "  WHERE h.user_id = ? AND h.scored_at = b.last_scored_at"
+            ") AS last_score FROM ("
+            "  SELECT (scored_at / ?) * ? AS bucket_start, COUNT(*) AS points, "
+            "  MIN(score) AS min_score, MAX(score) AS max_score, AVG(score) AS avg_score, "
+            "  MAX(scored_at) AS last_scored_at "
+            "  FROM credit_score_history "
+            "  WHERE user_id = ? AND scored_at >= ? AND scored_at < ? "
+            "  GROUP BY scored_at / ?"
+            ") b ORDER BY b.bucket_start",
+            (user_id, bucket_seconds, bucket_seconds, user_id, start, end, bucket_seconds),
+        )
+        rows = [dict(row) for row in cursor.fetchall()]
+    for row in rows:
+        row["avg_score"] = round(row["avg_score"], 1)
+    return rows
+
+def compact_score_history(window_start: int, window_end: int, bucket_seconds: int) -> int:
+    """
+    Within [window_start, window_end) keep only each user's last point per
+    bucket; returns points removed.
+    """
+    with _cursor() as cursor:
+        cursor.execute(
+            "DELETE FROM credit_score_history "
+            "WHERE scored_at >= ? AND scored_at < ? "
+            "AND (user_id, scored_at) NOT IN ("
+            "  SELECT user_id, MAX(scored_at) FROM credit_score_history "
+            "  WHERE scored_at >= ? AND scored_at < ? "
+            "  GROUP BY user_id, scored_at / ?"
+            ")",
+            (window_start, window_end, window_start, window_end, bucket_seconds),
+        )
+        return cursor.rowcount
+
+def purge_score_history(before: int) -> int:
+    """Drop points older than `before`; returns points removed"""
+    with _cursor() as cursor:
+        cursor.execute("DELETE FROM credit_score_history WHERE scored_at < ?", (before,))
+        return cursor.rowcount
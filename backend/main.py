@@ -1,6 +1,11 @@
+from contextlib import asynccontextmanager
+import os
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from db.database import init_db
+from db.database import init_db, close_pool
+from utils.scheduler import register_job, start_jobs, stop_jobs
+from multichain_rpc import require_rpc_credentials
 
 # Initialize DB on import (or use lifespan event)
 init_db()
@@ -13,12 +18,53 @@ from routers.transaction_routes import router as transaction_router
 from routers.repayment_routes import router as repayment_router
 from routers.default_routes import router as default_router
 from routers.audit_routes import router as audit_router
-from routers import public_ledger_routes, upload_routes
+from routers.credit_routes import router as credit_router
+from routers import public_ledger_routes, upload_routes, health_routes
+
+from auth.auth_service import sweep_expired_sessions
+from blockchain.outbox import drain_outbox, OUTBOX_POLL_SECONDS
+from blockchain.mirror import sync_all_streams, MIRROR_SYNC_SECONDS
+from services.reconcile_service import reconcile_changes, RECONCILE_INTERVAL_SECONDS
+from services.default_service import check_and_mark_defaults, DEFAULT_CHECK_INTERVAL_SECONDS
+from services.credit_scoring_service import (
+    rescore_all_users,
+    recompute_dirty_scores,
+    CREDIT_RESCORE_INTERVAL_SECONDS,
+    CREDIT_DIRTY_INTERVAL_SECONDS,
+)
+from services.score_history_service import compact_history, CREDIT_HISTORY_COMPACT_INTERVAL_SECONDS
+
+# -------- BACKGROUND JOBS --------
+# Set ARTHA_BACKGROUND_JOBS=0 on extra workers so jobs run in one process only
+BACKGROUND_JOBS_ENABLED = os.getenv("ARTHA_BACKGROUND_JOBS", "1") == "1"
+SESSION_SWEEP_INTERVAL_SECONDS = float(os.getenv("ARTHA_SESSION_SWEEP_INTERVAL", "600"))
+
+register_job("session_sweeper", SESSION_SWEEP_INTERVAL_SECONDS, sweep_expired_sessions)
+register_job("chain_outbox", OUTBOX_POLL_SECONDS, drain_outbox)
+register_job("stream_mirror", MIRROR_SYNC_SECONDS, sync_all_streams)
+register_job("reconciler", RECONCILE_INTERVAL_SECONDS, reconcile_changes)
+register_job("default_detector", DEFAULT_CHECK_INTERVAL_SECONDS, check_and_mark_defaults)
+# Daily job: run once at startup so a restart never delays the next pass by a full day
+register_job("credit_rescorer", CREDIT_RESCORE_INTERVAL_SECONDS, rescore_all_users, run_at_start=True)
+register_job("credit_dirty_worker", CREDIT_DIRTY_INTERVAL_SECONDS, recompute_dirty_scores, run_at_start=True)
+register_job("credit_history_compactor", CREDIT_HISTORY_COMPACT_INTERVAL_SECONDS, compact_history, run_at_start=True)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    require_rpc_credentials()
+    if BACKGROUND_JOBS_ENABLED:
+        start_jobs()
+    yield
+    stop_jobs()
+    close_pool()
+
 
 app = FastAPI(
     title="Artha P2P Lending Backend",
     description="Blockchain-backed P2P lending platform",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # -------- CORS --------
@@ -28,12 +74,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # -------- REGISTER ROUTERS --------
 
 from fastapi.staticfiles import StaticFiles
-import os
 
 app.include_router(auth_router)
 app.include_router(kyc_router)
@@ -42,8 +88,10 @@ app.include_router(transaction_router)
 app.include_router(repayment_router)
 app.include_router(default_router)
 app.include_router(audit_router)
+app.include_router(credit_router)
 app.include_router(public_ledger_routes.router)
 app.include_router(upload_routes.router)
+app.include_router(health_routes.router)
 
 # Serve uploads
 static_path = os.path.join(os.path.dirname(__file__), "static")
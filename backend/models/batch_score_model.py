@@ -0,0 +1,168 @@
+"""
+BATCH CREDIT SCORE MODEL
+------------------------
+NumPy version of models/create_score_model for the whole user base at once.
+
+Input is columnar: one array per CreditScoreInput field (FEATURE_FIELDS
+order). Results match calculate_credit_score exactly:
+- same penalties, weights and operation order as the scalar model
+- int() truncation, 300 – 850 clamp and the same risk-band cut-offs
+- features rounded with Python's round() semantics
+- rows with monthly_income <= 0 (the scalar model raises) are not
+  scored; `valid` is False for them
+
+`python -m models.batch_score_model` from backend/ checks a random
+sample against the scalar model and benchmarks 1M users.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+from utils.rounding import round2
+
+FEATURE_FIELDS = (
+    "monthly_income",
+    "monthly_expense",
+    "total_transactions",
+    "failed_transactions",
+    "avg_transaction_amount",
+    "missed_payments",
+    "loan_outstanding",
+    "account_age_months",
+)
+
+# Lower score bound of each band, best first (same cut-offs as the scalar model)
+RISK_BANDS = (
+    (750, "HIGH", "HIGH"),
+    (650, "MEDIUM", "MEDIUM"),
+    (550, "LOW", "LOW"),
+    (300, "BLOCKED", "NONE"),
+)
+
+RISK_BAND_NAMES = np.array([band for _, band, _ in RISK_BANDS])
+BORROW_LIMIT_NAMES = np.array([limit for _, _, limit in RISK_BANDS])
+_BAND_THRESHOLDS = np.array([threshold for threshold, _, _ in RISK_BANDS])
+
+
+def calculate_credit_scores(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Vectorized calculate_credit_score over columns keyed by FEATURE_FIELDS.
+
+    Returns valid, credit_score, risk_band (index into RISK_BAND_NAMES /
+    BORROW_LIMIT_NAMES) and the rounded features expense_ratio,
+    failure_rate, utilization_ratio, account_age_months.
+    """
+    income = np.asarray(columns["monthly_income"], dtype=np.float64)
+    expense = np.asarray(columns["monthly_expense"], dtype=np.float64)
+    total = np.asarray(columns["total_transactions"], dtype=np.float64)
+    failed = np.asarray(columns["failed_transactions"], dtype=np.float64)
+    missed = np.asarray(columns["missed_payments"], dtype=np.float64)
+    outstanding = np.asarray(columns["loan_outstanding"], dtype=np.float64)
+    age = np.asarray(columns["account_age_months"], dtype=np.int64)
+
+    # ---- Safety guards ----
+    valid = income > 0
+    safe_income = np.where(valid, income, 1.0)
+    has_transactions = total > 0
+    failure_rate = np.divide(failed, total, out=np.zeros_like(failed), where=has_transactions)
+
+    # ---- Feature engineering ----
+    expense_ratio = expense / safe_income
+    utilization_ratio = outstanding / safe_income
+    stability_factor = np.minimum(age, 60)
+
+    # ---- Score (same order of float operations as the scalar model) ----
+    score = np.full(income.shape, 850.0)
+    score -= expense_ratio * 200
+    score -= failure_rate * 300
+    score -= utilization_ratio * 250
+    score -= missed * 40
+    score += stability_factor * 2
+
+    # ---- Clamp score ----
+    score = np.clip(np.trunc(score), 300, 850).astype(np.int64)
+
+    # ---- Risk band: first threshold the score reaches ----
+    risk_band = np.argmax(score[:, None] >= _BAND_THRESHOLDS[None, :], axis=1)
+
+    return {
+        "valid": valid,
+        "credit_score": score,
+        "risk_band": risk_band,
+        "expense_ratio": round2(expense_ratio),
+        "failure_rate": round2(failure_rate),
+        "utilization_ratio": round2(utilization_ratio),
+        "account_age_months": age,
+    }
+
+
+def verify_against_scalar(sample_size: int = 5000, seed: Optional[int] = 0) -> Dict[str, int]:
+    """
+    Compare the batch model with calculate_credit_score on random users
+    (including zero-income and zero-transaction rows). Returns mismatch counts.
+    """
+    from models.create_score_model import CreditScoreInput, calculate_credit_score
+
+    rng = np.random.default_rng(seed)
+    columns = _random_columns(rng, sample_size)
+    result = calculate_credit_scores(columns)
+
+    mismatches = 0
+    for i in range(sample_size):
+        data = CreditScoreInput(**{field: columns[field][i].item() for field in FEATURE_FIELDS})
+        try:
+            scalar = calculate_credit_score(data)
+        except ValueError:
+            mismatches += bool(result["valid"][i])
+            continue
+
+        batch = {
+            "credit_score": int(result["credit_score"][i]),
+            "risk_band": str(RISK_BAND_NAMES[result["risk_band"][i]]),
+            "borrow_limit_category": str(BORROW_LIMIT_NAMES[result["risk_band"][i]]),
+            "features": {
+                "expense_ratio": float(result["expense_ratio"][i]),
+                "failure_rate": float(result["failure_rate"][i]),
+                "utilization_ratio": float(result["utilization_ratio"][i]),
+                "account_age_months": int(result["account_age_months"][i]),
+            },
+        }
+        mismatches += batch != scalar or not result["valid"][i]
+
+    return {"users": sample_size, "mismatches": int(mismatches)}
+
+
+def _random_columns(rng, n: int) -> Dict[str, np.ndarray]:
+    total = rng.integers(0, 300, n)
+    columns = {
+        "monthly_income": np.round(rng.uniform(5_000, 200_000, n), 2),
+        "monthly_expense": np.round(rng.uniform(0, 150_000, n), 2),
+        "total_transactions": total,
+        "failed_transactions": np.minimum(rng.integers(0, 20, n), total),
+        "avg_transaction_amount": np.round(rng.uniform(0, 10_000, n), 2),
+        "missed_payments": rng.integers(0, 6, n),
+        "loan_outstanding": np.round(rng.uniform(0, 100_000, n), 2),
+        "account_age_months": rng.integers(0, 120, n),
+    }
+    columns["monthly_income"][::25] = 0.0
+    return columns
+
+
+# =========================
+# BENCHMARK
+# =========================
+
+if __name__ == "__main__":
+    import time
+
+    print("verify:", verify_against_scalar())
+
+    n = 1_000_000
+    columns = _random_columns(np.random.default_rng(42), n)
+
+    started = time.perf_counter()
+    calculate_credit_scores(columns)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    print(f"{n:,} users scored in {elapsed_ms:.1f} ms")
@@ -1,15 +1,117 @@
-import requests
+import base64
 import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Multichain RPC Configuration (override via environment)
+# The node password has no default: set MULTICHAIN_RPC_PASSWORD (checked at app startup)
+RPC_HOST = os.getenv("MULTICHAIN_RPC_HOST", "172.31.25.55")
+RPC_PORT = int(os.getenv("MULTICHAIN_RPC_PORT", "6820"))
+RPC_USER = os.getenv("MULTICHAIN_RPC_USER", "multichainrpc")
+RPC_PASSWORD = os.getenv("MULTICHAIN_RPC_PASSWORD")
+CHAIN_NAME = os.getenv("MULTICHAIN_CHAIN_NAME", "artha-chain")
 
-# Multichain RPC Configuration
-RPC_HOST = "172.31.25.55"
-RPC_PORT = 6820
-RPC_USER = "multichainrpc"
-RPC_PASSWORD = "HimPrFVxvxT5zhdoUuCXXZ5y62MpaZsFEemgbHBgKngQ"
+RPC_TIMEOUT_SECONDS = float(os.getenv("MULTICHAIN_RPC_TIMEOUT", "5"))
+RPC_POOL_SIZE = int(os.getenv("MULTICHAIN_RPC_POOL_SIZE", "10"))
+RPC_CONNECT_RETRIES = int(os.getenv("MULTICHAIN_RPC_RETRIES", "3"))
+RPC_BACKOFF_FACTOR = float(os.getenv("MULTICHAIN_RPC_BACKOFF", "0.2"))
 
 URL = f"http://{RPC_HOST}:{RPC_PORT}"
 HEADERS = {"content-type": "application/json"}
-CHAIN_NAME = "artha-chain"
+
+# Latency histogram bucket upper bounds (ms); the last bucket is open-ended
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def require_rpc_credentials():
+    """Fail fast at startup when the node password is not configured"""
+    if not RPC_PASSWORD:
+        raise RuntimeError("MULTICHAIN_RPC_PASSWORD is not set; the MultiChain node cannot be reached")
+
+
+def _build_session() -> requests.Session:
+    """
+    Keep-alive session with a bounded connection pool.
+    Only connection errors are retried (the request never reached the node),
+    so a publish is never sent twice.
+    """
+    retry = Retry(
+        total=RPC_CONNECT_RETRIES,
+        connect=RPC_CONNECT_RETRIES,
+        read=0,
+        status=0,
+        backoff_factor=RPC_BACKOFF_FACTOR,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=RPC_POOL_SIZE, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    session.headers.update(HEADERS)
+    if RPC_PASSWORD:
+        credentials = base64.b64encode(f"{RPC_USER}:{RPC_PASSWORD}".encode("utf-8")).decode("ascii")
+        session.headers["Authorization"] = f"Basic {credentials}"
+    return session
+
+
+_session = _build_session()
+
+
+# -------- METRICS --------
+
+_stats_lock = threading.Lock()
+_method_stats = {}
+
+
+def _record_latency(method: str, elapsed_ms: float, failed: bool):
+    with _stats_lock:
+        stats = _method_stats.get(method)
+        if stats is None:
+            stats = {
+                "calls": 0,
+                "errors": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+            }
+            _method_stats[method] = stats
+
+        stats["calls"] += 1
+        stats["errors"] += int(failed)
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                stats["buckets"][i] += 1
+                break
+        else:
+            stats["buckets"][-1] += 1
+
+
+def get_rpc_stats():
+    """
+    Per-method call counts, errors and latency histograms
+    """
+    labels = [f"le_{bound}ms" for bound in LATENCY_BUCKETS_MS] + ["gt_5000ms"]
+    with _stats_lock:
+        return {
+            method: {
+                "calls": stats["calls"],
+                "errors": stats["errors"],
+                "avg_ms": round(stats["total_ms"] / stats["calls"], 2) if stats["calls"] else 0.0,
+                "max_ms": round(stats["max_ms"], 2),
+                "histogram": dict(zip(labels, stats["buckets"])),
+            }
+            for method, stats in _method_stats.items()
+        }
 
 
 def call_rpc(method, params=None, rpc_id=1):
@@ -23,19 +125,23 @@ def call_rpc(method, params=None, rpc_id=1):
         "chain_name": CHAIN_NAME,
     }
 
-    response = requests.post(
-        URL,
-        data=json.dumps(payload),
-        auth=(RPC_USER, RPC_PASSWORD),
-        headers=HEADERS,
-        timeout=5 # Prevent hanging
-    )
+    started = time.monotonic()
+    failed = True
+    try:
+        response = _session.post(
+            URL,
+            data=json.dumps(payload),
+            timeout=RPC_TIMEOUT_SECONDS # Prevent hanging
+        )
 
-    result = response.json()
-    if "error" in result and result["error"]:
-        raise Exception(result["error"])
+        result = response.json()
+        if "error" in result and result["error"]:
+            raise Exception(result["error"])
 
-    return result["result"]
+        failed = False
+        return result["result"]
+    finally:
+        _record_latency(method, (time.monotonic() - started) * 1000, failed)
 
 
 # -------- STREAM HELPERS --------
@@ -44,10 +150,121 @@ def create_stream(stream_name: str, open_stream: bool = True):
     return call_rpc("create", ["stream", stream_name, open_stream])
 
 
-def publish_to_stream(stream: str, key: str, value: str):
+class PendingPublish:
+    """
+    A publish queued inside publish_batch().
+    txid / vout are filled in when the batch is sent.
+    """
+
+    def __init__(self, stream: str, key: str, value: str):
+        self.stream = stream
+        self.key = key
+        self.value = value
+        self.txid = None
+        self.vout = None
+        self.error = None
+
+    def as_publishmulti_item(self) -> dict:
+        keys_field = "keys" if isinstance(self.key, list) else "key"
+        return {"for": self.stream, keys_field: self.key, "data": self.value}
+
+
+_batch_local = threading.local()
+
+
+@contextmanager
+def publish_batch():
     """
-    Publish hash to stream
+    Collect every publish_to_stream() made inside the block (on this thread)
+    and send them as ONE `publishmulti` transaction when the block exits.
+    Nothing is sent if the block raises. Nested blocks join the outer batch.
+
+        with publish_batch():
+            record_loan_acceptance(...)
+            record_loan_status(...)
     """
+    if getattr(_batch_local, "items", None) is not None:
+        yield _batch_local.items
+        return
+
+    items = []
+    _batch_local.items = items
+    try:
+        yield items
+    finally:
+        _batch_local.items = None
+
+    flush_publishes(items)
+
+
+def flush_publishes(items):
+    """
+    Send queued publishes in a single publishmulti call and map the
+    resulting txid (and output index, read back from the transaction)
+    onto each item.
+    """
+    if not items:
+        return None
+
+    try:
+        txid = call_rpc(
+            "publishmulti",
+            [items[0].stream, [item.as_publishmulti_item() for item in items]],
+        )
+    except Exception as e:
+        for item in items:
+            item.error = str(e)
+        raise
+
+    for item in items:
+        item.txid = txid
+    _assign_vouts(txid, items)
+    return txid
+
+
+def _output_item_key(stream: str, keys, data) -> tuple:
+    keys = keys if isinstance(keys, list) else [keys]
+    return stream, tuple(keys), data.lower() if isinstance(data, str) else json.dumps(data, sort_keys=True)
+
+
+def _assign_vouts(txid: str, items):
+    """
+    Read each item's output index from the decoded transaction. The node
+    may put a change output (or reorder outputs) before the stream items,
+    so the position in the publishmulti list is not the vout. Items that
+    can't be matched keep vout None (txid alone still locates them).
+    """
+    try:
+        tx = call_rpc("getrawtransaction", [txid, 1])
+    except Exception as e:
+        print(f"[RPC] Could not decode {txid} for output indexes: {e}")
+        return
+
+    outputs = {}
+    for output in tx.get("vout", []):
+        for stream_item in output.get("items", []):
+            if stream_item.get("type", "stream") != "stream":
+                continue
+            key = _output_item_key(stream_item.get("name"), stream_item.get("keys", []), stream_item.get("data"))
+            outputs.setdefault(key, []).append(output["n"])
+
+    for item in items:
+        indexes = outputs.get(_output_item_key(item.stream, item.key, item.value))
+        if indexes:
+            item.vout = indexes.pop(0)
+
+
+def publish_to_stream(stream: str, key, value: str):
+    """
+    Publish hash to stream (key may be a list of keys).
+    Inside publish_batch() the publish is queued and a PendingPublish is returned.
+    """
+    items = getattr(_batch_local, "items", None)
+    if items is not None:
+        pending = PendingPublish(stream, key, value)
+        items.append(pending)
+        return pending
+
     return call_rpc("publish", [stream, key, value])
 
 
@@ -1,5 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends
+import json
+
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
 from auth.auth_dependency import get_current_user
+from schemas.audit_schemas import BulkAuditSchema
+from db.database import get_mismatches
 from services.audit_service import (
     verify_kyc,
     verify_identity,
@@ -8,6 +15,7 @@ from services.audit_service import (
     verify_transaction,
     verify_repayments,
     verify_agreement_execution,
+    run_bulk_audit,
 )
 
 router = APIRouter(prefix="/audit", tags=["audit"])
@@ -73,3 +81,36 @@ def audit_repayments(loan_id: str, current_user=Depends(get_current_user)):
         return verify_repayments(loan_id)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/bulk")
+def audit_bulk(payload: BulkAuditSchema, current_user=Depends(get_current_user)):
+    """
+    Verify many loans / users in one request.
+    Streams NDJSON: one line per entity and check, then a summary line.
+    """
+    if not (payload.loan_ids or payload.user_ids or payload.all_entities):
+        raise HTTPException(status_code=400, detail="No loan_ids or user_ids given")
+
+    results = run_bulk_audit(
+        payload.loan_ids,
+        payload.user_ids,
+        checks=payload.checks,
+        all_entities=payload.all_entities,
+    )
+    return StreamingResponse(
+        (json.dumps(result) + "\n" for result in results),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.get("/mismatches")
+def audit_mismatches(
+    status: Optional[Literal["PENDING", "MISMATCH"]] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    current_user=Depends(get_current_user),
+):
+    """
+    Records the background reconciler found out of step with the chain
+    """
+    return get_mismatches(status, limit)
@@ -7,6 +7,7 @@ from auth.auth_service import (
     logout_user,
     send_login_otp,
 )
+from auth.kdf_pool import KDFPoolSaturated
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -26,6 +27,8 @@ def register(payload: dict):
             dob=payload.get("dob"),
         )
         return {"message": "OTP sent to phone"}
+    except KDFPoolSaturated as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
     except ValueError as e:
         traceback.print_exc()
         raise HTTPException(status_code=400, detail=str(e))
@@ -72,6 +75,8 @@ def login(payload: dict):
             otp=payload.get("otp"),
         )
         return result
+    except KDFPoolSaturated as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
     except ValueError as e:
         traceback.print_exc()
         # If OTP required, we return 400 so frontend knows to show OTP field
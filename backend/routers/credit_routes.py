@@ -0,0 +1,64 @@
+from fastapi import APIRouter, HTTPException, Depends
+from auth.auth_dependency import get_current_user
+from schemas.credit_score_schemas import CreditHistoryQuerySchema, CreditSeriesQuerySchema, FinancialProfileSchema
+from services.credit_scoring_service import update_financial_profile
+from services.score_history_service import get_latest_score, get_history, get_score_series
+
+
+router = APIRouter(prefix="/credit", tags=["credit"])
+
+
+@router.get("/score")
+def my_credit_score(current_user=Depends(get_current_user)):
+    """
+    Current credit score (cached head)
+    """
+    return {"user_id": current_user, "credit_score": get_latest_score(current_user)}
+
+
+@router.put("/financial-profile")
+def set_financial_profile(
+    payload: FinancialProfileSchema,
+    current_user=Depends(get_current_user),
+):
+    """
+    Declare monthly income / expense; the score is recomputed in the background
+    """
+    stats = update_financial_profile(current_user, payload.monthly_income, payload.monthly_expense)
+    return {
+        "user_id": current_user,
+        "monthly_income": stats["monthly_income"],
+        "monthly_expense": stats["monthly_expense"],
+        "rescore_queued": True,
+    }
+
+
+@router.get("/history")
+def my_credit_history(
+    query: CreditHistoryQuerySchema = Depends(),
+    current_user=Depends(get_current_user),
+):
+    """
+    Raw score points in [start, end), newest first, with feature snapshots
+    """
+    return {
+        "user_id": current_user,
+        "points": get_history(current_user, query.start, query.end, query.limit),
+    }
+
+
+@router.get("/series")
+def my_credit_series(
+    query: CreditSeriesQuerySchema = Depends(),
+    current_user=Depends(get_current_user),
+):
+    """
+    Downsampled score series for charts: min / max / avg / last per bucket
+    """
+    if query.end <= query.start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    return {
+        "user_id": current_user,
+        "resolution": query.resolution,
+        "buckets": get_score_series(current_user, query.start, query.end, query.resolution),
+    }
@@ -7,7 +7,8 @@ router = APIRouter(prefix="/defaults", tags=["defaults"])
 @router.post("/check")
 def run_default_check():
     """
-    Manually trigger loan default check (admin / cron simulation)
+    Manually trigger loan default check (also runs in the background
+    every ARTHA_DEFAULT_CHECK_INTERVAL seconds)
     """
     try:
         return check_and_mark_defaults()
@@ -0,0 +1,103 @@
+from fastapi import APIRouter, HTTPException
+from db.database import get_pool_stats, check_db_health, get_outbox_stats
+from services.marketplace_cache import get_marketplace_cache_stats
+from auth.session_cache import get_session_cache_stats
+from utils.scheduler import get_job_stats
+from auth.kdf_pool import get_kdf_stats
+from multichain_rpc import get_rpc_stats
+from blockchain.mirror import get_mirror_stats
+from blockchain.canonical import get_hash_memo_stats
+from services.quote_service import get_quote_cache_stats
+from services.score_history_service import get_score_history_stats
+from services.reconcile_service import get_reconcile_stats
+from services.credit_scoring_service import get_credit_scoring_stats
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/db")
+def db_health():
+    """
+    Connection pool metrics: size, wait time, checkouts per second
+    """
+    try:
+        healthy = check_db_health()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return {
+        "status": "ok" if healthy else "degraded",
+        "pool": get_pool_stats(),
+    }
+
+
+@router.get("/cache")
+def cache_health():
+    """
+    Hit/miss counters of the in-process caches
+    """
+    return {
+        "marketplace": get_marketplace_cache_stats(),
+        "sessions": get_session_cache_stats(),
+        "hash_memo": get_hash_memo_stats(),
+        "loan_quotes": get_quote_cache_stats(),
+        "credit_score_heads": get_score_history_stats()["head_cache"],
+    }
+
+
+@router.get("/jobs")
+def jobs_health():
+    """
+    Background job runs, failures and last duration
+    """
+    return get_job_stats()
+
+
+@router.get("/kdf")
+def kdf_health():
+    """
+    Password-hashing pool: queue depth, rejections, latency
+    """
+    return get_kdf_stats()
+
+
+@router.get("/rpc")
+def rpc_health():
+    """
+    MultiChain RPC latency histograms per method
+    """
+    return get_rpc_stats()
+
+
+@router.get("/outbox")
+def outbox_health():
+    """
+    Chain outbox backlog: pending items, oldest pending, retries
+    """
+    return get_outbox_stats()
+
+
+@router.get("/mirror")
+def mirror_health():
+    """
+    Stream mirror: per-stream checkpoint, items synced, sync errors
+    """
+    return get_mirror_stats()
+
+
+@router.get("/reconcile")
+def reconcile_health():
+    """
+    DB-vs-chain reconciler: throughput, per-table lag, open mismatches
+    """
+    return get_reconcile_stats()
+
+
+@router.get("/credit")
+def credit_scoring_health():
+    """
+    Credit rescoring: nightly run, dirty-set backlog, history retention
+    """
+    stats = get_credit_scoring_stats()
+    stats["history"] = get_score_history_stats()
+    return stats
@@ -1,10 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends
+from typing import Annotated, List
+
+from pydantic import Field
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from auth.auth_dependency import get_current_user
 from schemas.loan_schemas import BorrowRequestSchema
 from schemas.lender_schemas import LenderAcceptanceSchema
+from schemas.loan_marketplace_schemas import MarketplaceQuerySchema
+from services.quote_service import get_quotes, MAX_QUOTE_AMOUNT, MAX_QUOTE_TENURE_MONTHS
 from services.loan_service import (
     create_borrow_request,
-    get_marketplace_listings,
+    get_marketplace_page,
     accept_loan,
     get_user_portfolio,
 )
@@ -37,10 +42,61 @@ def create_borrow_listing(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+
 @router.get("/marketplace")
-def marketplace_listings():
-    # PUBLIC
-    return get_marketplace_listings()
+def marketplace_listings(
+    request: Request,
+    response: Response,
+    query: MarketplaceQuerySchema = Depends(),
+):
+    """
+    PUBLIC. Paginated listings; pass the X-Next-Cursor header back as `after`.
+    Unchanged pages return 304 when If-None-Match carries the last ETag.
+    """
+    try:
+        page = get_marketplace_page(query)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    headers = {"ETag": page["etag"], "Cache-Control": "no-cache"}
+    if page["next_cursor"]:
+        headers["X-Next-Cursor"] = page["next_cursor"]
+
+    if _etag_matches(request.headers.get("if-none-match"), page["etag"]):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return page["listings"]
+
+
+@router.get("/quote")
+def loan_quote(
+    response: Response,
+    amount: List[Annotated[float, Field(gt=0, le=MAX_QUOTE_AMOUNT)]] = Query(...),
+    tenure_months: List[Annotated[int, Field(gt=0, le=MAX_QUOTE_TENURE_MONTHS)]] = Query(...),
+    interest_rate: List[Annotated[float, Field(ge=0, le=100)]] = Query([13.0]),
+):
+    """
+    PUBLIC. EMI, total payable, platform fee and net received.
+    Repeat a parameter to batch, e.g. ?amount=50000&tenure_months=3&tenure_months=6
+    returns one quote per (amount, interest_rate, tenure_months) combination.
+    """
+    try:
+        quotes = get_quotes(amount, interest_rate, tenure_months)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Pure function of the query: let browsers reuse it while sliders move
+    response.headers["Cache-Control"] = "public, max-age=3600"
+    return {"quotes": quotes}
 
 
 @router.post("/{loan_id}/accept")
@@ -1,66 +1,128 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
 
+from schemas.public_ledger_schemas import PublicLedgerQuerySchema
 from services.public_ledger_service import (
+    PUBLIC_STREAMS,
+    StreamNotMirrored,
     get_public_transactions,
     get_public_loans,
     get_public_repayments,
     get_public_kyc,
     get_public_identity_proofs,
+    export_public_stream,
 )
 
 router = APIRouter(prefix="/public/ledger", tags=["public-ledger"])
 
+# Full pages of settled items never change; everything else is short-lived
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+LIVE_CACHE_CONTROL = "public, max-age=5"
+# Keyed reads wait for the mirror's first sync (one background pass)
+NOT_MIRRORED_RETRY_AFTER_SECONDS = 10
+
+
+def _not_mirrored(e: StreamNotMirrored):
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": str(NOT_MIRRORED_RETRY_AFTER_SECONDS)},
+    )
+
+
+def _page_response(response: Response, page: dict):
+    """
+    Body stays a plain list; paging rides in headers.
+    Pass X-Next-Cursor back as `start` (absent on the last page).
+    """
+    response.headers["Cache-Control"] = (
+        IMMUTABLE_CACHE_CONTROL if page["immutable"] else LIVE_CACHE_CONTROL
+    )
+    if page["next_start"] is not None:
+        response.headers["X-Next-Cursor"] = str(page["next_start"])
+    return page["items"]
+
 
 @router.get("/transactions")
-def public_transactions():
+def public_transactions(response: Response, query: PublicLedgerQuerySchema = Depends()):
     """
     Public read-only view of transaction hashes
     """
     try:
-        return get_public_transactions()
+        return _page_response(response, get_public_transactions(query))
+    except StreamNotMirrored as e:
+        raise _not_mirrored(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/loans")
-def public_loans():
+def public_loans(response: Response, query: PublicLedgerQuerySchema = Depends()):
     """
     Public read-only view of loan request & agreement hashes
     """
     try:
-        return get_public_loans()
+        return _page_response(response, get_public_loans(query))
+    except StreamNotMirrored as e:
+        raise _not_mirrored(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/repayments")
-def public_repayments():
+def public_repayments(response: Response, query: PublicLedgerQuerySchema = Depends()):
     """
     Public read-only view of repayment hashes
     """
     try:
-        return get_public_repayments()
+        return _page_response(response, get_public_repayments(query))
+    except StreamNotMirrored as e:
+        raise _not_mirrored(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/kyc")
-def public_kyc():
+def public_kyc(response: Response, query: PublicLedgerQuerySchema = Depends()):
     """
     Public read-only view of KYC verification hashes
     """
     try:
-        return get_public_kyc()
+        return _page_response(response, get_public_kyc(query))
+    except StreamNotMirrored as e:
+        raise _not_mirrored(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/identity")
-def public_identity():
+def public_identity(response: Response, query: PublicLedgerQuerySchema = Depends()):
     """
     Public read-only view of identity proof hashes
     """
     try:
-        return get_public_identity_proofs()
+        return _page_response(response, get_public_identity_proofs(query))
+    except StreamNotMirrored as e:
+        raise _not_mirrored(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{name}/export")
+def public_export(name: str, query: PublicLedgerQuerySchema = Depends()):
+    """
+    Bulk NDJSON export of a public stream (honours since_blocktime / key)
+    """
+    if name not in PUBLIC_STREAMS:
+        raise HTTPException(status_code=404, detail="Unknown ledger stream")
+
+    try:
+        lines = export_public_stream(name, query)
+    except StreamNotMirrored as e:
+        raise _not_mirrored(e)
+
+    return StreamingResponse(
+        lines,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{name}.ndjson"'},
+    )
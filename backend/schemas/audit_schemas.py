@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+
+AuditCheck = Literal[
+    "loan_request",
+    "loan_acceptance",
+    "agreement_execution",
+    "transaction",
+    "repayments",
+    "kyc",
+]
+
+
+class BulkAuditSchema(BaseModel):
+    """
+    Bulk audit request. Omit `checks` to run every check that applies.
+    all_entities=True audits every loan and KYC record (nightly reconciliation).
+    """
+    loan_ids: List[str] = Field(default_factory=list, max_length=10000)
+    user_ids: List[str] = Field(default_factory=list, max_length=10000)
+    checks: Optional[List[AuditCheck]] = None
+    all_entities: bool = False
@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic import BaseModel, Field
 
 
@@ -21,6 +23,15 @@ class CreditScoreInputSchema(BaseModel):
     account_age_months: int = Field(..., ge=0)
 
 
+class FinancialProfileSchema(BaseModel):
+    """
+    Borrower-declared monthly figures used by the credit model
+    """
+
+    monthly_income: float = Field(..., gt=0, le=1_000_000_000)
+    monthly_expense: float = Field(..., ge=0, le=1_000_000_000)
+
+
 class CreditScoreResponseSchema(BaseModel):
     """
     Output schema for credit score result
@@ -31,3 +42,23 @@ class CreditScoreResponseSchema(BaseModel):
     borrow_limit_category: str
 
     features: dict
+
+
+class CreditHistoryQuerySchema(BaseModel):
+    """
+    Score history range (query params, unix seconds; end is exclusive)
+    """
+
+    start: Optional[int] = Field(None, ge=0)
+    end: Optional[int] = Field(None, ge=0)
+    limit: int = Field(500, ge=1, le=5000)
+
+
+class CreditSeriesQuerySchema(BaseModel):
+    """
+    Downsampled score series for charts (query params, unix seconds)
+    """
+
+    start: int = Field(..., ge=0)
+    end: int = Field(..., ge=0)
+    resolution: Literal["hour", "day", "week", "month"] = "day"
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
 
 
 class MarketplaceLoanSchema(BaseModel):
@@ -12,3 +13,26 @@ class MarketplaceLoanSchema(BaseModel):
     credit_score: int | None = None
 
     status: str             # LISTED only
+
+
+class MarketplaceQuerySchema(BaseModel):
+    """
+    Marketplace paging, filters and sort (query params)
+    """
+    limit: int = Field(50, ge=1, le=200)
+    after: Optional[str] = None           # opaque cursor from X-Next-Cursor
+    sort: Literal[
+        "newest", "oldest",
+        "amount_asc", "amount_desc",
+        "rate_asc", "rate_desc",
+        "credit_score_desc",
+    ] = "newest"
+
+    min_amount: Optional[float] = Field(None, ge=0)
+    max_amount: Optional[float] = Field(None, ge=0)
+    min_interest_rate: Optional[float] = Field(None, ge=0)
+    max_interest_rate: Optional[float] = Field(None, ge=0)
+    min_tenure_months: Optional[int] = Field(None, ge=0)
+    max_tenure_months: Optional[int] = Field(None, ge=0)
+    credit_band: Optional[Literal["HIGH", "MEDIUM", "LOW", "BLOCKED"]] = None
+    purpose: Optional[str] = None
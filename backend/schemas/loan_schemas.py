@@ -1,6 +1,8 @@
 from pydantic import BaseModel
 from typing import Optional
 
+from utils.constants import PLATFORM_FEE_PERCENT
+
 
 # -------- GUARANTOR INFO --------
 
@@ -36,7 +38,7 @@ class BorrowRequestSchema(BaseModel):
 
     agreed_to_rules: bool         # must be True
 
-    platform_fee_percent: float = 3.0
+    platform_fee_percent: float = PLATFORM_FEE_PERCENT
     net_amount_received: float   # amount - 3%
 
     submitted_at: int
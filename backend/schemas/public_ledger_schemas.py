@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class PublicLedgerQuerySchema(BaseModel):
+    """
+    Public ledger paging and filters (query params)
+    """
+    limit: int = Field(100, ge=1, le=500)
+    start: int = Field(0, ge=0)            # stream position; pass X-Next-Cursor back
+    since_blocktime: Optional[int] = Field(None, ge=0)
+    key: Optional[str] = None
@@ -1,21 +1,92 @@
-from blockchain.utils import sha256_hash
-from multichain_rpc import get_stream_key_items
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
-from db.database import get_item, get_repayments
+from blockchain.utils import sha256_hash
+from blockchain.canonical import hash_row
+from blockchain.merkle import leaf_hash, verify_merkle_proof
+from blockchain.outbox import MERKLE_ROOT_STREAM
+from blockchain.mirror import get_stream_key_items
+from utils.cache import TTLCache
+
+from db.database import (
+    get_item,
+    get_versioned_items,
+    get_all_keys,
+    get_repayments,
+    get_repayments_for_loans,
+    get_latest_anchor_proof,
+    get_anchor_proofs,
+)
+
+# Bulk audit: chain lookups run on AUDIT_MAX_WORKERS threads, entities are
+# loaded from SQLite AUDIT_CHUNK_SIZE at a time
+AUDIT_MAX_WORKERS = int(os.getenv("ARTHA_AUDIT_MAX_WORKERS", "8"))
+AUDIT_CHUNK_SIZE = 500
 
 # ---- STORES REPLACED BY DB ----
 
+# Merkle roots confirmed on chain (batch_id -> root); roots never change
+_confirmed_roots = TTLCache(max_entries=4096, ttl_seconds=3600)
+
+
+def _root_on_chain(batch_id: str, root: str) -> bool:
+    if _confirmed_roots.get(batch_id) == root:
+        return True
+
+    items = get_stream_key_items(MERKLE_ROOT_STREAM, batch_id)
+    if any(item["data"] == root for item in items):
+        _confirmed_roots.set(batch_id, root)
+        return True
+    return False
+
+
+def _get_anchored_hash(anchored: dict):
+    """
+    Value of a Merkle-anchored event, if its inclusion proof checks out
+    against a batch root that is on chain
+    """
+    leaf = leaf_hash(anchored["stream"], anchored["item_key"], anchored["value"])
+    if leaf != anchored["leaf_hash"]:
+        return None
+    if not verify_merkle_proof(leaf, anchored["proof"], anchored["root"]):
+        return None
+    if anchored["batch_status"] != "PUBLISHED":
+        return None
+    if not _root_on_chain(anchored["batch_id"], anchored["root"]):
+        return None
+    return anchored["value"]
+
 
 def _get_blockchain_hash(stream: str, key: str):
     """
-    Fetch latest hash value for a key from a stream
+    Fetch latest hash value for a key from a stream.
+    Merkle-anchored events are verified with their local proof instead
+    (one cached root lookup per batch, no per-event chain call).
     """
+    anchored = get_latest_anchor_proof(stream, key)
+    if anchored:
+        return _get_anchored_hash(anchored)
+
     items = get_stream_key_items(stream, key)
     if not items:
         return None
     return items[-1]["data"]
 
 
+def _get_blockchain_hashes(stream: str, key: str):
+    """
+    Every hash published under a key (one lookup), for streams such as
+    repayments that carry several events per key
+    """
+    values = [item["data"] for item in get_stream_key_items(stream, key)]
+    for anchored in get_anchor_proofs(stream, key):
+        value = _get_anchored_hash(anchored)
+        if value is not None:
+            values.append(value)
+    return values
+
+
 # -------- KYC AUDIT --------
 
 def verify_kyc(user_id: str):
@@ -98,7 +169,8 @@ def verify_transaction(loan_id: str):
         raise Exception("Transaction not found")
 
     db_hash = sha256_hash(db_data)
-    chain_hash = _get_blockchain_hash("transactions", tx_id)
+    # Receipts are published under the bank transaction id
+    chain_hash = _get_blockchain_hash("transactions", db_data.get("transaction_id", loan_id))
 
     return {
         "db_hash": db_hash,
@@ -112,17 +184,24 @@ def verify_repayments(loan_id: str):
     if not repayments:
         raise Exception("No repayments found")
 
+    return _compare_repayments(loan_id, repayments)
+
+
+def _compare_repayments(loan_id: str, repayments: list):
+    # One key lookup for all of the loan's repayments
+    chain_hashes = set(_get_blockchain_hashes("repayments", loan_id))
+
     results = []
     for r in repayments:
         db_hash = sha256_hash(r)
-        chain_hash = _get_blockchain_hash("repayments", loan_id)
+        matched = db_hash in chain_hashes
 
         results.append(
             {
                 "repayment_id": r.get("repayment_id"),
                 "db_hash": db_hash,
-                "blockchain_hash": chain_hash,
-                "match": db_hash == chain_hash,
+                "blockchain_hash": db_hash if matched else None,
+                "match": matched,
             }
         )
 
@@ -152,3 +231,146 @@ def verify_agreement_execution(loan_id: str):
         "blockchain_hash": chain_hash,
         "match": db_hash == chain_hash,
     }
+
+
+# -------- BULK AUDIT --------
+
+# check -> (table, stream) for single-record checks
+LOAN_CHECKS = {
+    "loan_request": ("loans", "loan_requests"),
+    "loan_acceptance": ("loan_acceptances", "loan_acceptance"),
+    "agreement_execution": ("agreement_executions", "loan_agreements"),
+    "transaction": ("transactions", "transactions"),
+}
+USER_CHECKS = {
+    "kyc": ("kyc", "kyc_results"),
+}
+BULK_CHECKS = list(LOAN_CHECKS) + ["repayments"] + list(USER_CHECKS)
+
+
+def _chain_key(check: str, entity_id: str, record: dict) -> str:
+    if check == "transaction":
+        return record.get("transaction_id", entity_id)
+    return entity_id
+
+
+def _hashed_record(check: str, record: dict):
+    if check == "kyc":
+        return record.get("final_result")
+    return record
+
+
+def _compare_one(check: str, stream: str, entity_id: str, record: dict, version: int = None):
+    # Memoized per row version: an unchanged row is hashed once across audits
+    db_hash = hash_row(check, entity_id, version, _hashed_record(check, record))
+    chain_hash = _get_blockchain_hash(stream, _chain_key(check, entity_id, record))
+    return {
+        "check": check,
+        "id": entity_id,
+        "db_hash": db_hash,
+        "blockchain_hash": chain_hash,
+        "match": db_hash == chain_hash,
+    }
+
+
+def _compare_repayment_set(entity_id: str, repayments: list):
+    results = _compare_repayments(entity_id, repayments)
+    return {
+        "check": "repayments",
+        "id": entity_id,
+        "repayments": results,
+        "match": all(r["match"] for r in results),
+    }
+
+
+def _bulk_tasks(ids: list, checks: list, table_checks: dict):
+    """
+    (check, id, func, args) per entity and check. Records are loaded one IN (...)
+    query per table per chunk; missing records are reported, not raised.
+    """
+    for start in range(0, len(ids), AUDIT_CHUNK_SIZE):
+        chunk = ids[start:start + AUDIT_CHUNK_SIZE]
+
+        for check in checks:
+            if check == "repayments":
+                by_loan = get_repayments_for_loans(chunk)
+                for entity_id in chunk:
+                    if entity_id in by_loan:
+                        yield check, entity_id, _compare_repayment_set, (entity_id, by_loan[entity_id])
+                    else:
+                        yield check, entity_id, None, None
+                continue
+
+            if check not in table_checks:
+                continue
+            table, stream = table_checks[check]
+            records = get_versioned_items(table, chunk)
+            for entity_id in chunk:
+                version, record = records.get(entity_id, (None, None))
+                if record is None or _hashed_record(check, record) is None:
+                    yield check, entity_id, None, None
+                else:
+                    yield check, entity_id, _compare_one, (check, stream, entity_id, record, version)
+
+
+def run_bulk_audit(loan_ids: list, user_ids: list, checks: list = None, all_entities: bool = False):
+    """
+    Verify many loans / users against the chain and yield one result dict
+    per entity and check as soon as it is ready, then a summary dict.
+    Chain lookups run with at most AUDIT_MAX_WORKERS in flight.
+    """
+    checks = checks or BULK_CHECKS
+    if all_entities:
+        loan_ids = get_all_keys("loans")
+        user_ids = get_all_keys("kyc")
+
+    tasks = []
+    loan_check_names = [c for c in checks if c in LOAN_CHECKS or c == "repayments"]
+    user_check_names = [c for c in checks if c in USER_CHECKS]
+    if loan_ids and loan_check_names:
+        tasks.append(_bulk_tasks(list(dict.fromkeys(loan_ids)), loan_check_names, LOAN_CHECKS))
+    if user_ids and user_check_names:
+        tasks.append(_bulk_tasks(list(dict.fromkeys(user_ids)), user_check_names, USER_CHECKS))
+
+    summary = {"checked": 0, "matched": 0, "mismatched": 0, "missing": 0, "errors": 0}
+    started = time.monotonic()
+
+    def _count(result):
+        summary["checked"] += 1
+        if "error" in result:
+            summary["missing" if result["error"] == "not found" else "errors"] += 1
+        elif result["match"]:
+            summary["matched"] += 1
+        else:
+            summary["mismatched"] += 1
+        return result
+
+    max_in_flight = AUDIT_MAX_WORKERS * 4
+    with ThreadPoolExecutor(max_workers=AUDIT_MAX_WORKERS, thread_name_prefix="audit") as pool:
+        in_flight = {}
+
+        def _drain(return_when):
+            done, _ = wait(in_flight, return_when=return_when)
+            for future in done:
+                check, entity_id = in_flight.pop(future)
+                try:
+                    yield _count(future.result())
+                except Exception as e:
+                    yield _count({"check": check, "id": entity_id, "error": str(e)})
+
+        for task_source in tasks:
+            for check, entity_id, func, args in task_source:
+                if func is None:
+                    yield _count({"check": check, "id": entity_id, "error": "not found"})
+                    continue
+
+                in_flight[pool.submit(func, *args)] = (check, entity_id)
+
+                if len(in_flight) >= max_in_flight:
+                    yield from _drain(FIRST_COMPLETED)
+
+        while in_flight:
+            yield from _drain(FIRST_COMPLETED)
+
+    summary["elapsed_ms"] = round((time.monotonic() - started) * 1000, 1)
+    yield {"summary": summary}
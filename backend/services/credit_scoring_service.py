@@ -0,0 +1,262 @@
+"""
+CREDIT SCORING SERVICE
+----------------------
+Keeps credit_scores in line with the credit model.
+
+- Incremental: fund transfers, repayments and defaults mark the borrower
+  in credit_score_dirty inside their own transaction. A background worker
+  rescores only marked users, so requests never wait on the model.
+- Nightly: every user with financial data is rescored in one pass.
+
+financial_data is loaded column-wise (json_extract in SQLite), scored
+by the vectorized model and written back through
+score_history_service.record_scores (head + history point) with one
+executemany per batch. monthly_income comes from the borrower's declared
+financial profile (PUT /credit/financial-profile); users who have not
+declared one yet keep their current score and are counted as `no_income`
+in each run's summary.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from models.batch_score_model import FEATURE_FIELDS, RISK_BAND_NAMES, calculate_credit_scores
+from services.score_history_service import record_scores, invalidate_score_heads
+from db.database import (
+    get_item,
+    put_item,
+    load_financial_columns,
+    transaction,
+    mark_credit_dirty,
+    get_dirty_credit_users,
+    clear_credit_dirty,
+    count_dirty_credit_users,
+)
+
+CREDIT_RESCORE_INTERVAL_SECONDS = float(os.getenv("ARTHA_CREDIT_RESCORE_INTERVAL", "86400"))
+CREDIT_DIRTY_INTERVAL_SECONDS = float(os.getenv("ARTHA_CREDIT_DIRTY_INTERVAL", "30"))
+CREDIT_DIRTY_BATCH_SIZE = int(os.getenv("ARTHA_CREDIT_DIRTY_BATCH_SIZE", "500"))
+CREDIT_DIRTY_MAX_BATCHES_PER_RUN = 20
+
+_stats_lock = threading.Lock()
+_stats = {
+    "runs": 0,
+    "last_run_at": None,
+    "last_run_scored": 0,
+    "last_run_skipped": 0,
+    "last_run_no_income": 0,
+    "last_run_bands": {},
+    "last_timings_ms": {},
+    "incremental_runs": 0,
+    "incremental_rescored_total": 0,
+    "incremental_last_run_skipped": 0,
+    "incremental_skipped_total": 0,
+    "incremental_last_run_ms": 0.0,
+}
+
+
+# =========================
+# DIRTY MARKING
+# =========================
+
+def mark_score_dirty(user_ids, reason: str):
+    """Queue users for rescoring; call inside the transaction that changed their inputs"""
+    if isinstance(user_ids, str):
+        user_ids = [user_ids]
+    mark_credit_dirty(list(user_ids), reason, int(time.time()))
+
+
+def new_financial_data():
+    """financial_data row for a user's first event (income not declared yet)"""
+    return {
+        "monthly_income": 0,
+        "monthly_expense": 0,
+        "total_transactions": 0,
+        "failed_transactions": 0,
+        "avg_transaction_amount": 0.0,
+        "missed_payments": 0,
+        "loan_outstanding": 0.0,
+        "account_age_months": 0,
+    }
+
+
+def update_financial_profile(user_id: str, monthly_income: float, monthly_expense: float):
+    """Store the borrower's declared income / expense and queue a rescore"""
+    with transaction():
+        stats = get_item("financial_data", user_id) or new_financial_data()
+        stats["monthly_income"] = monthly_income
+        stats["monthly_expense"] = monthly_expense
+        put_item("financial_data", user_id, stats)
+        mark_score_dirty(user_id, "FINANCIAL_PROFILE")
+    return stats
+
+
+# =========================
+# INTERNAL HELPERS
+# =========================
+
+def _score_users(user_ids=None):
+    """Load + score financial_data (all users or `user_ids`) -> (ids, result, valid indexes)"""
+    ids, rows = load_financial_columns(FEATURE_FIELDS, user_ids)
+    matrix = np.array(rows, dtype=np.float64).reshape(len(rows), len(FEATURE_FIELDS))
+    result = calculate_credit_scores({field: matrix[:, i] for i, field in enumerate(FEATURE_FIELDS)})
+    return ids, result, np.nonzero(result["valid"])[0]
+
+
+def _entries(ids, result, valid):
+    """Scored rows -> {user_id: (score, feature snapshot)} for record_scores"""
+    scores = result["credit_score"].tolist()
+    expense = result["expense_ratio"].tolist()
+    failure = result["failure_rate"].tolist()
+    utilization = result["utilization_ratio"].tolist()
+    age = result["account_age_months"].tolist()
+    return {
+        ids[i]: (
+            scores[i],
+            {
+                "expense_ratio": expense[i],
+                "failure_rate": failure[i],
+                "utilization_ratio": utilization[i],
+                "account_age_months": age[i],
+            },
+        )
+        for i in valid.tolist()
+    }
+
+
+def rescore_now(user_ids, reason: str):
+    """
+    Score users synchronously inside the caller's transaction, after their
+    inputs were written. Returns {user_id: score} for the users the model
+    could score (the rest keep their current score). Call
+    invalidate_score_heads() after commit.
+    """
+    if isinstance(user_ids, str):
+        user_ids = [user_ids]
+    ids, result, valid = _score_users(list(user_ids))
+    entries = _entries(ids, result, valid)
+    record_scores(entries, reason)
+    return {user_id: score for user_id, (score, _) in entries.items()}
+
+
+# =========================
+# JOBS
+# =========================
+
+def rescore_all_users():
+    """
+    Periodic job: score every financial_data row in one vectorized pass and
+    upsert credit_scores (+ history) in one transaction. Returns the run summary.
+    """
+    started = time.perf_counter()
+    scored_at = int(time.time())
+
+    # 1️⃣ Load + score
+    ids, result, valid = _score_users()
+    scored = time.perf_counter()
+
+    # 2️⃣ Upsert head + history
+    with transaction():
+        record_scores(_entries(ids, result, valid), "NIGHTLY", scored_at)
+    invalidate_score_heads()
+    saved = time.perf_counter()
+
+    bands = np.bincount(result["risk_band"][valid], minlength=len(RISK_BAND_NAMES))
+    # The model only rejects rows without a positive monthly income
+    no_income = len(ids) - int(valid.size)
+    summary = {
+        "scored": int(valid.size),
+        "skipped": no_income,
+        "no_income": no_income,
+        "bands": {str(name): int(count) for name, count in zip(RISK_BAND_NAMES, bands)},
+        "timings_ms": {
+            "load_and_score": round((scored - started) * 1000, 1),
+            "save": round((saved - scored) * 1000, 1),
+            "total": round((saved - started) * 1000, 1),
+        },
+    }
+
+    with _stats_lock:
+        _stats["runs"] += 1
+        _stats["last_run_at"] = scored_at
+        _stats["last_run_scored"] = summary["scored"]
+        _stats["last_run_skipped"] = summary["skipped"]
+        _stats["last_run_no_income"] = summary["no_income"]
+        _stats["last_run_bands"] = summary["bands"]
+        _stats["last_timings_ms"] = summary["timings_ms"]
+
+    timings = summary["timings_ms"]
+    print(
+        f"[CREDIT] rescored {summary['scored']} users ({summary['skipped']} skipped) in "
+        f"{timings['total']:.0f} ms (load+score {timings['load_and_score']:.0f} / save {timings['save']:.0f})"
+    )
+    if no_income:
+        print(f"[CREDIT] ⚠️ {no_income} users have no declared monthly income and keep their current score")
+    return summary
+
+
+def recompute_dirty_scores():
+    """
+    Periodic job: rescore users marked dirty, oldest marks first.
+    Marks are cleared by version in the same transaction as the new scores,
+    so a user re-marked while their batch was being scored stays queued and
+    a failed write clears nothing. Users the model cannot score yet (no
+    declared income) are dropped from the queue and counted;
+    update_financial_profile re-marks them once they declare one.
+    """
+    started = time.perf_counter()
+    rescored = 0
+    skipped = 0
+
+    for _ in range(CREDIT_DIRTY_MAX_BATCHES_PER_RUN):
+        dirty = get_dirty_credit_users(CREDIT_DIRTY_BATCH_SIZE)
+        if not dirty:
+            break
+
+        ids, result, valid = _score_users([row["user_id"] for row in dirty])
+        entries = _entries(ids, result, valid)
+
+        # History points are grouped by the event that marked the user
+        by_reason = {}
+        for row in dirty:
+            if row["user_id"] in entries:
+                by_reason.setdefault(row["reason"], {})[row["user_id"]] = entries[row["user_id"]]
+
+        scored_at = int(time.time())
+        with transaction():
+            for reason, group in by_reason.items():
+                record_scores(group, reason, scored_at)
+            clear_credit_dirty([(row["user_id"], row["version"]) for row in dirty])
+        invalidate_score_heads(entries)
+        rescored += len(entries)
+        skipped += len(dirty) - len(entries)
+
+        if len(dirty) < CREDIT_DIRTY_BATCH_SIZE:
+            break
+
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    with _stats_lock:
+        _stats["incremental_runs"] += 1
+        _stats["incremental_rescored_total"] += rescored
+        _stats["incremental_last_run_skipped"] = skipped
+        _stats["incremental_skipped_total"] += skipped
+        _stats["incremental_last_run_ms"] = elapsed_ms
+
+    if rescored or skipped:
+        print(
+            f"[CREDIT] recomputed {rescored} dirty scores in {elapsed_ms:.0f} ms "
+            f"({skipped} dropped without usable financial data)"
+        )
+    return rescored
+
+
+def get_credit_scoring_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["interval_seconds"] = CREDIT_RESCORE_INTERVAL_SECONDS
+    stats["dirty_interval_seconds"] = CREDIT_DIRTY_INTERVAL_SECONDS
+    stats["dirty_users"] = count_dirty_credit_users()
+    return stats
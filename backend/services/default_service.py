@@ -1,42 +1,58 @@
+import os
 import time
 from blockchain.loan_status import record_loan_status
+from services.marketplace_cache import notify_loan_status_change
+from services.credit_scoring_service import mark_score_dirty, new_financial_data
 
-from db.database import get_all_items, put_item, get_repayments
+from db.database import find_due_loans, get_items, put_items, get_repayment_totals, transaction
 
+# Cadence of the background default detector; chunk = loans read + marked per transaction
+DEFAULT_CHECK_INTERVAL_SECONDS = float(os.getenv("ARTHA_DEFAULT_CHECK_INTERVAL", "3600"))
+DEFAULT_CHUNK_SIZE = int(os.getenv("ARTHA_DEFAULT_CHUNK_SIZE", "200"))
 
-def check_and_mark_defaults():
-    """
-    Check ACTIVE loans and mark them DEFAULTED if overdue and unpaid
-    """
-    current_time = int(time.time())
-    defaulted_loans = []
 
-    all_loans = get_all_items("loans")
-    for loan_id, loan in all_loans.items():
-        # 1️⃣ Only ACTIVE loans can default
-        if loan.get("status") != "ACTIVE":
-            continue
+def _record_missed_payments(borrower_ids):
+    """One missed payment per defaulted loan in financial_data (a credit model input)"""
+    stats = get_items("financial_data", list(dict.fromkeys(borrower_ids)))
+    for borrower_id in borrower_ids:
+        row = stats.setdefault(borrower_id, new_financial_data())
+        row["missed_payments"] = row.get("missed_payments", 0) + 1
+    put_items("financial_data", stats)
 
-        start_time = loan.get("start_timestamp")
-        tenure_months = loan.get("tenure_months")
-        total_due = loan.get("amount")
 
-        if not start_time or not tenure_months:
-            continue
+def _default_chunk(current_time: int, after):
+    """
+    Read, check and mark one chunk in a single transaction, so a loan repaid
+    or funded concurrently is seen in its committed state (never written back
+    stale). Returns (due loans read, {loan_id: loan} marked DEFAULTED).
+    """
+    with transaction():
+        # 1️⃣ Only ACTIVE loans past their deadline
+        due_loans = find_due_loans(current_time, after=after, limit=DEFAULT_CHUNK_SIZE)
+        if not due_loans:
+            return due_loans, {}
 
-        # 2️⃣ Calculate loan end time (simple month = 30 days)
-        loan_end_time = start_time + (tenure_months * 30 * 24 * 60 * 60)
+        # 2️⃣ Check repayment status
+        repayment_totals = get_repayment_totals([loan_id for loan_id, _ in due_loans])
+        defaulted = {}
+        for loan_id, loan in due_loans:
+            total_due = loan.get("amount")
+            total_repaid = repayment_totals[loan_id]["total_repaid"]
 
-        # 3️⃣ Check repayment status
-        repayments = get_repayments(loan_id)
-        total_repaid = sum(r["amount"] for r in repayments)
+            if total_repaid < total_due:
+                # 3️⃣ Mark DEFAULTED
+                loan["status"] = "DEFAULTED"
+                defaulted[loan_id] = loan
 
-        if current_time > loan_end_time and total_repaid < total_due:
-            # 4️⃣ Mark DEFAULTED
-            loan["status"] = "DEFAULTED"
+        if not defaulted:
+            return due_loans, defaulted
 
-            put_item("loans", loan_id, loan)
+        # 4️⃣ Status changes, missed-payment stats + chain proofs (outbox) commit with the reads they depend on
+        put_items("loans", defaulted)
+        _record_missed_payments([loan["user_id"] for loan in defaulted.values()])
+        mark_score_dirty([loan["user_id"] for loan in defaulted.values()], "DEFAULT")
 
+        for loan_id in defaulted:
             record_loan_status(
                 {
                     "status": "DEFAULTED",
@@ -46,7 +62,31 @@ def check_and_mark_defaults():
                 loan_id,
             )
 
-            defaulted_loans.append(loan_id)
+    return due_loans, defaulted
+
+
+def check_and_mark_defaults():
+    """
+    Mark ACTIVE loans DEFAULTED once their due_at has passed unpaid.
+    Only overdue loans are read (due_at index), DEFAULT_CHUNK_SIZE at a time.
+    """
+    current_time = int(time.time())
+    defaulted_loans = []
+    after = None
+
+    while True:
+        due_loans, defaulted = _default_chunk(current_time, after)
+        if not due_loans:
+            break
+        after = (due_loans[-1][1]["due_at"], due_loans[-1][0])
+        defaulted_loans.extend(defaulted)
+
+        if len(due_loans) < DEFAULT_CHUNK_SIZE:
+            break
+
+    if defaulted_loans:
+        notify_loan_status_change("ACTIVE", "DEFAULTED")
+        print(f"[DEFAULTS] Marked {len(defaulted_loans)} loans DEFAULTED")
 
     return {
         "message": "Default check completed",
@@ -0,0 +1,41 @@
+import time
+
+from utils.emi_calculator import generate_installments
+from db.database import (
+    create_installments,
+    get_installments,
+    get_next_due_installments,
+    get_overdue_summary,
+)
+
+
+def materialize_installments(loan_id: str, loan: dict, start_timestamp: int):
+    """
+    Write the loan's EMI schedule into `installments` at activation.
+    Call inside the activation transaction so schedule and status commit together.
+    """
+    schedule = generate_installments(
+        loan["amount"],
+        loan["interest_rate"],
+        loan["tenure_months"],
+        start_timestamp,
+    )
+    create_installments(loan_id, loan["user_id"], loan.get("lender_id"), schedule)
+    return schedule
+
+
+def get_borrower_schedule(user_id: str, loan_id: str):
+    """
+    Next due installment, overdue totals and full schedule for a borrower's loan
+    """
+    now = int(time.time())
+    return {
+        "next_installment": get_next_due_installments([user_id]).get(user_id),
+        **get_overdue_summary("user_id", user_id, now),
+        "installments": get_installments(loan_id),
+    }
+
+
+def get_lender_overdue(lender_id: str):
+    """Overdue installments across everything a lender has funded"""
+    return get_overdue_summary("lender_id", lender_id, int(time.time()))
@@ -9,7 +9,8 @@ from blockchain.identity import record_identity_proof
 
 from models.citizenship_ocr_model import verify_citizenship_card
 
-from db.database import get_item, put_item
+from services.score_history_service import record_scores
+from db.database import get_item, put_item, transaction
 
 
 # ---- CREDIT SCORE CONSTANT ----
@@ -190,9 +191,22 @@ def submit_declaration_video(payload: KYCPageThreeSchema):
         "reason": face_result.get("reason")
     }
 
-    # ---- BLOCKCHAIN WRITE (Optional/Safe for dev) ----
-    try:
-        print("[KYC DEBUG] Recording to blockchain...")
+    # ---- UPDATE DB STATE ----
+    kyc_data["final_result"] = final_kyc_result
+    kyc_data["stage"] = STAGE_DONE
+
+    is_approved = True # Force success for hackathon
+    kyc_data["status"] = "APPROVED" if is_approved else "REJECTED"
+
+    with transaction():
+        # ✅ Initialize fake credit score ONCE
+        existing_score = get_item("credit_scores", user_id)
+        if existing_score is None:
+            record_scores({user_id: (INITIAL_CREDIT_SCORE, None)}, "KYC_INITIAL")
+
+        put_item("kyc", user_id, kyc_data)
+
+        # ---- BLOCKCHAIN WRITE (queued in outbox with the KYC result) ----
         record_kyc_result(final_kyc_result, user_id)
         record_identity_proof(
             {
@@ -202,22 +216,6 @@ def submit_declaration_video(payload: KYCPageThreeSchema):
             },
             user_id,
         )
-    except Exception as bc_err:
-        print(f"[KYC DEBUG] Blockchain write failed (ignoring for dev): {bc_err}")
-
-    # ---- UPDATE DB STATE ----
-    kyc_data["final_result"] = final_kyc_result
-    kyc_data["stage"] = STAGE_DONE
-
-    is_approved = True # Force success for hackathon
-    kyc_data["status"] = "APPROVED" if is_approved else "REJECTED"
-
-    # ✅ Initialize fake credit score ONCE
-    existing_score = get_item("credit_scores", user_id)
-    if existing_score is None:
-        put_item("credit_scores", user_id, INITIAL_CREDIT_SCORE)
-
-    put_item("kyc", user_id, kyc_data)
 
     current_score = get_item("credit_scores", user_id)
 
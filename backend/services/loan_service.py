@@ -1,21 +1,36 @@
 from schemas.loan_schemas import BorrowRequestSchema
-from schemas.loan_marketplace_schemas import MarketplaceLoanSchema
+from schemas.loan_marketplace_schemas import MarketplaceLoanSchema, MarketplaceQuerySchema
 from schemas.lender_schemas import LenderAcceptanceSchema
 
 from blockchain.loans import record_loan_acceptance
 from blockchain.loan_status import record_loan_status
 
-from utils.emi_calculator import calculate_emi
+from utils.due_dates import compute_due_at
 from services.pdf_service import generate_loan_agreement_pdf
-from models.video_verification import verify_video_identity
-
-from db.database import get_item, put_item, get_all_items
+from services.quote_service import get_quote
+from services.score_history_service import get_latest_score
+from services.installment_service import materialize_installments, get_borrower_schedule, get_lender_overdue
+from services.marketplace_cache import (
+    get_cached_page,
+    cache_page,
+    current_generation,
+    notify_loan_status_change,
+)
+
+from db.database import get_item, get_items, put_item, find_loans, find_loans_page, get_repayment_totals, transaction
+import base64
+import datetime
+import hashlib
+import json
+import os
 import uuid
 
 
 # ---- CONSTANTS ----
 GUARANTOR_REQUIRED_AMOUNT = 30000
-PLATFORM_FEE_PERCENT = 3.0
+
+# Statuses that count as a user's open loan
+OPEN_LOAN_STATUSES = ["LISTED", "ACTIVE", "AWAITING_SIGNATURE"]
 
 BORROW_LIMITS = {
     "HIGH": 100000,
@@ -24,6 +39,14 @@ BORROW_LIMITS = {
     "BLOCKED": 0,
 }
 
+# Credit score range per band (same thresholds as get_credit_limit)
+CREDIT_BANDS = {
+    "HIGH": (750, None),
+    "MEDIUM": (650, 749),
+    "LOW": (550, 649),
+    "BLOCKED": (None, 549),
+}
+
 
 # =========================
 # CREDIT SCORE ENFORCEMENT
@@ -31,9 +54,9 @@ BORROW_LIMITS = {
 
 def get_credit_limit(user_id: str) -> int:
     """
-    Enforce borrowing limit using EXISTING credit score
+    Enforce borrowing limit using EXISTING credit score (cached head)
     """
-    score = get_item("credit_scores", user_id)
+    score = get_latest_score(user_id)
 
     if score is None:
         raise Exception("Credit score not initialized")
@@ -51,6 +74,14 @@ def get_credit_limit(user_id: str) -> int:
 # BORROWER FLOW
 # =========================
 
+def _check_no_open_loan(user_id: str, loan_id: str = None):
+    """Raise if the borrower has an open loan other than `loan_id` (the draft being updated)"""
+    open_loans = find_loans(user_id=user_id, status_in=OPEN_LOAN_STATUSES)
+    for scan_loan_id in open_loans:
+        if not loan_id or scan_loan_id != loan_id:
+            raise Exception("You already have an active loan or request")
+
+
 def create_borrow_request(payload: BorrowRequestSchema):
     """
     STEP 1:
@@ -63,13 +94,8 @@ def create_borrow_request(payload: BorrowRequestSchema):
 
     user_id = payload.user_id
 
-    # 0️⃣ Mutual Exclusion: Single Active Loan Limit
-    all_loans = get_all_items("loans")
-    for scan_loan_id, scan_loan in all_loans.items():
-        if scan_loan["user_id"] == user_id:
-            if scan_loan["status"] in ["LISTED", "ACTIVE", "AWAITING_SIGNATURE"]:
-                if not payload.loan_id or scan_loan_id != payload.loan_id:
-                    raise Exception("You already have an active loan or request")
+    # 0️⃣ Mutual Exclusion: Single Active Loan Limit (fail fast; re-checked at insert)
+    _check_no_open_loan(user_id, payload.loan_id)
 
     # 1️⃣ KYC check
     kyc_data = get_item("kyc", user_id)
@@ -82,7 +108,7 @@ def create_borrow_request(payload: BorrowRequestSchema):
         raise Exception("Rules must be accepted")
 
     # 3️⃣ Credit score enforcement
-    credit_score = get_item("credit_scores", user_id)
+    credit_score = get_latest_score(user_id)
     if credit_score is None:
         print(f"WARNING: Credit score missing for {user_id}, mocking to 750 for DEMO")
         credit_score = 750 # DEMO HACK: Default high score
@@ -109,19 +135,13 @@ def create_borrow_request(payload: BorrowRequestSchema):
         if not payload.guarantor.card_images or not payload.guarantor.card_images.front_image_ref or not payload.guarantor.card_images.back_image_ref:
             raise Exception("Guarantor citizenship card images (front and back) are required")
 
-    # 5️⃣ Platform fee
-    platform_fee = payload.amount * (PLATFORM_FEE_PERCENT / 100)
-    net_amount_received = payload.amount - platform_fee
+    # 5️⃣ + 6️⃣ Platform fee and EMI (backend truth, same cache as /loans/quote)
+    quote = get_quote(payload.amount, payload.interest_rate, payload.tenure_months)
+    platform_fee = quote["platform_fee"]
+    net_amount_received = quote["net_amount_received"]
 
-    # 6️⃣ EMI calculation (backend truth)
-    emi_data = calculate_emi(
-        principal=payload.amount,
-        annual_interest_rate=payload.interest_rate,
-        tenure_months=payload.tenure_months,
-    )
-
-    emi = emi_data["emi"]
-    total_payable = emi_data["total_payable"]
+    emi = quote["emi"]
+    total_payable = quote["total_payable"]
 
     # 7️⃣ Loan ID
     loan_id = payload.loan_id or f"LN-{uuid.uuid4().hex[:8].upper()}"
@@ -147,6 +167,8 @@ def create_borrow_request(payload: BorrowRequestSchema):
     # 9️⃣ Video Verification Enrollment
     if payload.video_verification_ref:
         # Get card from KYC
+        from models.video_verification import verify_video_identity # Deferred import (OpenCV)
+
         front_image_ref = kyc_data["id_documents"]["id_images"]["front_image_ref"]
         video_result = verify_video_identity(
             video_path=payload.video_verification_ref,
@@ -176,7 +198,14 @@ def create_borrow_request(payload: BorrowRequestSchema):
         "created_at": payload.submitted_at, # This is int from frontend
     }
 
-    put_item("loans", loan_id, loan_data)
+    # Check + insert share one BEGIN IMMEDIATE unit of work, so two concurrent
+    # requests from the same borrower cannot both create a loan. The slow
+    # steps above (PDF, video) stay outside the write lock.
+    with transaction():
+        _check_no_open_loan(user_id, payload.loan_id)
+        previous = get_item("loans", loan_id) if payload.loan_id else None
+        put_item("loans", loan_id, loan_data)
+    notify_loan_status_change(previous.get("status") if previous else None, "LISTED")
     print(f"Loan {loan_id} created and set to LISTED immediately for DEMO.")
 
     return {
@@ -193,21 +222,51 @@ def create_borrow_request(payload: BorrowRequestSchema):
 # MARKETPLACE
 # =========================
 
-def get_marketplace_listings():
+def _encode_cursor(after) -> str:
+    raw = json.dumps(list(after), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str):
+    try:
+        sort_value, loan_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return sort_value, loan_id
+
+
+def get_marketplace_listings(query: MarketplaceQuerySchema = None):
     """
-    Public marketplace (LISTED loans only)
+    Public marketplace (LISTED loans only), one keyset page at a time.
+    Returns (listings, next_cursor); next_cursor is None on the last page.
     """
+    query = query or MarketplaceQuerySchema()
     listings = []
 
-    loans_map = get_all_items("loans")
+    min_score, max_score = CREDIT_BANDS[query.credit_band] if query.credit_band else (None, None)
+
+    page, next_after = find_loans_page(
+        status="LISTED",
+        sort=query.sort,
+        after=_decode_cursor(query.after) if query.after else None,
+        limit=query.limit,
+        min_amount=query.min_amount,
+        max_amount=query.max_amount,
+        min_interest_rate=query.min_interest_rate,
+        max_interest_rate=query.max_interest_rate,
+        min_tenure_months=query.min_tenure_months,
+        max_tenure_months=query.max_tenure_months,
+        min_credit_score=min_score,
+        max_credit_score=max_score,
+        purpose=query.purpose,
+    )
 
-    for loan_id, loan in loans_map.items():
-        if loan.get("status") != "LISTED":
-            continue
+    # Fetch all borrower profiles in one query
+    users = get_items("users", [loan["user_id"] for _, loan in page])
 
-        # Fetch borrower name
-        user_id = loan["user_id"]
-        user = get_item("users", user_id)
+    for loan_id, loan in page:
+        # Borrower name
+        user = users.get(loan["user_id"])
         
         borrower_display_name = "Unknown"
         if user:
@@ -232,7 +291,34 @@ def get_marketplace_listings():
             )
         )
 
-    return listings
+    next_cursor = _encode_cursor(next_after) if next_after else None
+    return listings, next_cursor
+
+
+def get_marketplace_page(query: MarketplaceQuerySchema = None) -> dict:
+    """
+    Cached marketplace page: {"listings", "next_cursor", "etag"}
+    """
+    query = query or MarketplaceQuerySchema()
+    key = tuple(sorted(query.dict().items()))
+
+    page = get_cached_page(key)
+    if page is not None:
+        return page
+
+    generation = current_generation()
+    listings, next_cursor = get_marketplace_listings(query)
+
+    body = json.dumps([l.dict() for l in listings], sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha256(f"{body}|{next_cursor}".encode("utf-8")).hexdigest()[:32]
+
+    page = {
+        "listings": listings,
+        "next_cursor": next_cursor,
+        "etag": f'"{digest}"',
+    }
+    cache_page(key, page, generation)
+    return page
 
 
 # =========================
@@ -244,6 +330,19 @@ def accept_loan(payload: LenderAcceptanceSchema):
     Lender accepts a LISTED loan
     """
 
+    # Every check runs inside the BEGIN IMMEDIATE unit of work: two lenders
+    # racing for the same loan are serialized and the second one sees it ACTIVE
+    with transaction():
+        _apply_acceptance(payload)
+
+    notify_loan_status_change("LISTED", "ACTIVE")
+
+    return {"message": "Loan accepted and activated"}
+
+
+def _apply_acceptance(payload: LenderAcceptanceSchema):
+    """Read-check-write of one acceptance; call inside transaction()"""
+
     loan_id = payload.loan_id
     lender_id = payload.lender_id
     
@@ -256,26 +355,17 @@ def accept_loan(payload: LenderAcceptanceSchema):
         raise Exception("You cannot fund your own loan")
     
     # 0️⃣ Mutual Exclusion: Borrower cannot Lend
-    all_loans = get_all_items("loans")
-    total_lended_so_far = 0
-    
-    for _, scan_loan in all_loans.items():
-        # Check if lender is acting as a borrower elsewhere
-        if scan_loan["user_id"] == lender_id:
-             if scan_loan["status"] in ["LISTED", "ACTIVE", "AWAITING_SIGNATURE"]:
-                 raise Exception("Borrowers cannot lend money")
-        
-        # Calculate total active lending
-        if scan_loan.get("lender_id") == lender_id and scan_loan.get("status") != "REPAID":
-            total_lended_so_far += scan_loan["amount"]
+    # Check if lender is acting as a borrower elsewhere
+    if find_loans(user_id=lender_id, status_in=OPEN_LOAN_STATUSES, limit=1):
+        raise Exception("Borrowers cannot lend money")
+
+    # Calculate total active lending
+    lender_loans = find_loans(lender_id=lender_id, status_not_in=["REPAID"])
+    total_lended_so_far = sum(scan_loan["amount"] for scan_loan in lender_loans.values())
 
     # 0️⃣ Lending Limit: Max 500,000
     LENDING_LIMIT = 500000
-    loan_to_accept = get_item("loans", loan_id) # Need amount
-    if not loan_to_accept:
-         raise Exception("Loan not found")
-         
-    if total_lended_so_far + loan_to_accept["amount"] > LENDING_LIMIT:
+    if total_lended_so_far + loan["amount"] > LENDING_LIMIT:
         raise Exception("Lending limit (500,000) exceeded")
 
     if loan["status"] != "LISTED":
@@ -285,33 +375,28 @@ def accept_loan(payload: LenderAcceptanceSchema):
     if not lender_kyc or lender_kyc.get("status") != "APPROVED":
         raise Exception("Lender KYC not approved")
 
-    # Update loan
+    # Update loan (accepted_at is unix seconds; stored as ISO like other timestamps)
+    accepted_at_iso = datetime.datetime.fromtimestamp(payload.accepted_at).isoformat()
     loan["lender_id"] = lender_id
     loan["status"] = "ACTIVE"
-    loan["start_timestamp"] = payload.accepted_at.isoformat()
+    loan["start_timestamp"] = accepted_at_iso
+    # Final deadline, indexed for the default detector
+    loan["due_at"] = compute_due_at(payload.accepted_at, loan.get("tenure_months"))
 
+    # Loan activation, EMI schedule, audit record and chain proofs (outbox) commit together
     put_item("loans", loan_id, loan)
+    materialize_installments(loan_id, loan, payload.accepted_at)
 
-    # Store acceptance for audit
-    put_item(
-        "loan_acceptances",
-        loan_id,
-        {
-            "loan_id": loan_id,
-            "lender_id": lender_id,
-            "accepted_at": payload.accepted_at.isoformat(),
-        },
-    )
+    # Store acceptance for audit; the chain gets the hash of exactly this record
+    acceptance = {
+        "loan_id": loan_id,
+        "lender_id": lender_id,
+        "accepted_at": accepted_at_iso,
+    }
+    put_item("loan_acceptances", loan_id, acceptance)
 
     # Blockchain proof
-    record_loan_acceptance(
-        {
-            "loan_id": loan_id,
-            "lender_id": lender_id,
-            "accepted_at": payload.accepted_at,
-        },
-        loan_id,
-    )
+    record_loan_acceptance(acceptance, loan_id)
 
     record_loan_status(
         {
@@ -321,8 +406,6 @@ def accept_loan(payload: LenderAcceptanceSchema):
         loan_id,
     )
 
-    return {"message": "Loan accepted and activated"}
-
 
 # =========================
 # PORTFOLIO
@@ -334,35 +417,29 @@ def get_user_portfolio(user_id: str):
     - Active Borrowing (if any)
     - Active Investments (if any)
     """
-    loans_map = get_all_items("loans")
-    
     active_loan_data = None
     investments = []
     total_invested = 0
     interest_earned = 0 # This would be calculated from repayments in a real system
     
-    from db.database import get_repayments
-
     # 1. Borrowing Side
-    for loan_id, loan in loans_map.items():
-        if loan["user_id"] == user_id:
-            if loan["status"] in ["LISTED", "ACTIVE", "AWAITING_SIGNATURE"]:
-                # Count repayments
-                repayments = get_repayments(loan_id)
-                loan["paid_emis"] = len(repayments)
-                # Calculate total repaid amount
-                loan["total_repaid_amount"] = sum(r["amount"] for r in repayments)
-                active_loan_data = loan
-                break
+    borrowed = find_loans(user_id=user_id, status_in=OPEN_LOAN_STATUSES, limit=1)
+    for loan_id, loan in borrowed.items():
+        # Repayment count & total repaid amount
+        totals = get_repayment_totals([loan_id])[loan_id]
+        loan["paid_emis"] = totals["paid_emis"]
+        loan["total_repaid_amount"] = totals["total_repaid"]
+        # Next due / overdue from the materialized schedule (indexed lookups)
+        loan.update(get_borrower_schedule(user_id, loan_id))
+        active_loan_data = loan
     
     # 2. Lending Side
-    for loan_id, loan in loans_map.items():
-        if loan.get("lender_id") == user_id:
-            investments.append(loan)
-            total_invested += loan["amount"]
-            # Est interest
-            interest = loan["amount"] * (loan["interest_rate"] / 100)
-            interest_earned += interest
+    for loan_id, loan in find_loans(lender_id=user_id).items():
+        investments.append(loan)
+        total_invested += loan["amount"]
+        # Est interest
+        interest = loan["amount"] * (loan["interest_rate"] / 100)
+        interest_earned += interest
             
     return {
         "active_loan": active_loan_data,
@@ -370,6 +447,7 @@ def get_user_portfolio(user_id: str):
             "total_invested": total_invested,
             "interest_earned": interest_earned,
             "active_loans_count": len(investments),
-            "loans": investments 
+            "loans": investments,
+            **get_lender_overdue(user_id),
         }
     }
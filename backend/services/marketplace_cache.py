@@ -0,0 +1,50 @@
+"""
+MARKETPLACE CACHE
+-----------------
+Read-through cache of marketplace pages (listings + cursor + ETag).
+
+Any committed write to a loan that is (or was) LISTED clears every
+cached page - status transitions and edits of a listed loan alike.
+"""
+
+import os
+
+from utils.cache import TTLCache
+
+MARKETPLACE_CACHE_TTL_SECONDS = float(os.getenv("ARTHA_MARKETPLACE_CACHE_TTL", "30"))
+MARKETPLACE_CACHE_MAX_PAGES = 512
+
+_page_cache = TTLCache(
+    max_entries=MARKETPLACE_CACHE_MAX_PAGES,
+    ttl_seconds=MARKETPLACE_CACHE_TTL_SECONDS,
+)
+
+
+def get_cached_page(key):
+    return _page_cache.get(key)
+
+
+def cache_page(key, page: dict, generation: int):
+    _page_cache.set(key, page, generation=generation)
+
+
+def current_generation() -> int:
+    return _page_cache.generation
+
+
+def invalidate_marketplace():
+    _page_cache.clear()
+
+
+def notify_loan_status_change(previous_status, new_status):
+    """
+    Call AFTER any loan write is committed, with the status before and after.
+    Writes that never touch a LISTED loan don't change what the marketplace
+    shows; LISTED -> LISTED edits (amount, rate, score, ...) do.
+    """
+    if "LISTED" in (previous_status, new_status):
+        invalidate_marketplace()
+
+
+def get_marketplace_cache_stats() -> dict:
+    return _page_cache.stats()
@@ -10,34 +10,60 @@ Rules:
 - Hash + metadata ONLY
 """
 
-from multichain_rpc import call_rpc
+import json
+
+from blockchain.mirror import (
+    get_stream_page,
+    iter_stream_items,
+    is_stream_mirrored,
+    StreamNotMirrored,
+    MIRROR_SETTLED_CONFIRMATIONS,
+)
+from schemas.public_ledger_schemas import PublicLedgerQuerySchema
+
+# Route name -> stream, for bulk export
+PUBLIC_STREAMS = {
+    "transactions": "transactions",
+    "loans": "loan_requests",
+    "repayments": "repayments",
+    "kyc": "kyc_results",
+    "identity": "identity_proofs",
+}
 
 
 # =========================
 # INTERNAL HELPERS
 # =========================
 
-def _list_stream_items(stream_name: str):
+def _list_stream_items(stream_name: str, query: PublicLedgerQuerySchema):
     """
-    Fetch all items from a MultiChain stream
+    Fetch one page of a MultiChain stream (served from the local mirror).
+    A page is immutable once it is full and every item is settled.
     """
-    response = call_rpc(
-        method="liststreamitems",
-        params=[stream_name]
+    items, next_start = get_stream_page(
+        stream_name,
+        start=query.start,
+        limit=query.limit,
+        since_blocktime=query.since_blocktime,
+        key=query.key,
     )
-
-    if "error" in response and response["error"]:
-        raise Exception(response["error"])
-
-    return response.get("result", [])
+    immutable = (
+        len(items) == query.limit
+        and all((i.get("confirmations") or 0) >= MIRROR_SETTLED_CONFIRMATIONS for i in items)
+    )
+    return {
+        "items": [_normalize_item(i, stream_name) for i in items],
+        "next_start": next_start,
+        "immutable": immutable,
+    }
 
 
-def _normalize_item(item: dict) -> dict:
+def _normalize_item(item: dict, stream_name: str = None) -> dict:
     """
     Normalize raw MultiChain stream item into public-safe format
     """
     return {
-        "stream": item.get("stream"),
+        "stream": item.get("stream") or stream_name,
         "txid": item.get("txid"),
         "blocktime": item.get("blocktime"),
         "confirmations": item.get("confirmations"),
@@ -49,41 +75,54 @@ def _normalize_item(item: dict) -> dict:
 # PUBLIC READ FUNCTIONS
 # =========================
 
-def get_public_transactions():
+def get_public_transactions(query: PublicLedgerQuerySchema):
     """
     Public view of transaction receipts
     """
-    items = _list_stream_items("transactions")
-    return [_normalize_item(i) for i in items]
+    return _list_stream_items("transactions", query)
 
 
-def get_public_loans():
+def get_public_loans(query: PublicLedgerQuerySchema):
     """
     Public view of loan requests & agreements
     """
-    items = _list_stream_items("loan_requests")
-    return [_normalize_item(i) for i in items]
+    return _list_stream_items("loan_requests", query)
 
 
-def get_public_repayments():
+def get_public_repayments(query: PublicLedgerQuerySchema):
     """
     Public view of repayment events
     """
-    items = _list_stream_items("repayments")
-    return [_normalize_item(i) for i in items]
+    return _list_stream_items("repayments", query)
 
 
-def get_public_kyc():
+def get_public_kyc(query: PublicLedgerQuerySchema):
     """
     Public view of KYC verification hashes
     """
-    items = _list_stream_items("kyc_results")
-    return [_normalize_item(i) for i in items]
+    return _list_stream_items("kyc_results", query)
 
 
-def get_public_identity_proofs():
+def get_public_identity_proofs(query: PublicLedgerQuerySchema):
     """
     Public view of identity proof hashes
     """
-    items = _list_stream_items("identity_proofs")
-    return [_normalize_item(i) for i in items]
+    return _list_stream_items("identity_proofs", query)
+
+
+def export_public_stream(name: str, query: PublicLedgerQuerySchema):
+    """
+    Bulk export as NDJSON lines (one normalized item per line).
+    Ignores limit/start; walks the whole (filtered) stream in pages.
+    Checked before streaming starts, so a keyed export of a stream that is
+    not mirrored yet fails with StreamNotMirrored instead of a cut-off body.
+    """
+    stream_name = PUBLIC_STREAMS[name]
+    if query.key is not None and not is_stream_mirrored(stream_name):
+        raise StreamNotMirrored(f"Stream {stream_name} is not mirrored yet")
+    return _export_lines(stream_name, query)
+
+
+def _export_lines(stream_name: str, query: PublicLedgerQuerySchema):
+    for item in iter_stream_items(stream_name, query.since_blocktime, query.key):
+        yield json.dumps(_normalize_item(item, stream_name)) + "\n"
@@ -0,0 +1,88 @@
+"""
+LOAN QUOTES
+-----------
+EMI / fee quotes for the borrow form. calculate_emi results are cached
+per (amount, rate, tenure) so slider drags and repeated submissions are
+served from memory; create_borrow_request uses the same cache.
+"""
+
+from functools import lru_cache
+from itertools import product
+
+from utils.emi_calculator import calculate_emi
+from utils.constants import PLATFORM_FEE_PERCENT
+
+QUOTE_CACHE_SIZE = 4096
+MAX_QUOTES_PER_REQUEST = 200
+# Upper bounds for quote inputs; the route rejects anything larger with 422
+MAX_QUOTE_AMOUNT = 100_000_000
+MAX_QUOTE_TENURE_MONTHS = 360
+
+
+@lru_cache(maxsize=QUOTE_CACHE_SIZE)
+def _quote(amount: float, interest_rate: float, tenure_months: int) -> tuple:
+    # Cached as an immutable tuple so callers cannot mutate a shared entry
+    emi_data = calculate_emi(
+        principal=amount,
+        annual_interest_rate=interest_rate,
+        tenure_months=tenure_months,
+    )
+    platform_fee = round(amount * (PLATFORM_FEE_PERCENT / 100), 2)
+    return (
+        emi_data["emi"],
+        emi_data["total_payable"],
+        platform_fee,
+        round(amount - platform_fee, 2),
+    )
+
+
+def get_quote(amount: float, interest_rate: float, tenure_months: int) -> dict:
+    """
+    EMI, total payable, platform fee and net amount received for one loan
+    """
+    if not 0 < amount <= MAX_QUOTE_AMOUNT or not 0 < tenure_months <= MAX_QUOTE_TENURE_MONTHS:
+        raise ValueError("Invalid principal or tenure")
+    if not 0 <= interest_rate <= 100:
+        raise ValueError("Invalid interest rate")
+
+    # Normalize the key so 50000 and 50000.0 share a cache entry
+    emi, total_payable, platform_fee, net_amount_received = _quote(
+        round(float(amount), 2), round(float(interest_rate), 2), int(tenure_months)
+    )
+    return {
+        "amount": amount,
+        "interest_rate": interest_rate,
+        "tenure_months": tenure_months,
+        "emi": emi,
+        "total_payable": total_payable,
+        "platform_fee_percent": PLATFORM_FEE_PERCENT,
+        "platform_fee": platform_fee,
+        "net_amount_received": net_amount_received,
+    }
+
+
+def get_quotes(amounts: list, interest_rates: list, tenures: list) -> list:
+    """
+    Quotes for every (amount, rate, tenure) combination, e.g. all tenures
+    for one amount in a single call
+    """
+    combinations = len(amounts) * len(interest_rates) * len(tenures)
+    if combinations > MAX_QUOTES_PER_REQUEST:
+        raise ValueError(f"Too many quotes requested ({combinations} > {MAX_QUOTES_PER_REQUEST})")
+
+    return [
+        get_quote(amount, rate, tenure)
+        for amount, rate, tenure in product(amounts, interest_rates, tenures)
+    ]
+
+
+def get_quote_cache_stats():
+    info = _quote.cache_info()
+    total = info.hits + info.misses
+    return {
+        "entries": info.currsize,
+        "max_entries": info.maxsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_ratio": round(info.hits / total, 3) if total else 0.0,
+    }
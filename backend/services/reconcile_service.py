@@ -0,0 +1,198 @@
+"""
+RECONCILE SERVICE
+-----------------
+Continuous DB-vs-chain drift detection.
+
+Every write to a chain-audited table stamps a change_seq. Each run walks
+the rows changed since the table's checkpoint, re-hashes them with the
+audit_service checks and compares against the chain, so the cost of a
+run is proportional to what changed, not to the size of the tables.
+
+- A row whose hash is not on chain yet is recorded as PENDING (its proof
+  may still be in the outbox / an open Merkle batch).
+- PENDING rows are re-checked every run; once RECONCILE_GRACE_SECONDS
+  pass without a match they become MISMATCH.
+- A later match (or a newer change that matches) clears the row.
+"""
+
+import os
+import threading
+import time
+
+from services.audit_service import LOAN_CHECKS, USER_CHECKS, _compare_one, _compare_repayments, _hashed_record
+from db.database import (
+    get_item,
+    get_reconcile_checkpoint,
+    get_changed_records,
+    count_changes_after,
+    get_repayment,
+    save_reconcile_results,
+    get_pending_mismatches,
+    get_mismatch_counts,
+)
+
+RECONCILE_INTERVAL_SECONDS = float(os.getenv("ARTHA_RECONCILE_INTERVAL", "60"))
+RECONCILE_BATCH_SIZE = int(os.getenv("ARTHA_RECONCILE_BATCH_SIZE", "500"))
+RECONCILE_MAX_BATCHES_PER_RUN = 20
+RECONCILE_GRACE_SECONDS = int(os.getenv("ARTHA_RECONCILE_GRACE_SECONDS", "900"))
+
+# table -> audit check. `loans` is not reconciled: loan rows keep changing
+# (status, lender, due dates) after the request hash is published.
+RECONCILE_CHECKS = {
+    "kyc": "kyc",
+    "loan_acceptances": "loan_acceptance",
+    "agreement_executions": "agreement_execution",
+    "transactions": "transaction",
+    "repayments": "repayments",
+}
+
+_stats_lock = threading.Lock()
+_stats = {
+    "runs": 0,
+    "checked_total": 0,
+    "last_run_checked": 0,
+    "last_run_ms": 0.0,
+    "records_per_second": 0.0,
+}
+
+
+# =========================
+# INTERNAL HELPERS
+# =========================
+
+def _check_record(table: str, key: str, data: dict, loan_id: str = None, version: int = None):
+    """
+    Compare one DB row against the chain -> (check_name, db_hash, chain_hash, matched).
+    Returns None when the row has nothing on chain to compare (e.g. KYC
+    still in progress).
+    """
+    check = RECONCILE_CHECKS[table]
+
+    if check == "repayments":
+        result = _compare_repayments(loan_id, [data])[0]
+        return check, result["db_hash"], result["blockchain_hash"], result["match"]
+
+    if _hashed_record(check, data) is None:
+        return None
+
+    _, stream = {**LOAN_CHECKS, **USER_CHECKS}[check]
+    result = _compare_one(check, stream, key, data, version)
+    return check, result["db_hash"], result["blockchain_hash"], result["match"]
+
+
+def _mismatch(key: str, outcome, status: str = "PENDING") -> dict:
+    check, db_hash, chain_hash, _ = outcome
+    return {
+        "record_key": key,
+        "check_name": check,
+        "db_hash": db_hash,
+        "chain_hash": chain_hash,
+        "status": status,
+    }
+
+
+def _reconcile_table(table: str, now: int) -> int:
+    """Walk rows changed since the checkpoint; returns rows checked"""
+    checkpoint = get_reconcile_checkpoint(table)["last_seq"]
+    checked = 0
+
+    for _ in range(RECONCILE_MAX_BATCHES_PER_RUN):
+        records = get_changed_records(table, checkpoint, RECONCILE_BATCH_SIZE)
+        if not records:
+            break
+
+        mismatches, resolved = [], []
+        for record in records:
+            outcome = _check_record(
+                table, record["key"], record["data"], record.get("loan_id"), record["change_seq"]
+            )
+            if outcome is None or outcome[3]:
+                resolved.append(record["key"])
+            else:
+                mismatches.append(_mismatch(record["key"], outcome))
+
+        checkpoint = records[-1]["change_seq"]
+        save_reconcile_results(table, checkpoint, len(records), now, mismatches, resolved)
+        checked += len(records)
+
+        if len(records) < RECONCILE_BATCH_SIZE:
+            break
+
+    return checked
+
+
+def _recheck_pending(now: int) -> int:
+    """Re-check PENDING rows; promote to MISMATCH after the grace period"""
+    pending = get_pending_mismatches(RECONCILE_BATCH_SIZE)
+
+    by_table = {}
+    for row in pending:
+        by_table.setdefault(row["table_name"], []).append(row)
+
+    for table, rows in by_table.items():
+        mismatches, resolved = [], []
+        for row in rows:
+            key = row["record_key"]
+            if table == "repayments":
+                found = get_repayment(key)
+                outcome = found and _check_record(table, key, found[1], found[0])
+            else:
+                data = get_item(table, key)
+                outcome = data and _check_record(table, key, data)
+
+            if not outcome or outcome[3]:
+                resolved.append(key)
+                continue
+
+            expired = now - row["first_seen_at"] >= RECONCILE_GRACE_SECONDS
+            mismatches.append(_mismatch(key, outcome, "MISMATCH" if expired else "PENDING"))
+
+        # Re-checks do not move the change checkpoint
+        save_reconcile_results(table, 0, 0, now, mismatches, resolved)
+
+    return len(pending)
+
+
+# =========================
+# JOB
+# =========================
+
+def reconcile_changes():
+    """Periodic job: reconcile every change-tracked table, then re-check PENDING rows"""
+    started = time.monotonic()
+    now = int(time.time())
+
+    checked = 0
+    for table in RECONCILE_CHECKS:
+        checked += _reconcile_table(table, now)
+    _recheck_pending(now)
+
+    elapsed = time.monotonic() - started
+    with _stats_lock:
+        _stats["runs"] += 1
+        _stats["checked_total"] += checked
+        _stats["last_run_checked"] = checked
+        _stats["last_run_ms"] = round(elapsed * 1000, 1)
+        _stats["records_per_second"] = round(checked / elapsed, 1) if elapsed > 0 else 0.0
+
+    if checked:
+        print(f"[RECONCILE] checked {checked} changed records in {elapsed * 1000:.0f} ms")
+    return checked
+
+
+def get_reconcile_stats():
+    """Throughput of the last run, per-table lag (unchecked changes) and open mismatches"""
+    with _stats_lock:
+        stats = dict(_stats)
+
+    stats["tables"] = {}
+    for table in RECONCILE_CHECKS:
+        checkpoint = get_reconcile_checkpoint(table)
+        stats["tables"][table] = {
+            "checkpoint": checkpoint["last_seq"],
+            "lag": count_changes_after(table, checkpoint["last_seq"]),
+            "last_run_at": checkpoint["last_run_at"],
+            "checked_total": checkpoint["checked_total"],
+        }
+    stats["mismatches"] = get_mismatch_counts()
+    return stats
@@ -1,34 +1,79 @@
 from schemas.repayment_schemas import RepaymentSchema
 from blockchain.transactions import record_repayment
 from blockchain.loan_status import record_loan_status
+from services.marketplace_cache import notify_loan_status_change
+from services.credit_scoring_service import mark_score_dirty, new_financial_data, rescore_now
+from services.score_history_service import invalidate_score_heads
 
+import datetime
 import uuid
-from db.database import get_item, put_item, add_repayment, get_repayments
+from db.database import (
+    get_item,
+    put_item,
+    add_repayment,
+    apply_repayment_to_installments,
+    get_repayment_totals,
+    transaction,
+)
 
 # ---- STORES REPLACED BY DB ----
 
 
 # ---- CREDIT SCORE RULES ----
 INITIAL_SCORE = 600
-REWARD_ON_FULL_REPAY = 20
-MAX_SCORE = 850
 
 
-def _increase_credit_score(user_id: str):
+def _reduce_outstanding(borrower_id: str, loan: dict, repaid_before: float, repaid_after: float, fully_repaid: bool):
     """
-    Increase credit score after successful full repayment
+    Take the principal this repayment covers off financial_data.loan_outstanding
+    (payments count against principal first; closing the loan clears the rest),
+    so the credit model sees it
     """
-    current = get_item("credit_scores", user_id) or INITIAL_SCORE
-    new_score = min(current + REWARD_ON_FULL_REPAY, MAX_SCORE)
-    put_item("credit_scores", user_id, new_score)
+    principal = loan.get("amount") or 0
+    covered = (principal if fully_repaid else min(repaid_after, principal)) - min(repaid_before, principal)
+    if covered <= 0:
+        return
+
+    stats = get_item("financial_data", borrower_id) or new_financial_data()
+    stats["loan_outstanding"] = max(round(stats["loan_outstanding"] - covered, 2), 0.0)
+    put_item("financial_data", borrower_id, stats)
 
 
 def process_repayment(payload: RepaymentSchema):
     """
-    Process partial or full loan repayment
-    Credit score increases ONLY on full repayment
+    Process partial or full loan repayment.
+    The repaid principal comes off loan_outstanding; a full repayment
+    rescores the borrower right away, a partial one queues a rescore.
     """
 
+    # Checks and writes share one BEGIN IMMEDIATE unit of work: two
+    # concurrent final repayments are serialized, and the second one sees
+    # the loan REPAID (no second closure, no second score bonus)
+    with transaction():
+        result = _apply_repayment(payload)
+
+    borrower_id = result.pop("borrower_id")
+    if result.pop("fully_repaid"):
+        notify_loan_status_change("ACTIVE", "REPAID")
+        invalidate_score_heads([borrower_id])
+
+        return {
+            "message": "Loan fully repaid",
+            "new_credit_score": get_item("credit_scores", borrower_id),
+        }
+
+    # 7️⃣ Partial repayment (score follows once the dirty worker runs)
+    current_score = get_item("credit_scores", borrower_id) or INITIAL_SCORE
+    return {
+        "message": "Partial repayment recorded",
+        "total_repaid": result["total_repaid"],
+        "credit_score": current_score,
+    }
+
+
+def _apply_repayment(payload: RepaymentSchema) -> dict:
+    """Read-check-write of one repayment; call inside transaction()"""
+
     loan_id = payload.loan_id
 
     # 1️⃣ Loan must exist
@@ -46,43 +91,44 @@ def process_repayment(payload: RepaymentSchema):
         raise Exception("Only borrower can repay this loan")
 
     # 4️⃣ Track repayment amount
-    # Use helper to get list, sum them
-    existing_repayments = get_repayments(loan_id)
-    total_repaid = sum(r["amount"] for r in existing_repayments)
-    
-    total_repaid += payload.amount
-    
+    repaid_before = get_repayment_totals([loan_id])[loan_id]["total_repaid"]
+
+    total_repaid = repaid_before + payload.amount
+
     # Store this new repayment record
     repayment_id = f"RP-{uuid.uuid4().hex[:8]}"
     rp_data = payload.dict()
     rp_data["repayment_id"] = repayment_id
     
     # Fix timestamp
-    import datetime
     dt_object = datetime.datetime.fromtimestamp(rp_data["timestamp"])
     rp_data["timestamp"] = dt_object.isoformat()
     
-    add_repayment(repayment_id, loan_id, rp_data)
-
-    # 5️⃣ Blockchain write: repayment proof
-    record_repayment(
-        repayment_payload=payload.dict(),
-        loan_id=loan_id,
-    )
-
-    # 6️⃣ FULL repayment → close loan + increase credit score
+    # 5️⃣ FULL repayment → close loan + rescore
     # Auto-detect full repayment if amount covers total payable
     is_fully_repaid = payload.repayment_type == "FULL"
     
     if loan.get("total_payable") and total_repaid >= loan.get("total_payable"):
         is_fully_repaid = True
 
+    # Repayment record, model inputs, loan closure, score and chain proofs (outbox) commit as one unit
+    add_repayment(repayment_id, loan_id, rp_data)
+    # Settle the oldest open installments first
+    apply_repayment_to_installments(loan_id, payload.amount, payload.timestamp)
+    _reduce_outstanding(borrower_id, loan, repaid_before, total_repaid, is_fully_repaid)
+
+    # 6️⃣ Blockchain write: proof of the stored repayment record
+    record_repayment(
+        repayment_payload=rp_data,
+        loan_id=loan_id,
+    )
+
     if is_fully_repaid:
         loan["status"] = "REPAID"
         put_item("loans", loan_id, loan)
 
-        # ✅ Increase fake credit score
-        _increase_credit_score(borrower_id)
+        # ✅ Score the closed loan now (same model as the dirty worker)
+        rescore_now(borrower_id, "REPAYMENT")
 
         record_loan_status(
             {
@@ -91,16 +137,11 @@ def process_repayment(payload: RepaymentSchema):
             },
             loan_id,
         )
+    else:
+        mark_score_dirty(borrower_id, "REPAYMENT")
 
-        return {
-            "message": "Loan fully repaid",
-            "new_credit_score": get_item("credit_scores", borrower_id),
-        }
-
-    # 7️⃣ Partial repayment (no credit score change)
-    current_score = get_item("credit_scores", borrower_id) or INITIAL_SCORE
     return {
-        "message": "Partial repayment recorded",
+        "borrower_id": borrower_id,
+        "fully_repaid": is_fully_repaid,
         "total_repaid": total_repaid,
-        "credit_score": current_score,
     }
@@ -0,0 +1,159 @@
+"""
+SCORE HISTORY SERVICE
+---------------------
+Append-only credit score time series + the cached score head.
+
+- Every score write goes through record_scores(): credit_scores (the
+  head, one row per user) and a compact credit_score_history point are
+  written in the caller's transaction.
+- get_latest_score() serves the head from an in-process cache, so the
+  borrow path never touches the history table. Writers call
+  invalidate_score_heads() AFTER commit; the TTL bounds any race.
+- Retention: points older than CREDIT_HISTORY_RAW_DAYS are compacted to
+  the last point per user per day; CREDIT_HISTORY_MAX_DAYS (0 = keep
+  forever) drops points entirely.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from utils.cache import TTLCache
+from utils.score_codec import encode_reason, decode_reason, pack_features, unpack_features
+from db.database import (
+    get_item,
+    put_items,
+    add_score_history,
+    get_score_history,
+    get_score_buckets,
+    compact_score_history,
+    purge_score_history,
+    transaction,
+)
+
+SCORE_HEAD_CACHE_TTL_SECONDS = float(os.getenv("ARTHA_SCORE_HEAD_CACHE_TTL", "60"))
+SCORE_HEAD_CACHE_SIZE = 50_000
+
+CREDIT_HISTORY_RAW_DAYS = int(os.getenv("ARTHA_CREDIT_HISTORY_RAW_DAYS", "90"))
+CREDIT_HISTORY_MAX_DAYS = int(os.getenv("ARTHA_CREDIT_HISTORY_MAX_DAYS", "0"))
+CREDIT_HISTORY_COMPACT_INTERVAL_SECONDS = float(os.getenv("ARTHA_CREDIT_HISTORY_COMPACT_INTERVAL", "86400"))
+# Days before the raw-retention cutoff re-compacted each run (covers missed runs)
+CREDIT_HISTORY_COMPACT_LOOKBACK_DAYS = 7
+DAY_SECONDS = 86400
+
+# Chart resolutions accepted by get_score_series
+SERIES_BUCKETS = {
+    "hour": 3600,
+    "day": DAY_SECONDS,
+    "week": 7 * DAY_SECONDS,
+    "month": 30 * DAY_SECONDS,
+}
+
+_head_cache = TTLCache(max_entries=SCORE_HEAD_CACHE_SIZE, ttl_seconds=SCORE_HEAD_CACHE_TTL_SECONDS)
+
+_stats_lock = threading.Lock()
+_stats = {"compactions": 0, "points_compacted": 0, "points_purged": 0, "last_compaction_at": None}
+
+
+# =========================
+# WRITES
+# =========================
+
+def record_scores(entries: Dict[str, Tuple[int, Optional[dict]]], reason: str, scored_at: int = None):
+    """
+    Write {user_id: (score, features)} to the head and append history points.
+    Call inside the caller's transaction; invalidate_score_heads() after commit.
+    """
+    if not entries:
+        return
+    scored_at = int(time.time()) if scored_at is None else scored_at
+    code = encode_reason(reason)
+
+    put_items("credit_scores", {user_id: score for user_id, (score, _) in entries.items()})
+    add_score_history([
+        (user_id, scored_at, score, code, pack_features(features))
+        for user_id, (score, features) in entries.items()
+    ])
+
+
+def invalidate_score_heads(user_ids=None):
+    """Drop cached heads (all of them when user_ids is None). Call AFTER commit."""
+    if user_ids is None:
+        _head_cache.clear()
+        return
+    for user_id in user_ids:
+        _head_cache.delete(user_id)
+
+
+# =========================
+# READS
+# =========================
+
+def get_latest_score(user_id: str) -> Optional[int]:
+    """Current score (credit_scores head), cached; None if not initialized"""
+    score = _head_cache.get(user_id)
+    if score is not None:
+        return score
+
+    generation = _head_cache.generation
+    score = get_item("credit_scores", user_id)
+    if score is not None:
+        _head_cache.set(user_id, score, generation=generation)
+    return score
+
+
+def _point(row: dict) -> dict:
+    return {
+        "scored_at": row["scored_at"],
+        "score": row["score"],
+        "reason": decode_reason(row["reason"]),
+        "features": unpack_features(row["features"]),
+    }
+
+
+def get_history(user_id: str, start: int = None, end: int = None, limit: int = 500):
+    """Raw points in [start, end), newest first"""
+    return [_point(row) for row in get_score_history(user_id, start, end, limit)]
+
+
+def get_score_series(user_id: str, start: int, end: int, resolution: str = "day"):
+    """Downsampled points for charts: min / max / avg / last score per bucket"""
+    if resolution not in SERIES_BUCKETS:
+        raise ValueError(f"Unknown resolution: {resolution}")
+    return get_score_buckets(user_id, start, end, SERIES_BUCKETS[resolution])
+
+
+# =========================
+# RETENTION JOB
+# =========================
+
+def compact_history():
+    """
+    Periodic job: keep the last point per user per day for points older than
+    CREDIT_HISTORY_RAW_DAYS, and drop points past CREDIT_HISTORY_MAX_DAYS.
+    """
+    now = int(time.time())
+    cutoff = (now - CREDIT_HISTORY_RAW_DAYS * DAY_SECONDS) // DAY_SECONDS * DAY_SECONDS
+    window_start = cutoff - CREDIT_HISTORY_COMPACT_LOOKBACK_DAYS * DAY_SECONDS
+
+    with transaction():
+        compacted = compact_score_history(window_start, cutoff, DAY_SECONDS)
+        purged = purge_score_history(now - CREDIT_HISTORY_MAX_DAYS * DAY_SECONDS) if CREDIT_HISTORY_MAX_DAYS > 0 else 0
+
+    with _stats_lock:
+        _stats["compactions"] += 1
+        _stats["points_compacted"] += compacted
+        _stats["points_purged"] += purged
+        _stats["last_compaction_at"] = now
+
+    if compacted or purged:
+        print(f"[CREDIT] history compaction removed {compacted} points, purged {purged}")
+    return {"compacted": compacted, "purged": purged}
+
+
+def get_score_history_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["head_cache"] = _head_cache.stats()
+    return stats
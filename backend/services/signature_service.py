@@ -10,7 +10,8 @@ from models.video_verification_model import verify_video_identity
 from models.face_verification_model import verify_face_identity
 
 
-from db.database import get_item, put_item
+from db.database import get_item, put_item, transaction
+from services.marketplace_cache import notify_loan_status_change
 
 
 # =========================
@@ -117,52 +118,55 @@ def process_signed_agreement(payload: SignedAgreementUploadSchema):
 
     loan["agreement_pdf_signed"] = payload.signed_pdf_ref
     loan["status"] = "LISTED"
-    
-    put_item("loans", loan_id, loan)
 
-    # Hash execution proof (NO raw data)
-    execution_hash = sha256_hash(
-        {
-            "loan_id": loan_id,
-            "signed_pdf_ref": payload.signed_pdf_ref,
-            "video_verification": video_result["final_status"],
-            "image_verification": image_result["final_status"],
-            "execution": "APPROVED",
-        }
-    )
-
-    # Blockchain: agreement execution
-    record_loan_agreement(
-        {
+    # Listing + chain proofs (outbox) commit together
+    with transaction():
+        put_item("loans", loan_id, loan)
+
+        # Hash execution proof (NO raw data)
+        execution_hash = sha256_hash(
+            {
+                "loan_id": loan_id,
+                "signed_pdf_ref": payload.signed_pdf_ref,
+                "video_verification": video_result["final_status"],
+                "image_verification": image_result["final_status"],
+                "execution": "APPROVED",
+            }
+        )
+
+        # Blockchain: agreement execution (stored so audit can re-hash it)
+        execution = {
             "loan_id": loan_id,
             "execution_hash": execution_hash,
             "timestamp": payload.uploaded_at.isoformat(),
-        },
-        loan_id,
-    )
-
-    # Blockchain: final loan request (legally binding)
-    record_loan_request(
-        {
-            "loan_id": loan_id,
-            "borrower_id": borrower_id,
-            "amount": loan["amount"],
-            "interest_rate": loan["interest_rate"],
-            "tenure_months": loan["tenure_months"],
-            "emi": loan["emi"],
-            "total_payable": loan["total_payable"],
-        },
-        loan_id,
-    )
-
-    # Blockchain: status update
-    record_loan_status(
-        {
-            "status": "LISTED",
-            "timestamp": payload.uploaded_at.isoformat(),
-        },
-        loan_id,
-    )
+        }
+        put_item("agreement_executions", loan_id, execution)
+        record_loan_agreement(execution, loan_id)
+
+        # Blockchain: final loan request (legally binding)
+        record_loan_request(
+            {
+                "loan_id": loan_id,
+                "borrower_id": borrower_id,
+                "amount": loan["amount"],
+                "interest_rate": loan["interest_rate"],
+                "tenure_months": loan["tenure_months"],
+                "emi": loan["emi"],
+                "total_payable": loan["total_payable"],
+            },
+            loan_id,
+        )
+
+        # Blockchain: status update
+        record_loan_status(
+            {
+                "status": "LISTED",
+                "timestamp": payload.uploaded_at.isoformat(),
+            },
+            loan_id,
+        )
+
+    notify_loan_status_change("AWAITING_SIGNATURE", "LISTED")
 
     return {
         "message": "Loan agreement verified (video + image + thumb) and listed",
@@ -4,12 +4,14 @@ from blockchain.transactions import (
     record_fee_allocation,
 )
 from blockchain.loan_status import record_loan_status
+from services.marketplace_cache import notify_loan_status_change
+from utils.due_dates import compute_due_at
+from services.installment_service import materialize_installments
+from services.credit_scoring_service import mark_score_dirty, new_financial_data
+from utils.constants import PLATFORM_FEE_PERCENT
 
-from db.database import get_item, put_item
-
-# ---- STORES REPLACED BY DB ----
-
-PLATFORM_FEE_PERCENT = 3.0
+from db.database import get_item, put_item, transaction
+import datetime
 
 
 def process_fund_transfer(payload: TransactionReceiptSchema, lender_id: str):
@@ -17,6 +19,23 @@ def process_fund_transfer(payload: TransactionReceiptSchema, lender_id: str):
     Process fund transfer receipt. Enables LISTED -> ACTIVE transition (Auto-Accept).
     """
 
+    # Checks and writes share one BEGIN IMMEDIATE unit of work, so two
+    # concurrent fundings of the same loan are serialized: the second one
+    # sees the first one's receipt and is rejected
+    with transaction():
+        result = _apply_fund_transfer(payload, lender_id)
+
+    if result is None:
+        # The failed-transfer counter is committed above
+        raise Exception("Transaction failed")
+
+    notify_loan_status_change(result.pop("previous_status"), "ACTIVE")
+    return result
+
+
+def _apply_fund_transfer(payload: TransactionReceiptSchema, lender_id: str):
+    """Read-check-write of a fund transfer; call inside transaction(). None = failed transfer"""
+
     loan_id = payload.loan_id
 
     # 1️⃣ Loan must exist
@@ -38,19 +57,11 @@ def process_fund_transfer(payload: TransactionReceiptSchema, lender_id: str):
         if loan.get("lender_id"):
              raise Exception("Loan already assigned to a lender")
              
-        # Transition to ACTIVE
+        # Transition to ACTIVE (saved below, together with the receipt)
         loan["status"] = "ACTIVE"
         loan["lender_id"] = lender_id
-        # Use payload timestamp for consistency
-        import datetime
-        # If payload.timestamp is int (unix), convert? Schema says int.
-        # But usually we store ISO strings in DB for readability? 
-        # Existing code used payload.timestamp directly in record_loan_status.
-        # Let's verify schema. Schema says int. 
-        # Let's save it as handled below.
-        
-        # Save updated loan status immediately
-        put_item("loans", loan_id, loan)
+        loan["start_timestamp"] = datetime.datetime.fromtimestamp(payload.timestamp).isoformat()
+        loan["due_at"] = compute_due_at(payload.timestamp, loan.get("tenure_months"))
         
     elif current_status != "ACTIVE":
         raise Exception(f"Loan status is {current_status}, cannot fund.")
@@ -63,31 +74,22 @@ def process_fund_transfer(payload: TransactionReceiptSchema, lender_id: str):
     # 4️⃣ Initialize financial data if missing
     stats = get_item("financial_data", borrower_id)
     if not stats:
-        stats = {
-            "monthly_income": 0,
-            "monthly_expense": 0,
-            "total_transactions": 0,
-            "failed_transactions": 0,
-            "avg_transaction_amount": 0.0,
-            "missed_payments": 0,
-            "loan_outstanding": 0.0,
-            "account_age_months": 0,
-        }
+        stats = new_financial_data()
 
     # 5️⃣ Update transaction counters
     stats["total_transactions"] += 1
 
     if not payload.success:
+        # Failed transfer: only the counter is recorded, loan stays untouched
         stats["failed_transactions"] += 1
         put_item("financial_data", borrower_id, stats)
-        raise Exception("Transaction failed")
+        mark_score_dirty(borrower_id, "FUND_TRANSFER_FAILED")
+        return None
 
-    # 6️⃣ Store transaction receipt off-chain
+    # 6️⃣ Transaction receipt (off-chain copy)
     receipt_data = payload.dict()
     # Serialize datetime
-    receipt_data["timestamp"] = receipt_data["timestamp"].isoformat()
-    
-    put_item("transactions", loan_id, receipt_data)
+    receipt_data["timestamp"] = datetime.datetime.fromtimestamp(receipt_data["timestamp"]).isoformat()
 
     # 7️⃣ Update average transaction amount
     prev_total = stats["total_transactions"] - 1
@@ -102,9 +104,14 @@ def process_fund_transfer(payload: TransactionReceiptSchema, lender_id: str):
 
     # 9️⃣ Update outstanding loan amount
     stats["loan_outstanding"] += payload.amount
-    
-    # Save stats
+
+    # Loan status, receipt, stats and chain proofs (outbox) commit as one unit
+    put_item("loans", loan_id, loan)
+    if current_status == "LISTED":
+        materialize_installments(loan_id, loan, payload.timestamp)
+    put_item("transactions", loan_id, receipt_data)
     put_item("financial_data", borrower_id, stats)
+    mark_score_dirty(borrower_id, "FUND_TRANSFER")
 
     # 🔒 Blockchain: transaction receipt
     record_transaction_receipt(
@@ -137,4 +144,5 @@ def process_fund_transfer(payload: TransactionReceiptSchema, lender_id: str):
         "message": "Fund transfer recorded successfully",
         "platform_fee": fee_amount,
         "net_to_borrower": net_to_borrower,
+        "previous_status": current_status,
     }
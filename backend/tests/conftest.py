@@ -0,0 +1,136 @@
+"""
+Shared fixtures. Run from backend/: `python -m pytest -q`
+
+Every test gets its own SQLite file (the tracked artha.db is never touched)
+and empty in-process caches, so cached rows never leak between databases.
+"""
+
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from db import database  # noqa: E402
+from services.marketplace_cache import invalidate_marketplace  # noqa: E402
+from services.score_history_service import invalidate_score_heads  # noqa: E402
+from blockchain import canonical  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Fresh, initialized database module bound to a temp file"""
+    monkeypatch.setattr(database, "DB_FILE", str(tmp_path / "artha.db"))
+    database.init_db()
+    invalidate_marketplace()
+    invalidate_score_heads()
+    canonical._hash_memo.clear()  # keyed by change_seq, which restarts per database
+    yield database
+    database.close_pool()
+
+
+class FakeChain:
+    """
+    In-memory MultiChain node for the RPC calls the backend makes:
+    publish, publishmulti, getrawtransaction, liststreams (items count),
+    liststreamitems and liststreamkeyitems (verbose=false, count, start).
+    """
+
+    def __init__(self):
+        self.streams = {}
+        self.calls = []
+        self.fail_methods = set()
+        self._txs = {}
+
+    def __call__(self, method, params=None, rpc_id=1):
+        params = params or []
+        self.calls.append((method, params))
+        if method in self.fail_methods:
+            raise Exception(f"{method} unavailable")
+        return getattr(self, "_rpc_" + method)(*params)
+
+    def items(self, stream):
+        return self.streams.get(stream, [])
+
+    def confirm(self, confirmations=10, blocktime=1_700_000_000):
+        for items in self.streams.values():
+            for item in items:
+                item["confirmations"] = confirmations
+                item["blocktime"] = item["blocktime"] or blocktime
+
+    def _append(self, stream, keys, data, txid):
+        keys = keys if isinstance(keys, list) else [keys]
+        item = {
+            "publishers": ["fake-address"],
+            "keys": keys,
+            "key": keys[0],
+            "data": data,
+            "txid": txid,
+            "blocktime": None,
+            "confirmations": 0,
+        }
+        self.streams.setdefault(stream, []).append(item)
+        return item
+
+    def _new_txid(self):
+        return f"tx{len(self._txs) + 1:06d}"
+
+    def _rpc_publish(self, stream, keys, data):
+        txid = self._new_txid()
+        self._txs[txid] = [(stream, keys, data)]
+        self._append(stream, keys, data, txid)
+        return txid
+
+    def _rpc_publishmulti(self, default_stream, items):
+        txid = self._new_txid()
+        self._txs[txid] = []
+        for item in items:
+            stream = item.get("for", default_stream)
+            keys = item.get("keys", item.get("key"))
+            self._txs[txid].append((stream, keys, item["data"]))
+            self._append(stream, keys, item["data"], txid)
+        return txid
+
+    def _rpc_getrawtransaction(self, txid, verbose=0):
+        outputs = [{"n": n, "items": [{
+            "type": "stream",
+            "name": stream,
+            "keys": keys if isinstance(keys, list) else [keys],
+            "data": data,
+        }]} for n, (stream, keys, data) in enumerate(self._txs[txid])]
+        return {"txid": txid, "vout": outputs}
+
+    @staticmethod
+    def _page(items, count=10, start=None):
+        if start is None or start < 0:
+            start = max(len(items) - count, 0) if start is None else max(len(items) + start, 0)
+        return [dict(item) for item in items[start:start + count]]
+
+    def _rpc_liststreams(self, stream):
+        if stream not in self.streams:
+            raise Exception(f"Stream {stream} not found")
+        return [{"name": stream, "items": len(self.streams[stream])}]
+
+    def _rpc_liststreamitems(self, stream, verbose=False, count=10, start=None):
+        if stream not in self.streams:
+            raise Exception(f"Stream {stream} not found")
+        return self._page(self.streams[stream], count, start)
+
+    def _rpc_liststreamkeyitems(self, stream, key, verbose=False, count=10, start=None):
+        matching = [item for item in self.streams.get(stream, []) if key in item["keys"]]
+        return self._page(matching, count, start)
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    """Route every RPC call to a fresh FakeChain"""
+    import multichain_rpc
+    from blockchain import mirror
+
+    fake = FakeChain()
+    monkeypatch.setattr(multichain_rpc, "call_rpc", fake)
+    monkeypatch.setattr(mirror, "call_rpc", fake)
+    return fake
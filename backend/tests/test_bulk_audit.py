@@ -0,0 +1,71 @@
+from blockchain.utils import sha256_hash
+from services import audit_service
+
+
+def _seed(db, chain, count=6):
+    for i in range(count):
+        loan_id = f"LN-{i}"
+        loan = {"loan_id": loan_id, "amount": 1000 + i, "status": "ACTIVE"}
+        db.put_item("loans", loan_id, loan)
+        chain("publish", ["loan_requests", [loan_id], sha256_hash(loan)])
+
+        repayment = {"loan_id": loan_id, "repayment_id": f"RP-{i}", "amount": 10.0}
+        db.add_repayment(f"RP-{i}", loan_id, repayment)
+        chain("publish", ["repayments", [loan_id], sha256_hash(repayment)])
+
+    db.put_item("kyc", "u1", {"final_result": {"status": "APPROVED"}})
+    chain("publish", ["kyc_results", ["u1"], sha256_hash({"status": "APPROVED"})])
+
+
+def _run(**kwargs):
+    results = list(audit_service.run_bulk_audit(**kwargs))
+    return results[:-1], results[-1]["summary"]
+
+
+def test_clean_records_all_match(db, chain, monkeypatch):
+    monkeypatch.setattr(audit_service, "AUDIT_MAX_WORKERS", 2)
+    _seed(db, chain)
+
+    results, summary = _run(
+        loan_ids=[f"LN-{i}" for i in range(6)],
+        user_ids=["u1"],
+        checks=["loan_request", "repayments", "kyc"],
+    )
+
+    assert len(results) == 13
+    assert summary["matched"] == 13
+    assert summary["mismatched"] == summary["missing"] == summary["errors"] == 0
+
+
+def test_tampered_and_missing_records_are_reported(db, chain):
+    _seed(db, chain)
+    loan = db.get_item("loans", "LN-2")
+    loan["amount"] = 999_999
+    db.put_item("loans", "LN-2", loan)
+
+    results, summary = _run(loan_ids=["LN-1", "LN-2", "LN-404"], user_ids=[], checks=["loan_request"])
+
+    by_id = {result["id"]: result for result in results}
+    assert by_id["LN-1"]["match"]
+    assert not by_id["LN-2"]["match"]
+    assert by_id["LN-404"]["error"] == "not found"
+    assert (summary["matched"], summary["mismatched"], summary["missing"]) == (1, 1, 1)
+
+
+def test_chain_errors_are_reported_per_entity(db, chain):
+    _seed(db, chain, count=2)
+    chain.fail_methods.add("liststreamkeyitems")
+
+    results, summary = _run(loan_ids=["LN-0", "LN-1"], user_ids=[], checks=["loan_request"])
+
+    assert summary["errors"] == 2
+    assert all("unavailable" in result["error"] for result in results)
+
+
+def test_all_entities_reads_every_key(db, chain):
+    _seed(db, chain, count=3)
+
+    _, summary = _run(loan_ids=[], user_ids=[], checks=["loan_request", "kyc"], all_entities=True)
+
+    assert summary["checked"] == 4
+    assert summary["matched"] == 4
@@ -0,0 +1,46 @@
+import pytest
+
+
+def test_get_items_spans_chunks(db):
+    count = db.IN_CLAUSE_CHUNK * 2 + 7
+    db.put_items("users", {f"U{i:05d}": {"n": i} for i in range(count)})
+
+    keys = [f"U{i:05d}" for i in range(count)] + ["missing", "U00001"]
+    items = db.get_items("users", keys)
+
+    assert len(items) == count
+    assert items["U01000"] == {"n": 1000}
+    assert "missing" not in items
+
+
+def test_credit_scores_bulk(db):
+    db.put_items("credit_scores", {"u1": 700, "u2": 610})
+
+    assert db.get_items("credit_scores", ["u1", "u2", "u3"]) == {"u1": 700, "u2": 610}
+    assert db.get_item("credit_scores", "u1") == 700
+
+
+def test_put_items_is_atomic_with_transaction(db):
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.put_items("users", {"a": {}, "b": {}})
+            raise RuntimeError("boom")
+
+    assert db.get_items("users", ["a", "b"]) == {}
+
+
+def test_put_items_bumps_change_seq(db):
+    db.put_items("loans", {"LN-1": {"status": "LISTED"}, "LN-2": {"status": "LISTED"}})
+    first = db.get_versioned_items("loans", ["LN-1", "LN-2"])
+
+    db.put_items("loans", {"LN-1": {"status": "ACTIVE"}})
+    second = db.get_versioned_items("loans", ["LN-1", "LN-2"])
+
+    assert first["LN-1"][0] != first["LN-2"][0]
+    assert second["LN-1"][0] > max(seq for seq, _ in first.values())
+    assert second["LN-2"] == first["LN-2"]
+
+
+def test_put_items_rejects_unknown_table(db):
+    with pytest.raises(ValueError):
+        db.put_items("nope", {"a": {}})
@@ -0,0 +1,95 @@
+import datetime
+import hashlib
+import json
+import math
+import random
+from decimal import Decimal
+
+import pytest
+
+from blockchain import canonical
+from blockchain.utils import sha256_hash
+
+
+def legacy_sha256_hash(payload) -> str:
+    """sha256_hash before the canonical module (what anchored hashes were made with)"""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def _random_float(rng):
+    kind = rng.random()
+    if kind < 0.05:
+        return rng.choice([math.nan, math.inf, -math.inf, 0.0, -0.0, 5e-324, 1.7976931348623157e308])
+    if kind < 0.5:
+        return round(rng.uniform(-1e6, 1e6), rng.randint(0, 6))
+    return rng.uniform(-1, 1) * 10 ** rng.randint(-30, 30)
+
+
+def _random_string(rng):
+    alphabet = "abcXYZ019 -_/\\\"'\x00\x01\x1f\x7f\n\téक–€\U0001F600e"
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+
+
+def _random_value(rng, depth=0):
+    kind = rng.randint(0, 8 if depth < 3 else 5)
+    if kind == 0:
+        return _random_float(rng)
+    if kind == 1:
+        return rng.choice([rng.randint(-1000, 1000), rng.randint(-2**70, 2**70), 2**63, -2**63 - 1])
+    if kind == 2:
+        return _random_string(rng)
+    if kind == 3:
+        return rng.choice([True, False, None])
+    if kind == 4:
+        return rng.randint(0, 10**9)
+    if kind == 5:
+        return round(rng.uniform(0, 100_000), 2)
+    if kind == 6:
+        return [_random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    if kind == 7:
+        return tuple(_random_value(rng, depth + 1) for _ in range(rng.randint(0, 3)))
+    return {_random_string(rng): _random_value(rng, depth + 1) for _ in range(rng.randint(0, 5))}
+
+
+def test_matches_legacy_encoding_on_random_payloads():
+    rng = random.Random(18)
+    for _ in range(20_000):
+        payload = {_random_string(rng): _random_value(rng) for _ in range(rng.randint(1, 6))}
+        assert canonical.canonical_hash(payload) == legacy_sha256_hash(payload), payload
+
+
+@pytest.mark.parametrize("payload", [
+    {"a": 1e16, "b": 1e-5, "c": 1.5e-7, "d": 0.0001, "e": 1e15},
+    {"nan": math.nan, "inf": math.inf, "none": None},
+    {"text": "Education – fees \U0001F600 \x7f"},
+    {1: "int key", 2: "b"},
+    {"big": 2**64, "neg": -2**63},
+    {"nested": {"z": [1, (2, 3)], "a": {"b": True}}},
+    {"e1": "e-1", "note": "1e5 in a string"},
+    [],
+    "plain",
+])
+def test_known_divergent_values_match_legacy(payload):
+    assert sha256_hash(payload) == legacy_sha256_hash(payload)
+
+
+def test_extended_types_encode_as_strings():
+    stamp = datetime.datetime(2024, 1, 2, 3, 4, 5)
+    payload = {"at": stamp, "day": stamp.date(), "amount": Decimal("10.50")}
+
+    assert canonical.canonical_bytes(payload) == b'{"amount":"10.50","at":"2024-01-02T03:04:05","day":"2024-01-02"}'
+
+
+def test_unsupported_types_still_raise():
+    with pytest.raises(TypeError):
+        canonical.canonical_hash({"x": object()})
+
+
+def test_hash_many_and_memo_agree_with_single_hash():
+    payloads = [{"id": i, "amount": i * 1.5, "name": f"né{i}"} for i in range(50)]
+
+    assert canonical.hash_many(payloads) == [canonical.canonical_hash(p) for p in payloads]
+    assert canonical.hash_row("loans", "LN-1", 7, payloads[0]) == canonical.canonical_hash(payloads[0])
+    # Same version -> memo hit, even if the payload passed differs
+    assert canonical.hash_row("loans", "LN-1", 7, payloads[1]) == canonical.canonical_hash(payloads[0])
+    assert canonical.hash_row("loans", "LN-1", None, payloads[1]) == canonical.canonical_hash(payloads[1])
@@ -0,0 +1,230 @@
+import threading
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from auth.auth_dependency import get_current_user
+from models.create_score_model import CreditScoreInput, calculate_credit_score
+from schemas.transaction_schemas import TransactionReceiptSchema
+from services import credit_scoring_service, transaction_service
+from routers.credit_routes import router
+from services.score_history_service import get_history, get_latest_score
+from utils.scheduler import PeriodicJob
+
+FUNDED_AT = 1_700_000_000
+
+
+def _fund_loan(db, borrower="borrower", amount=10000):
+    db.put_item("loans", "LN-1", {
+        "loan_id": "LN-1",
+        "user_id": borrower,
+        "amount": amount,
+        "interest_rate": 12,
+        "tenure_months": 6,
+        "status": "LISTED",
+        "created_at": FUNDED_AT,
+    })
+    db.put_item("kyc", "lender", {"status": "APPROVED"})
+    transaction_service.process_fund_transfer(
+        TransactionReceiptSchema(
+            loan_id="LN-1",
+            transaction_id="TX-1",
+            amount=amount,
+            sender_account="A",
+            receiver_account="B",
+            timestamp=FUNDED_AT,
+            success=True,
+        ),
+        "lender",
+    )
+
+
+def _expected_score(db, user_id):
+    return calculate_credit_score(CreditScoreInput(**db.get_item("financial_data", user_id)))["credit_score"]
+
+
+def test_declared_income_scores_a_funded_borrower(db):
+    credit_scoring_service.update_financial_profile("borrower", 40000, 15000)
+    _fund_loan(db)
+
+    assert credit_scoring_service.recompute_dirty_scores() == 1
+
+    expected = _expected_score(db, "borrower")
+    assert get_latest_score("borrower") == expected
+    assert get_history("borrower")[0]["reason"] == "FUND_TRANSFER"
+    assert db.count_dirty_credit_users() == 0
+
+    summary = credit_scoring_service.rescore_all_users()
+    assert summary["scored"] == 1
+    assert summary["no_income"] == 0
+    assert get_latest_score("borrower") == expected
+    assert get_history("borrower")[0]["reason"] == "NIGHTLY"
+
+
+def test_profile_update_keeps_transaction_counters(db):
+    _fund_loan(db)
+    credit_scoring_service.update_financial_profile("borrower", 50000, 10000)
+
+    stats = db.get_item("financial_data", "borrower")
+    assert stats["total_transactions"] == 1
+    assert stats["loan_outstanding"] == 10000
+    assert stats["monthly_income"] == 50000
+
+
+def test_profile_route_validates_and_queues_a_rescore(db):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_current_user] = lambda: "borrower"
+    client = TestClient(app)
+
+    assert client.put("/credit/financial-profile", json={"monthly_income": 0, "monthly_expense": 0}).status_code == 422
+    response = client.put("/credit/financial-profile", json={"monthly_income": 30000, "monthly_expense": 5000})
+
+    assert response.status_code == 200
+    assert db.count_dirty_credit_users() == 1
+    credit_scoring_service.recompute_dirty_scores()
+    assert get_latest_score("borrower") == _expected_score(db, "borrower")
+
+
+def test_users_without_income_are_reported(db):
+    _fund_loan(db)
+
+    summary = credit_scoring_service.rescore_all_users()
+
+    assert summary["scored"] == 0
+    assert summary["no_income"] == 1
+    assert credit_scoring_service.get_credit_scoring_stats()["last_run_no_income"] == 1
+    assert get_latest_score("borrower") is None
+
+
+def test_job_can_run_at_start():
+    ran = threading.Event()
+    job = PeriodicJob("probe", 3600, ran.set, run_at_start=True)
+
+    job.start()
+    try:
+        assert ran.wait(2)
+    finally:
+        job.stop()
+
+
+def test_job_waits_an_interval_by_default():
+    ran = threading.Event()
+    job = PeriodicJob("probe", 3600, ran.set)
+
+    job.start()
+    try:
+        assert not ran.wait(0.2)
+    finally:
+        job.stop()
+
+
+def _seed_financial_data(db, user_id, income):
+    stats = credit_scoring_service.new_financial_data()
+    stats["monthly_income"] = income
+    db.put_item("financial_data", user_id, stats)
+
+
+def test_unscorable_marks_leave_the_queue(db, monkeypatch):
+    monkeypatch.setattr(credit_scoring_service, "CREDIT_DIRTY_BATCH_SIZE", 2)
+    monkeypatch.setattr(credit_scoring_service, "CREDIT_DIRTY_MAX_BATCHES_PER_RUN", 1)
+    for i, user_id in enumerate(["no-income-1", "no-income-2", "scored"]):
+        _seed_financial_data(db, user_id, 0 if user_id.startswith("no-income") else 25000)
+        with db.transaction():
+            db.mark_credit_dirty([user_id], "REPAYMENT", FUNDED_AT + i)
+
+    # One batch per run: the unscorable users are dropped, not re-read every run
+    assert credit_scoring_service.recompute_dirty_scores() == 0
+    assert credit_scoring_service.get_credit_scoring_stats()["incremental_last_run_skipped"] == 2
+    assert credit_scoring_service.recompute_dirty_scores() == 1
+    assert get_latest_score("scored") == _expected_score(db, "scored")
+    assert db.count_dirty_credit_users() == 0
+
+    # Declaring an income re-marks the user and the next run scores them
+    credit_scoring_service.update_financial_profile("no-income-2", 30000, 0)
+    assert credit_scoring_service.recompute_dirty_scores() == 1
+    assert get_latest_score("no-income-2") == _expected_score(db, "no-income-2")
+
+
+def test_failed_rescore_keeps_marks(db, monkeypatch):
+    _seed_financial_data(db, "borrower", 25000)
+    credit_scoring_service.mark_score_dirty("borrower", "REPAYMENT")
+
+    def boom(*args, **kwargs):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(credit_scoring_service, "record_scores", boom)
+    try:
+        credit_scoring_service.recompute_dirty_scores()
+    except RuntimeError:
+        pass
+
+    assert db.count_dirty_credit_users() == 1
+
+
+def test_mark_during_scoring_stays_queued(db, monkeypatch):
+    _seed_financial_data(db, "borrower", 25000)
+    credit_scoring_service.mark_score_dirty("borrower", "REPAYMENT")
+    score_users = credit_scoring_service._score_users
+
+    def remark_then_score(user_ids=None):
+        credit_scoring_service.mark_score_dirty("borrower", "DEFAULT")
+        return score_users(user_ids)
+
+    monkeypatch.setattr(credit_scoring_service, "_score_users", remark_then_score)
+
+    assert credit_scoring_service.recompute_dirty_scores() == 1
+    assert [row["reason"] for row in db.get_dirty_credit_users(10)] == ["DEFAULT"]
+
+
+def _repay(amount, repayment_type="PARTIAL"):
+    from schemas.repayment_schemas import RepaymentSchema
+    from services import repayment_service
+
+    return repayment_service.process_repayment(RepaymentSchema(
+        loan_id="LN-1",
+        repayment_id="client-side-id",
+        amount=amount,
+        repayment_type=repayment_type,
+        paid_by="borrower",
+        timestamp=FUNDED_AT + 60,
+    ))
+
+
+def test_repayments_move_the_model_and_the_reported_score_sticks(db):
+    credit_scoring_service.update_financial_profile("borrower", 40000, 15000)
+    _fund_loan(db)
+    credit_scoring_service.recompute_dirty_scores()
+    funded_score = get_latest_score("borrower")
+
+    _repay(4000)
+    assert db.get_item("financial_data", "borrower")["loan_outstanding"] == 6000
+    credit_scoring_service.recompute_dirty_scores()
+    partial_score = get_latest_score("borrower")
+    assert partial_score > funded_score
+
+    result = _repay(7000, "FULL")
+    assert db.get_item("financial_data", "borrower")["loan_outstanding"] == 0
+    assert result["new_credit_score"] == _expected_score(db, "borrower") > partial_score
+
+    # The dirty worker recomputes the same inputs: the reported score survives
+    credit_scoring_service.recompute_dirty_scores()
+    assert get_latest_score("borrower") == result["new_credit_score"]
+    assert get_history("borrower")[0]["score"] == result["new_credit_score"]
+
+
+def test_default_counts_a_missed_payment_and_lowers_the_score(db):
+    from services import default_service
+
+    credit_scoring_service.update_financial_profile("borrower", 40000, 15000)
+    _fund_loan(db)
+    credit_scoring_service.recompute_dirty_scores()
+    before = get_latest_score("borrower")
+
+    # The loan's due_at (funding + tenure) is long past
+    assert default_service.check_and_mark_defaults()["defaulted_loans"] == ["LN-1"]
+    assert db.get_item("financial_data", "borrower")["missed_payments"] == 1
+
+    credit_scoring_service.recompute_dirty_scores()
+    assert get_latest_score("borrower") == _expected_score(db, "borrower") < before
+    assert get_history("borrower")[0]["reason"] == "DEFAULT"
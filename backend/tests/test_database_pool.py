@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+from db import database
+from db.database import ConnectionPool
+
+
+def test_connections_are_reused(db):
+    for i in range(20):
+        db.put_item("users", f"98000000{i:02d}", {"phone": i})
+
+    stats = db.get_pool_stats()
+    assert stats["checkouts_total"] >= 20
+    assert stats["open_connections"] <= db.POOL_SIZE
+    assert stats["in_use"] == 0
+    assert db.get_item("users", "9800000007") == {"phone": 7}
+
+
+def test_connections_use_wal(db):
+    with db._cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode")
+        assert cursor.fetchone()[0] == "wal"
+
+
+def test_exhausted_pool_times_out(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), size=1, timeout=0.05)
+    conn = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+    assert pool.stats()["timeouts"] == 1
+
+    pool.release(conn)
+    assert pool.acquire() is conn
+    pool.close()
+
+
+def test_release_rolls_back_open_transaction(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), size=1, timeout=1)
+    conn = pool.acquire()
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.commit()
+    conn.execute("INSERT INTO t VALUES (1)")
+    pool.release(conn)
+
+    conn = pool.acquire()
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    pool.release(conn)
+    pool.close()
+
+
+def test_concurrent_writers_share_the_pool(db):
+    errors = []
+
+    def writer(n):
+        try:
+            for i in range(25):
+                db.put_item("otps", f"{n}-{i}", {"n": n, "i": i})
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(db.POOL_SIZE * 2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    with db._cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM otps")
+        assert cursor.fetchone()[0] == db.POOL_SIZE * 2 * 25
+    assert db.get_pool_stats()["open_connections"] <= db.POOL_SIZE
+
+
+def test_pool_follows_db_file(db, tmp_path, monkeypatch):
+    first = db.get_pool()
+    monkeypatch.setattr(database, "DB_FILE", str(tmp_path / "other.db"))
+    assert db.get_pool() is not first
+    assert db.get_pool().db_file.endswith("other.db")
@@ -0,0 +1,74 @@
+import threading
+
+from schemas.repayment_schemas import RepaymentSchema
+from services import default_service, repayment_service
+
+PAST = 1_600_000_000
+
+
+def _active(db, loan_id, due_at=PAST, amount=1000):
+    db.put_item("loans", loan_id, {
+        "loan_id": loan_id,
+        "user_id": f"borrower-{loan_id}",
+        "lender_id": "lender",
+        "amount": amount,
+        "total_payable": amount,
+        "status": "ACTIVE",
+        "due_at": due_at,
+    })
+
+
+def test_overdue_unpaid_loans_default_in_chunks(db, monkeypatch):
+    monkeypatch.setattr(default_service, "DEFAULT_CHUNK_SIZE", 2)
+    for i in range(5):
+        _active(db, f"LN-{i}", due_at=PAST + i)
+    _active(db, "LN-paid")
+    db.add_repayment("RP-1", "LN-paid", {"amount": 1000})
+    _active(db, "LN-future", due_at=4_000_000_000)
+
+    result = default_service.check_and_mark_defaults()
+
+    assert sorted(result["defaulted_loans"]) == [f"LN-{i}" for i in range(5)]
+    assert db.get_item("loans", "LN-paid")["status"] == "ACTIVE"
+    assert db.get_item("loans", "LN-future")["status"] == "ACTIVE"
+    assert db.count_dirty_credit_users() == 5
+    assert default_service.check_and_mark_defaults()["defaulted_loans"] == []
+
+
+def test_concurrent_repayment_is_never_overwritten(db, monkeypatch):
+    _active(db, "LN-1")
+    get_repayment_totals = default_service.get_repayment_totals
+    repayment = {}
+
+    def repay():
+        try:
+            repayment["result"] = repayment_service.process_repayment(RepaymentSchema(
+                loan_id="LN-1",
+                repayment_id="R-1",
+                amount=1000,
+                repayment_type="FULL",
+                paid_by="borrower-LN-1",
+                timestamp=PAST,
+            ))
+        except Exception as e:
+            repayment["error"] = str(e)
+
+    def totals_then_race(*args, **kwargs):
+        totals = get_repayment_totals(*args, **kwargs)
+        if not repayment:
+            # The borrower repays while the detector holds the loan in memory
+            thread = threading.Thread(target=repay)
+            thread.start()
+            thread.join(0.5)
+            totals_then_race.thread = thread
+        return totals
+
+    monkeypatch.setattr(default_service, "get_repayment_totals", totals_then_race)
+    default_service.check_and_mark_defaults()
+    totals_then_race.thread.join()
+
+    status = db.get_item("loans", "LN-1")["status"]
+    repaid = db.get_repayment_totals(["LN-1"])["LN-1"]["total_repaid"]
+    # Either the default won and the repayment was rejected, or the reverse
+    assert (status, repaid) in {("DEFAULTED", 0), ("REPAID", 1000)}
+    assert ("error" in repayment) == (status == "DEFAULTED")
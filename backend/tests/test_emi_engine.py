@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from utils.emi_calculator import calculate_emi, generate_emi_schedule
+from utils.emi_engine import calculate_emis, generate_schedules, verify_against_scalar
+from utils.rounding import round2
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_engine_matches_scalar_code(seed):
+    result = verify_against_scalar(sample_size=1500, seed=seed)
+
+    assert result["emi_mismatches"] == 0
+    assert result["schedule_mismatches"] == 0
+
+
+def test_round2_follows_python_round():
+    values = np.array([0.125, 0.135, 2.675, 1.005, 1234.565, -0.125, 10.0])
+
+    assert round2(values).tolist() == [round(float(v), 2) for v in values]
+
+
+def test_zero_interest_splits_principal_evenly():
+    emis = calculate_emis([12000, 1000], 0, [12, 3])
+
+    assert emis["emi"].tolist() == [1000.0, 333.33]
+    assert emis["total_payable"].tolist() == [12000.0, 999.99]
+
+
+def test_schedules_are_masked_past_tenure():
+    schedules = generate_schedules([50000, 20000], [12, 18], [6, 3])
+
+    assert schedules["mask"].shape == (2, 6)
+    assert schedules["mask"][1].tolist() == [True] * 3 + [False] * 3
+    assert not schedules["principal_paid"][1, 3:].any()
+
+    scalar = generate_emi_schedule(20000, 18, 3)
+    assert schedules["interest_paid"][1, :3].tolist() == [row["interest_paid"] for row in scalar]
+    assert schedules["remaining_balance"][1, 2] == scalar[-1]["remaining_balance"]
+
+
+def test_scalar_inputs_broadcast():
+    emis = calculate_emis(100000, [10, 12], 24)
+
+    assert emis["emi"][1] == calculate_emi(100000, 12, 24)["emi"]
+
+
+@pytest.mark.parametrize("principal, tenure", [(0, 12), (1000, 0), (-5, 3)])
+def test_invalid_loans_are_rejected(principal, tenure):
+    with pytest.raises(ValueError):
+        calculate_emis([1000, principal], 10, [12, tenure])
@@ -0,0 +1,90 @@
+from services import installment_service
+from utils.due_dates import LOAN_MONTH_SECONDS, compute_due_at, to_epoch
+from utils.emi_calculator import generate_installments
+
+START = 1_700_000_000
+
+
+def _activate(db, loan_id="LN-1", user_id="borrower", lender_id="lender", start=START):
+    loan = {"user_id": user_id, "lender_id": lender_id, "amount": 12000, "interest_rate": 12, "tenure_months": 4}
+    with db.transaction():
+        return installment_service.materialize_installments(loan_id, {**loan, "loan_id": loan_id}, start)
+
+
+def test_schedule_due_dates_end_at_loan_deadline():
+    schedule = generate_installments(12000, 12, 4, START)
+
+    assert [row["installment_no"] for row in schedule] == [1, 2, 3, 4]
+    assert schedule[0]["due_at"] == START + LOAN_MONTH_SECONDS
+    assert schedule[-1]["due_at"] == compute_due_at(START, 4)
+    assert abs(sum(row["principal"] for row in schedule) - 12000) < 0.05
+
+
+def test_to_epoch_accepts_stored_formats():
+    assert to_epoch(START) == START
+    assert to_epoch(str(START)) == START
+    assert to_epoch("2024-01-01T00:00:00Z") == 1_704_067_200
+    assert to_epoch(None) is None
+
+
+def test_payments_settle_oldest_installments_first(db):
+    schedule = _activate(db)
+    emi = schedule[0]["emi"]
+
+    with db.transaction():
+        overpaid = db.apply_repayment_to_installments("LN-1", emi + 100, START + 10)
+
+    rows = db.get_installments("LN-1")
+    assert overpaid == 0
+    assert [row["status"] for row in rows] == ["PAID", "PARTIAL", "DUE", "DUE"]
+    assert rows[0]["paid_at"] == START + 10
+    assert rows[1]["paid_amount"] == 100
+
+    with db.transaction():
+        overpaid = db.apply_repayment_to_installments("LN-1", emi * 10, START + 20)
+    assert overpaid > 0
+    assert {row["status"] for row in db.get_installments("LN-1")} == {"PAID"}
+
+
+def test_overdue_and_next_due_queries(db):
+    _activate(db, "LN-1", user_id="u1", lender_id="l1")
+    _activate(db, "LN-2", user_id="u2", lender_id="l1", start=START + LOAN_MONTH_SECONDS)
+    as_of = START + 2 * LOAN_MONTH_SECONDS + 1
+
+    overdue = db.find_overdue_installments(as_of)
+    assert [(row["loan_id"], row["installment_no"]) for row in overdue] == [("LN-1", 1), ("LN-1", 2), ("LN-2", 1)]
+    page = db.find_overdue_installments(as_of, limit=2)
+    rest = db.find_overdue_installments(as_of, after=(page[-1]["due_at"], page[-1]["loan_id"], page[-1]["installment_no"]))
+    assert page + rest == overdue
+
+    lender = db.get_overdue_summary("lender_id", "l1", as_of)
+    assert lender["overdue_installments"] == 3
+    assert lender["overdue_amount"] == round(sum(row["emi"] for row in overdue), 2)
+
+    next_due = db.get_next_due_installments(["u1", "u2", "nobody"])
+    assert next_due["u1"]["installment_no"] == 1
+    assert next_due["u2"]["due_at"] == START + 2 * LOAN_MONTH_SECONDS
+    assert "nobody" not in next_due
+
+
+def test_materializing_twice_is_idempotent(db):
+    _activate(db)
+    _activate(db)
+
+    assert len(db.get_installments("LN-1")) == 4
+
+
+def test_init_backfills_active_loans_with_prior_repayments(db):
+    loan = {"user_id": "u1", "lender_id": "l1", "status": "ACTIVE", "amount": 12000,
+            "interest_rate": 12, "tenure_months": 4, "start_timestamp": START}
+    db.put_item("loans", "LN-1", loan)
+    emi = generate_installments(12000, 12, 4, START)[0]["emi"]
+    db.add_repayment("RP-1", "LN-1", {"amount": emi})
+
+    db.init_db()
+    db.init_db()
+
+    rows = db.get_installments("LN-1")
+    assert len(rows) == 4
+    assert [row["status"] for row in rows] == ["PAID", "DUE", "DUE", "DUE"]
+    assert rows[0]["paid_at"] is None
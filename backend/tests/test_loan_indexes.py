@@ -0,0 +1,43 @@
+def _seed(db):
+    db.put_item("loans", "LN-1", {"user_id": "u1", "lender_id": None, "status": "LISTED", "amount": 1000})
+    db.put_item("loans", "LN-2", {"user_id": "u1", "lender_id": "l1", "status": "REPAID", "amount": 2000})
+    db.put_item("loans", "LN-3", {"user_id": "u2", "lender_id": "l1", "status": "ACTIVE", "amount": 3000})
+    db.put_item("loans", "LN-4", {"user_id": "u3", "status": None, "amount": 4000})
+
+
+def _plan(db, sql, params):
+    with db._cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        return " ".join(row["detail"] for row in cursor.fetchall())
+
+
+def test_find_loans_filters(db):
+    _seed(db)
+
+    assert list(db.find_loans(user_id="u1")) == ["LN-1", "LN-2"]
+    assert list(db.find_loans(lender_id="l1", status="ACTIVE")) == ["LN-3"]
+    assert list(db.find_loans(status_in=["LISTED", "ACTIVE"])) == ["LN-1", "LN-3"]
+    assert list(db.find_loans(lender_id="l1", status_not_in=["REPAID"])) == ["LN-3"]
+    # NULL status is not excluded by status_not_in
+    assert "LN-4" in db.find_loans(status_not_in=["REPAID"])
+    assert list(db.find_loans(user_id="u1", limit=1)) == ["LN-1"]
+    assert db.find_loans(user_id="u1")["LN-2"]["amount"] == 2000
+
+
+def test_generated_columns_follow_updates(db):
+    _seed(db)
+    loan = db.get_item("loans", "LN-1")
+    loan["status"] = "ACTIVE"
+    loan["lender_id"] = "l2"
+    db.put_item("loans", "LN-1", loan)
+
+    assert list(db.find_loans(status="LISTED")) == []
+    assert list(db.find_loans(lender_id="l2", status="ACTIVE")) == ["LN-1"]
+
+
+def test_lookups_use_indexes(db):
+    _seed(db)
+
+    assert "idx_loans_user_status" in _plan(db, "SELECT loan_id FROM loans WHERE user_id = ?", ("u1",))
+    assert "idx_loans_lender_status" in _plan(db, "SELECT loan_id FROM loans WHERE lender_id = ?", ("l1",))
+    assert "USING INDEX" in _plan(db, "SELECT loan_id FROM loans WHERE status = ?", ("LISTED",))
@@ -0,0 +1,78 @@
+import pytest
+
+from schemas.loan_marketplace_schemas import MarketplaceQuerySchema
+from services import loan_service
+from services.marketplace_cache import get_marketplace_cache_stats, notify_loan_status_change
+from utils.cache import TTLCache
+
+
+def _list(db, loan_id, **fields):
+    loan = {
+        "user_id": "u1",
+        "status": "LISTED",
+        "amount": 1000,
+        "interest_rate": 12,
+        "tenure_months": 6,
+        "purpose": "Education",
+        "credit_score": 650,
+        "created_at": 1_700_000_000,
+    }
+    loan.update(fields)
+    db.put_item("loans", loan_id, loan)
+
+
+def test_ttl_cache_expiry_lru_and_generation():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)  # evicts b (least recently used)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    generation = cache.generation
+    cache.clear()
+    cache.set("a", "stale", generation=generation)
+    assert cache.get("a") is None
+
+    cache.set("short", 1, ttl_seconds=-1)
+    assert cache.get("short") is None
+
+
+def test_page_is_served_from_cache(db):
+    _list(db, "LN-1")
+    first = loan_service.get_marketplace_page(MarketplaceQuerySchema())
+    _list(db, "LN-2")  # written without notify: cached page is still served
+
+    assert loan_service.get_marketplace_page(MarketplaceQuerySchema()) is first
+    assert get_marketplace_cache_stats()["hits"] >= 1
+
+
+@pytest.mark.parametrize("previous, new", [
+    ("LISTED", "LISTED"),
+    ("AWAITING_SIGNATURE", "LISTED"),
+    ("LISTED", "ACTIVE"),
+    (None, "LISTED"),
+])
+def test_writes_touching_listed_invalidate(db, previous, new):
+    _list(db, "LN-1")
+    first = loan_service.get_marketplace_page(MarketplaceQuerySchema())
+
+    _list(db, "LN-1", amount=2500)
+    notify_loan_status_change(previous, new)
+    second = loan_service.get_marketplace_page(MarketplaceQuerySchema())
+
+    assert second is not first
+    assert second["listings"][0].amount == 2500
+    assert second["etag"] != first["etag"]
+
+
+@pytest.mark.parametrize("previous, new", [("ACTIVE", "REPAID"), ("ACTIVE", "ACTIVE")])
+def test_writes_outside_listed_keep_cache(db, previous, new):
+    _list(db, "LN-1")
+    first = loan_service.get_marketplace_page(MarketplaceQuerySchema())
+
+    notify_loan_status_change(previous, new)
+
+    assert loan_service.get_marketplace_page(MarketplaceQuerySchema()) is first
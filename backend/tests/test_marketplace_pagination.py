@@ -0,0 +1,67 @@
+import pytest
+
+from db.database import LOAN_PAGE_SORTS
+
+
+def _seed(db, count=23):
+    loans = {}
+    for i in range(count):
+        loans[f"LN-{i:03d}"] = {
+            "status": "LISTED",
+            "amount": 1000 * (i % 5),
+            "interest_rate": 10 + i % 3,
+            "tenure_months": 6,
+            # Every fourth loan has no credit score / created_at yet
+            "credit_score": None if i % 4 == 0 else 600 + i,
+            "created_at": None if i % 4 == 0 else 1_700_000_000 + i // 2,
+            "purpose": "Education" if i % 2 else "Business",
+        }
+    loans["LN-999"] = {"status": "ACTIVE", "amount": 1000, "credit_score": 700, "created_at": 1}
+    db.put_items("loans", loans)
+    return {loan_id for loan_id, loan in loans.items() if loan["status"] == "LISTED"}
+
+
+def _walk(db, sort, limit, **filters):
+    seen, after = [], None
+    while True:
+        rows, after = db.find_loans_page("LISTED", sort=sort, after=after, limit=limit, **filters)
+        seen.extend(loan_id for loan_id, _ in rows)
+        if after is None:
+            return seen
+
+
+@pytest.mark.parametrize("sort", sorted(LOAN_PAGE_SORTS))
+@pytest.mark.parametrize("limit", [1, 3, 50])
+def test_pages_cover_every_row_once_with_null_sort_values(db, sort, limit):
+    listed = _seed(db)
+
+    seen = _walk(db, sort, limit)
+
+    assert len(seen) == len(set(seen))
+    assert set(seen) == listed
+
+
+def test_page_order_matches_full_sort(db):
+    _seed(db)
+
+    full, _ = db.find_loans_page("LISTED", sort="credit_score_desc", limit=100)
+
+    assert _walk(db, "credit_score_desc", 4) == [loan_id for loan_id, _ in full]
+    # NULL scores sort last in DESC order
+    assert all(loan["credit_score"] is None for _, loan in full[-6:])
+
+
+def test_filters_apply_across_pages(db):
+    _seed(db)
+
+    seen = _walk(db, "amount_asc", 2, min_amount=2000, purpose="education")
+    loans = db.get_items("loans", seen)
+
+    assert seen
+    assert all(loans[loan_id]["amount"] >= 2000 for loan_id in seen)
+    assert all(loans[loan_id]["purpose"] == "Education" for loan_id in seen)
+
+
+def test_unknown_sort_is_rejected(db):
+    with pytest.raises(ValueError):
+        db.find_loans_page("LISTED", sort="random")
@@ -0,0 +1,68 @@
+import pytest
+
+from blockchain import outbox
+from blockchain.merkle import build_merkle_tree, leaf_hash, verify_merkle_proof
+from services import audit_service
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 8, 17])
+def test_every_proof_verifies(size):
+    leaves = [leaf_hash("s", f"k{i}", f"{i:064x}") for i in range(size)]
+    root, proofs = build_merkle_tree(leaves)
+
+    for leaf, proof in zip(leaves, proofs):
+        assert verify_merkle_proof(leaf, proof, root)
+    assert not verify_merkle_proof(leaf_hash("s", "other", "00"), proofs[0], root)
+
+
+def test_empty_tree_is_rejected():
+    with pytest.raises(ValueError):
+        build_merkle_tree([])
+
+
+def test_batches_seal_on_size_and_anchor_one_root(db, chain, monkeypatch):
+    monkeypatch.setattr(outbox, "MERKLE_BATCH_SIZE", 3)
+    audit_service._confirmed_roots.clear()
+    for i in range(7):
+        outbox.enqueue_publish("loan_status", f"LN-{i}", f"{i:064x}")
+
+    # Two full batches; the last item waits for more or for MERKLE_MAX_WAIT_SECONDS
+    assert outbox.anchor_merkle_batches() == 6
+
+    roots = chain.items(outbox.MERKLE_ROOT_STREAM)
+    assert len(roots) == 2
+    assert "loan_status" not in chain.streams
+    assert db.get_outbox_stats()["pending"] == 1
+
+    # Audit verifies an anchored event from its local proof + the root on chain
+    assert audit_service._get_blockchain_hash("loan_status", "LN-4") == f"{4:064x}"
+    assert audit_service._get_blockchain_hash("loan_status", "LN-6") is None
+
+
+def test_tampered_proof_value_is_not_trusted(db, chain, monkeypatch):
+    monkeypatch.setattr(outbox, "MERKLE_BATCH_SIZE", 2)
+    audit_service._confirmed_roots.clear()
+    outbox.enqueue_publish("loan_status", "LN-1", "aa")
+    outbox.enqueue_publish("loan_status", "LN-2", "bb")
+    outbox.anchor_merkle_batches()
+
+    with db._cursor() as cursor:
+        cursor.execute("UPDATE anchor_proofs SET value = 'cc' WHERE item_key = 'LN-1'")
+
+    assert audit_service._get_blockchain_hash("loan_status", "LN-1") is None
+    assert audit_service._get_blockchain_hash("loan_status", "LN-2") == "bb"
+
+
+def test_failed_root_publish_is_retried_without_duplicates(db, chain, monkeypatch):
+    monkeypatch.setattr(outbox, "MERKLE_BATCH_SIZE", 1)
+    outbox.enqueue_publish("loan_status", "LN-1", "aa")
+    chain.fail_methods.add("publish")
+
+    assert outbox.anchor_merkle_batches() == 0
+    chain.fail_methods.clear()
+    with db._cursor() as cursor:
+        cursor.execute("UPDATE anchor_batches SET next_attempt_at = 0")
+
+    assert outbox.anchor_merkle_batches() == 1
+    assert outbox.anchor_merkle_batches() == 0
+    assert len(chain.items(outbox.MERKLE_ROOT_STREAM)) == 1
@@ -0,0 +1,73 @@
+import pytest
+
+from blockchain import outbox
+from blockchain.loans import record_loan_acceptance
+
+
+def _rows(db):
+    with db._cursor() as cursor:
+        cursor.execute("SELECT * FROM chain_outbox ORDER BY id")
+        return [dict(row) for row in cursor.fetchall()]
+
+
+def _make_due(db):
+    with db._cursor() as cursor:
+        cursor.execute("UPDATE chain_outbox SET next_attempt_at = 0")
+
+
+def test_outbox_row_rolls_back_with_business_write(db):
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.put_item("loans", "LN-1", {"status": "ACTIVE"})
+            record_loan_acceptance({"loan_id": "LN-1"}, "LN-1")
+            raise RuntimeError("boom")
+
+    assert _rows(db) == []
+
+
+def test_fresh_items_go_out_in_one_publishmulti(db, chain):
+    with db.transaction():
+        outbox.enqueue_publish("loan_status", "LN-1", "aa")
+        outbox.enqueue_publish("loan_acceptance", "LN-1", "bb")
+
+    assert outbox.publish_outbox_items() == 2
+
+    assert [method for method, _ in chain.calls].count("publishmulti") == 1
+    rows = _rows(db)
+    assert {row["status"] for row in rows} == {"PUBLISHED"}
+    assert rows[0]["txid"] == rows[1]["txid"]
+    item = chain.items("loan_status")[0]
+    assert item["keys"] == ["LN-1", outbox.IDEMPOTENCY_KEY_PREFIX + rows[0]["idempotency_key"]]
+    assert outbox.publish_outbox_items() == 0
+
+
+def test_failed_publish_is_retried_with_backoff(db, chain):
+    outbox.enqueue_publish("loan_status", "LN-1", "aa")
+    chain.fail_methods.add("publishmulti")
+
+    assert outbox.publish_outbox_items() == 0
+    row = _rows(db)[0]
+    assert row["status"] == "PENDING"
+    assert row["attempts"] == 1
+    assert row["next_attempt_at"] > row["created_at"]
+    # Not due yet
+    assert outbox.publish_outbox_items() == 0
+
+    chain.fail_methods.clear()
+    _make_due(db)
+    assert outbox.publish_outbox_items() == 1
+    assert _rows(db)[0]["status"] == "PUBLISHED"
+    assert len(chain.items("loan_status")) == 1
+
+
+def test_retry_does_not_republish_an_item_that_reached_the_chain(db, chain):
+    key = outbox.enqueue_publish("loan_status", "LN-1", "aa")
+    # First attempt reached the node, but the response was lost
+    txid = chain("publish", ["loan_status", ["LN-1", outbox.IDEMPOTENCY_KEY_PREFIX + key], "aa"])
+    with db._cursor() as cursor:
+        cursor.execute("UPDATE chain_outbox SET attempts = 1")
+
+    assert outbox.publish_outbox_items() == 1
+
+    assert len(chain.items("loan_status")) == 1
+    assert _rows(db)[0]["txid"] == txid
@@ -0,0 +1,59 @@
+import hashlib
+import threading
+import time
+
+import pytest
+
+from auth import password_utils
+from auth.kdf_pool import BoundedExecutor, KDFPoolSaturated
+
+
+def test_hash_roundtrip_and_current_params():
+    stored = password_utils.hash_password("s3cret")
+
+    assert stored.startswith(f"pbkdf2_{password_utils.CURRENT_KDF.algorithm}$")
+    assert password_utils.verify_password("s3cret", stored)
+    assert not password_utils.verify_password("wrong", stored)
+    assert not password_utils.needs_rehash(stored)
+
+
+def test_legacy_hash_verifies_and_needs_rehash():
+    salt = bytes(range(16))
+    digest = hashlib.pbkdf2_hmac("sha256", b"s3cret", salt, 100_000)
+    legacy = f"{salt.hex()}:{digest.hex()}"
+
+    assert password_utils.verify_password("s3cret", legacy)
+    assert password_utils.needs_rehash(legacy) == (password_utils.CURRENT_KDF != password_utils.LEGACY_KDF)
+
+
+def test_other_iterations_need_rehash():
+    salt = bytes(16)
+    digest = hashlib.pbkdf2_hmac("sha256", b"pw", salt, 1000)
+    stored = f"pbkdf2_sha256$1000${salt.hex()}${digest.hex()}"
+
+    assert password_utils.verify_password("pw", stored)
+    assert password_utils.needs_rehash(stored)
+
+
+def test_saturated_pool_rejects_instead_of_queueing():
+    executor = BoundedExecutor(workers=1, max_queued=1)
+    release = threading.Event()
+
+    threads = [threading.Thread(target=executor.run, args=(release.wait,)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    # One task running on the single worker, one waiting in the queue
+    deadline = time.monotonic() + 5
+    while executor.stats()["running"] + executor.stats()["queue_depth"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    with pytest.raises(KDFPoolSaturated):
+        executor.run(lambda: None)
+
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert executor.stats()["rejected"] == 1
+    assert executor.stats()["completed"] == 2
+    assert executor.run(lambda: 42) == 42
@@ -0,0 +1,80 @@
+import json
+
+from blockchain import mirror
+from schemas.public_ledger_schemas import PublicLedgerQuerySchema
+from services import public_ledger_service
+
+
+def _seed(chain, count=5):
+    for i in range(count):
+        chain("publish", ["transactions", [f"TX-{i % 2}"], f"{i:02x}"])
+
+
+def test_pages_follow_next_start(db, chain):
+    _seed(chain)
+    mirror.sync_stream("transactions")
+
+    first = public_ledger_service.get_public_transactions(PublicLedgerQuerySchema(limit=3))
+    second = public_ledger_service.get_public_transactions(
+        PublicLedgerQuerySchema(limit=3, start=first["next_start"])
+    )
+
+    assert [item["data"] for item in first["items"] + second["items"]] == ["00", "01", "02", "03", "04"]
+    assert second["next_start"] is None
+    assert set(first["items"][0]) == {"stream", "txid", "blocktime", "confirmations", "data"}
+
+
+def test_full_settled_pages_are_immutable(db, chain):
+    _seed(chain)
+    mirror.sync_stream("transactions")
+    query = PublicLedgerQuerySchema(limit=2)
+
+    assert not public_ledger_service.get_public_transactions(query)["immutable"]
+
+    chain.confirm(confirmations=mirror.MIRROR_SETTLED_CONFIRMATIONS)
+    mirror.sync_stream("transactions")
+
+    assert public_ledger_service.get_public_transactions(query)["immutable"]
+
+
+def test_since_blocktime_and_key_filters(db, chain):
+    _seed(chain)
+    chain.items("transactions")[0]["blocktime"] = 100
+    chain.items("transactions")[1]["blocktime"] = 100
+    for item in chain.items("transactions")[2:]:
+        item["blocktime"] = 200
+    mirror.sync_stream("transactions")
+
+    page = public_ledger_service.get_public_transactions(PublicLedgerQuerySchema(since_blocktime=150, key="TX-0"))
+
+    assert [item["data"] for item in page["items"]] == ["02", "04"]
+
+
+def test_export_walks_every_page(db, chain, monkeypatch):
+    monkeypatch.setattr(mirror, "EXPORT_PAGE_SIZE", 2)
+    _seed(chain)
+    mirror.sync_stream("transactions")
+
+    lines = list(public_ledger_service.export_public_stream("transactions", PublicLedgerQuerySchema()))
+
+    assert [json.loads(line)["data"] for line in lines] == ["00", "01", "02", "03", "04"]
+
+
+def test_keyed_request_before_first_sync_is_503(db, chain):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from routers.public_ledger_routes import router
+
+    _seed(chain)
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    response = client.get("/public/ledger/transactions", params={"key": "TX-0"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"]
+    assert client.get("/public/ledger/transactions/export", params={"key": "TX-0"}).status_code == 503
+    assert client.get("/public/ledger/transactions").status_code == 200
+
+    mirror.sync_stream("transactions")
+    assert len(client.get("/public/ledger/transactions", params={"key": "TX-0"}).json()) == 3
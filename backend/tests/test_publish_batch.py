@@ -0,0 +1,79 @@
+import pytest
+
+import multichain_rpc
+from multichain_rpc import publish_batch, publish_to_stream
+
+
+class _FakeNode:
+    """publishmulti + getrawtransaction; stream outputs come after a change output, reversed"""
+
+    def __init__(self, decode_fails=False):
+        self.calls = []
+        self.decode_fails = decode_fails
+        self.published = []
+
+    def __call__(self, method, params=None, rpc_id=1):
+        self.calls.append(method)
+        if method == "publishmulti":
+            self.published = params[1]
+            return "tx-1"
+        if method == "getrawtransaction":
+            if self.decode_fails:
+                raise Exception("txindex disabled")
+            outputs = [{"n": 0, "value": 0, "items": []}]
+            for n, item in enumerate(reversed(self.published), start=1):
+                keys = item.get("keys") or [item["key"]]
+                outputs.append({"n": n, "items": [
+                    {"type": "stream", "name": item["for"], "keys": keys, "data": item["data"].upper()}
+                ]})
+            return {"txid": params[0], "vout": outputs}
+        raise AssertionError(method)
+
+
+def test_batch_sends_one_publishmulti_with_real_vouts(monkeypatch):
+    node = _FakeNode()
+    monkeypatch.setattr(multichain_rpc, "call_rpc", node)
+
+    with publish_batch():
+        first = publish_to_stream("loan_status", ["LN-1", "outbox:a"], "aa11")
+        second = publish_to_stream("loan_acceptance", "LN-1", "bb22")
+        third = publish_to_stream("loan_status", ["LN-1", "outbox:b"], "aa11")
+
+    assert node.calls == ["publishmulti", "getrawtransaction"]
+    assert {item.txid for item in (first, second, third)} == {"tx-1"}
+    assert (first.vout, second.vout, third.vout) == (3, 2, 1)
+
+
+def test_undecodable_transaction_leaves_vout_unknown(monkeypatch):
+    monkeypatch.setattr(multichain_rpc, "call_rpc", _FakeNode(decode_fails=True))
+
+    with publish_batch():
+        item = publish_to_stream("loan_status", "LN-1", "aa11")
+
+    assert item.txid == "tx-1"
+    assert item.vout is None
+
+
+def test_nothing_is_sent_when_the_block_raises(monkeypatch):
+    node = _FakeNode()
+    monkeypatch.setattr(multichain_rpc, "call_rpc", node)
+
+    with pytest.raises(RuntimeError):
+        with publish_batch():
+            publish_to_stream("loan_status", "LN-1", "aa11")
+            raise RuntimeError("boom")
+
+    assert node.calls == []
+
+
+def test_nested_batches_join_the_outer_one(monkeypatch):
+    node = _FakeNode()
+    monkeypatch.setattr(multichain_rpc, "call_rpc", node)
+
+    with publish_batch():
+        publish_to_stream("a", "k", "01")
+        with publish_batch():
+            publish_to_stream("b", "k", "02")
+
+    assert node.calls.count("publishmulti") == 1
+    assert len(node.published) == 2
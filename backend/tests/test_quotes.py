@@ -0,0 +1,58 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers.loan_routes import router
+from services import quote_service
+from utils.constants import PLATFORM_FEE_PERCENT
+from utils.emi_calculator import calculate_emi
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_quote_matches_calculator_and_fee(client):
+    response = client.get("/loans/quote", params={"amount": 50000, "tenure_months": [3, 6]})
+
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "public, max-age=3600"
+    quotes = response.json()["quotes"]
+    assert [quote["tenure_months"] for quote in quotes] == [3, 6]
+    assert quotes[1]["emi"] == calculate_emi(50000, 13.0, 6)["emi"]
+    assert quotes[0]["platform_fee_percent"] == PLATFORM_FEE_PERCENT
+    assert quotes[0]["platform_fee"] + quotes[0]["net_amount_received"] == 50000
+
+
+@pytest.mark.parametrize("params", [
+    {"amount": "inf", "tenure_months": 6},
+    {"amount": "nan", "tenure_months": 6},
+    {"amount": "1e308", "tenure_months": 6},
+    {"amount": 0, "tenure_months": 6},
+    {"amount": 50000, "tenure_months": 10**9},
+    {"amount": 50000, "tenure_months": 6, "interest_rate": "inf"},
+])
+def test_out_of_range_inputs_are_rejected(client, params):
+    assert client.get("/loans/quote", params=params).status_code == 422
+
+
+def test_too_many_combinations_is_a_client_error(client):
+    params = {"amount": list(range(1000, 1021)), "tenure_months": list(range(1, 11))}
+
+    assert client.get("/loans/quote", params=params).status_code == 400
+
+
+def test_equal_inputs_share_a_cache_entry():
+    quote_service._quote.cache_clear()
+    quote_service.get_quote(50000, 13, 6)
+    quote_service.get_quote(50000.0, 13.0, 6)
+
+    assert quote_service.get_quote_cache_stats()["hits"] == 1
+
+
+def test_service_rejects_unbounded_amounts():
+    with pytest.raises(ValueError):
+        quote_service.get_quote(float("inf"), 13, 6)
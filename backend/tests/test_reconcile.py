@@ -0,0 +1,84 @@
+from blockchain import outbox
+from schemas.lender_schemas import LenderAcceptanceSchema
+from schemas.repayment_schemas import RepaymentSchema
+from services import loan_service, reconcile_service, repayment_service
+
+ACCEPTED_AT = 1_700_000_000
+
+
+def _active_loan(db):
+    db.put_item("loans", "LN-1", {
+        "loan_id": "LN-1",
+        "user_id": "borrower",
+        "amount": 10000,
+        "interest_rate": 12,
+        "tenure_months": 6,
+        "total_payable": 10500,
+        "status": "LISTED",
+    })
+    db.put_item("kyc", "lender", {"status": "APPROVED"})
+    loan_service.accept_loan(LenderAcceptanceSchema(loan_id="LN-1", lender_id="lender", accepted_at=ACCEPTED_AT))
+    repayment_service.process_repayment(RepaymentSchema(
+        loan_id="LN-1",
+        repayment_id="ignored",
+        amount=1750,
+        repayment_type="PARTIAL",
+        paid_by="borrower",
+        timestamp=ACCEPTED_AT + 30 * 86400,
+    ))
+
+
+def _mismatches(db):
+    with db._cursor() as cursor:
+        cursor.execute("SELECT table_name, record_key, status FROM reconcile_mismatches")
+        return [tuple(row) for row in cursor.fetchall()]
+
+
+def test_clean_acceptance_and_repayment_reconcile_as_match(db, chain):
+    _active_loan(db)
+    outbox.publish_outbox_items()
+
+    acceptance = db.get_item("loan_acceptances", "LN-1")
+    (repayment,) = db.get_repayments("LN-1")
+    assert reconcile_service._check_record("loan_acceptances", "LN-1", acceptance)[3]
+    assert reconcile_service._check_record("repayments", repayment["repayment_id"], repayment, "LN-1")[3]
+
+    assert reconcile_service.reconcile_changes() >= 2
+    assert _mismatches(db) == []
+
+
+def test_unpublished_proof_is_pending_until_it_lands(db, chain):
+    _active_loan(db)
+
+    reconcile_service.reconcile_changes()
+    assert ("loan_acceptances", "LN-1", "PENDING") in _mismatches(db)
+
+    outbox.publish_outbox_items()
+    reconcile_service.reconcile_changes()
+    assert _mismatches(db) == []
+
+
+def test_tampered_row_becomes_mismatch_after_grace(db, chain, monkeypatch):
+    _active_loan(db)
+    outbox.publish_outbox_items()
+    reconcile_service.reconcile_changes()
+
+    acceptance = db.get_item("loan_acceptances", "LN-1")
+    acceptance["lender_id"] = "someone-else"
+    db.put_item("loan_acceptances", "LN-1", acceptance)
+
+    reconcile_service.reconcile_changes()
+    assert _mismatches(db) == [("loan_acceptances", "LN-1", "PENDING")]
+
+    monkeypatch.setattr(reconcile_service, "RECONCILE_GRACE_SECONDS", 0)
+    reconcile_service.reconcile_changes()
+    assert _mismatches(db) == [("loan_acceptances", "LN-1", "MISMATCH")]
+
+
+def test_only_changed_rows_are_rechecked(db, chain):
+    _active_loan(db)
+    outbox.publish_outbox_items()
+    reconcile_service.reconcile_changes()
+
+    assert reconcile_service.reconcile_changes() == 0
+    assert all(table["lag"] == 0 for table in reconcile_service.get_reconcile_stats()["tables"].values())
@@ -0,0 +1,40 @@
+def test_add_repayment_keeps_running_total(db):
+    db.add_repayment("RP-1", "LN-1", {"amount": 1000.0})
+    db.add_repayment("RP-2", "LN-1", {"amount": 250.5})
+    db.add_repayment("RP-3", "LN-2", {"amount": 10.0})
+
+    totals = db.get_repayment_totals(["LN-1", "LN-2", "LN-3"])
+
+    assert totals["LN-1"] == {"total_repaid": 1250.5, "paid_emis": 2}
+    assert totals["LN-2"] == {"total_repaid": 10.0, "paid_emis": 1}
+    assert totals["LN-3"] == {"total_repaid": 0, "paid_emis": 0}
+
+
+def test_total_rolls_back_with_repayment(db):
+    try:
+        with db.transaction():
+            db.add_repayment("RP-1", "LN-1", {"amount": 1000.0})
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+
+    assert db.get_repayment_totals(["LN-1"])["LN-1"]["paid_emis"] == 0
+
+
+def test_init_backfills_missing_totals(db):
+    db.add_repayment("RP-1", "LN-1", {"amount": 400.0})
+    db.add_repayment("RP-2", "LN-1", {"amount": 600.0})
+    with db._cursor() as cursor:
+        cursor.execute("DELETE FROM repayment_totals")
+
+    db.init_db()
+
+    assert db.get_repayment_totals(["LN-1"])["LN-1"] == {"total_repaid": 1000.0, "paid_emis": 2}
+
+
+def test_repayments_by_loan_use_index(db):
+    with db._cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN SELECT json_data FROM repayments WHERE loan_id = ?", ("LN-1",))
+        plan = " ".join(row["detail"] for row in cursor.fetchall())
+
+    assert "idx_repayments_loan" in plan
@@ -0,0 +1,86 @@
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import multichain_rpc
+
+
+class _FakeNode(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    connections = set()
+
+    def do_POST(self):
+        _FakeNode.connections.add(self.client_address)
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if request["method"] == "fail":
+            body = {"result": None, "error": {"code": -8, "message": "bad"}, "id": request["id"]}
+        else:
+            body = {"result": request["params"], "error": None, "id": request["id"]}
+        raw = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def node(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeNode)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    _FakeNode.connections = set()
+    monkeypatch.setattr(multichain_rpc, "URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(multichain_rpc, "_session", multichain_rpc._build_session())
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_calls_reuse_one_keep_alive_connection(node):
+    for i in range(20):
+        assert multichain_rpc.call_rpc("echo", [i]) == [i]
+
+    assert len(_FakeNode.connections) == 1
+
+
+def test_rpc_errors_raise_and_are_counted(node):
+    before = multichain_rpc.get_rpc_stats().get("fail", {"calls": 0, "errors": 0})
+
+    with pytest.raises(Exception, match="bad"):
+        multichain_rpc.call_rpc("fail")
+
+    after = multichain_rpc.get_rpc_stats()["fail"]
+    assert after["calls"] == before["calls"] + 1
+    assert after["errors"] == before["errors"] + 1
+    assert sum(after["histogram"].values()) == after["calls"]
+
+
+def test_session_never_retries_after_the_request_was_sent():
+    retry = multichain_rpc._session.get_adapter("http://node").max_retries
+
+    assert retry.read == 0
+    assert retry.status == 0
+    assert retry.connect == multichain_rpc.RPC_CONNECT_RETRIES
+
+
+def test_missing_password_fails_startup(monkeypatch):
+    monkeypatch.setattr(multichain_rpc, "RPC_PASSWORD", None)
+
+    with pytest.raises(RuntimeError):
+        multichain_rpc.require_rpc_credentials()
+    assert "Authorization" not in multichain_rpc._build_session().headers
+
+
+def test_password_comes_from_the_environment(monkeypatch):
+    monkeypatch.setattr(multichain_rpc, "RPC_PASSWORD", "from-env")
+
+    multichain_rpc.require_rpc_credentials()
+    auth = multichain_rpc._build_session().headers["Authorization"]
+    assert base64.b64decode(auth.split()[1]).decode() == f"{multichain_rpc.RPC_USER}:from-env"
@@ -0,0 +1,124 @@
+import time
+
+from services import score_history_service
+from services.score_history_service import (
+    DAY_SECONDS,
+    get_history,
+    get_latest_score,
+    get_score_series,
+    invalidate_score_heads,
+    record_scores,
+)
+from utils.score_codec import pack_features, unpack_features
+
+HOUR = 3600
+T0 = 1_700_000_000 // DAY_SECONDS * DAY_SECONDS
+FEATURES = {"expense_ratio": 0.38, "failure_rate": 0.05, "utilization_ratio": 1.25, "account_age_months": 14}
+
+
+def _record(db, user_id, scored_at, score, reason="NIGHTLY", features=None):
+    with db.transaction():
+        record_scores({user_id: (score, features)}, reason, scored_at)
+    invalidate_score_heads([user_id])
+
+
+def test_record_scores_writes_head_and_history(db):
+    _record(db, "u1", T0, 700, "KYC_INITIAL")
+    _record(db, "u1", T0 + 60, 640, "DEFAULT", FEATURES)
+
+    assert get_latest_score("u1") == 640
+    assert db.get_item("credit_scores", "u1") == 640
+    points = get_history("u1")
+    assert [(p["score"], p["reason"]) for p in points] == [(640, "DEFAULT"), (700, "KYC_INITIAL")]
+    assert points[0]["features"] == FEATURES
+    assert points[1]["features"] is None
+
+
+def test_history_range_is_half_open(db):
+    for i in range(5):
+        _record(db, "u1", T0 + i * HOUR, 600 + i)
+    _record(db, "u2", T0 + HOUR, 800)
+
+    points = get_history("u1", T0 + HOUR, T0 + 3 * HOUR)
+
+    assert [p["score"] for p in points] == [602, 601]
+    assert [p["score"] for p in get_history("u1", limit=2)] == [604, 603]
+
+
+def test_series_last_score_is_the_latest_point_in_each_bucket(db):
+    # Bucket 1: latest point is neither the min nor the max; bucket 2 has one point
+    for offset, score in [(0, 700), (600, 820), (1200, 650), (1800, 690), (HOUR + 5, 710)]:
+        _record(db, "u1", T0 + offset, score)
+
+    buckets = get_score_series("u1", T0, T0 + 2 * HOUR, "hour")
+
+    assert [b["bucket_start"] for b in buckets] == [T0, T0 + HOUR]
+    first = buckets[0]
+    assert (first["points"], first["min_score"], first["max_score"]) == (4, 650, 820)
+    assert first["avg_score"] == 715.0
+    assert (first["last_scored_at"], first["last_score"]) == (T0 + 1800, 690)
+    assert buckets[1]["last_score"] == 710
+
+
+def test_head_cache_serves_until_invalidated(db):
+    _record(db, "u1", T0, 700)
+    assert get_latest_score("u1") == 700
+
+    with db.transaction():
+        record_scores({"u1": (720, None)}, "REPAYMENT", T0 + 1)
+    assert get_latest_score("u1") == 700
+
+    invalidate_score_heads(["u1"])
+    assert get_latest_score("u1") == 720
+
+
+def test_compaction_keeps_last_point_per_day(db, monkeypatch):
+    now = int(time.time())
+    old_day = (now - (score_history_service.CREDIT_HISTORY_RAW_DAYS + 2) * DAY_SECONDS) // DAY_SECONDS * DAY_SECONDS
+    for i, score in enumerate([600, 610, 620]):
+        _record(db, "u1", old_day + i * HOUR, score)
+    _record(db, "u1", now - 10, 700)
+
+    result = score_history_service.compact_history()
+
+    assert result == {"compacted": 2, "purged": 0}
+    assert [(p["scored_at"], p["score"]) for p in get_history("u1")] == [(now - 10, 700), (old_day + 2 * HOUR, 620)]
+
+    monkeypatch.setattr(score_history_service, "CREDIT_HISTORY_MAX_DAYS", score_history_service.CREDIT_HISTORY_RAW_DAYS)
+    assert score_history_service.compact_history()["purged"] == 1
+    assert [p["score"] for p in get_history("u1")] == [700]
+
+
+def test_feature_packing_is_lossless_for_model_output():
+    assert unpack_features(pack_features(FEATURES)) == FEATURES
+    assert len(pack_features(FEATURES)) == 12
+    assert pack_features(None) is None
+
+
+def test_history_reads_stay_on_the_primary_key(db):
+    with db._cursor() as cursor:
+        cursor.execute(
+            "EXPLAIN QUERY PLAN SELECT score FROM credit_score_history "
+            "WHERE user_id = ? AND scored_at >= ? AND scored_at < ?",
+            ("u1", 0, 1),
+        )
+        plan = " ".join(row["detail"] for row in cursor.fetchall())
+
+    assert "PRIMARY KEY" in plan
+
+
+def test_reader_cannot_restore_a_head_invalidated_while_it_loaded(db, monkeypatch):
+    _record(db, "u1", T0, 700)
+    load_head = score_history_service.get_item
+
+    def load_then_write(table, key):
+        stale = load_head(table, key)
+        # A writer commits and invalidates between the reader's load and its cache fill
+        _record(db, "u1", T0 + 1, 720)
+        return stale
+
+    monkeypatch.setattr(score_history_service, "get_item", load_then_write)
+    assert get_latest_score("u1") == 700
+
+    monkeypatch.setattr(score_history_service, "get_item", load_head)
+    assert get_latest_score("u1") == 720
@@ -0,0 +1,71 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from auth import auth_service, session_cache
+from auth.auth_dependency import get_current_user
+
+
+def _expires(hours):
+    return (datetime.utcnow() + timedelta(hours=hours)).isoformat()
+
+
+def test_valid_session_is_cached(db):
+    token = auth_service.create_session("9800000001")
+
+    assert get_current_user(f"Bearer {token}") == "9800000001"
+    # Served from the cache even without the row
+    db.delete_item("sessions", token)
+    assert get_current_user(f"Bearer {token}") == "9800000001"
+    assert session_cache.get_session_cache_stats()["hits"] >= 1
+
+
+def test_logout_evicts_cached_session(db):
+    token = auth_service.create_session("9800000002")
+    get_current_user(f"Bearer {token}")
+
+    auth_service.logout_user(token)
+
+    with pytest.raises(HTTPException) as error:
+        get_current_user(f"Bearer {token}")
+    assert error.value.status_code == 401
+
+
+@pytest.mark.parametrize("session", [
+    {"phone": "9800000003", "expires_at": _expires(-1)},
+    {"phone": "9800000003"},
+])
+def test_expired_or_undated_sessions_are_rejected(db, session):
+    db.put_item("sessions", "token-x", session)
+
+    with pytest.raises(HTTPException):
+        get_current_user("Bearer token-x")
+    assert session_cache.get_cached_session("token-x") is None
+
+
+def test_cache_entry_lives_until_session_expiry(db):
+    expires_at = (datetime.utcnow() + timedelta(seconds=0.3)).isoformat()
+    db.put_item("sessions", "token-y", {"phone": "9800000004", "expires_at": expires_at})
+    assert get_current_user("Bearer token-y") == "9800000004"
+
+    time.sleep(0.4)
+
+    assert session_cache.get_cached_session("token-y") is None
+    with pytest.raises(HTTPException):
+        get_current_user("Bearer token-y")
+
+
+def test_sweep_deletes_expired_sessions(db):
+    db.put_item("sessions", "old", {"phone": "1", "expires_at": _expires(-2)})
+    db.put_item("sessions", "new", {"phone": "2", "expires_at": _expires(2)})
+
+    assert auth_service.sweep_expired_sessions() == 1
+    assert db.get_item("sessions", "old") is None
+    assert db.get_item("sessions", "new") is not None
+
+
+def test_bad_header_is_rejected(db):
+    with pytest.raises(HTTPException):
+        get_current_user("Token abc")
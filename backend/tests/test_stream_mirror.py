@@ -0,0 +1,108 @@
+import pytest
+
+from blockchain import mirror
+
+
+def _publish(chain, stream, keys):
+    for i, key in enumerate(keys):
+        chain("publish", [stream, [key, f"outbox:{i}"], f"{i:02x}"])
+
+
+def _walk(stream, limit, key=None):
+    seen, start = [], 0
+    while start is not None:
+        items, start = mirror.get_stream_page(stream, start, limit, key=key)
+        seen.extend(item["data"] for item in items)
+    return seen
+
+
+def test_sync_mirrors_items_once_per_business_key(db, chain):
+    _publish(chain, "loan_status", ["A", "B", "A"])
+
+    assert mirror.sync_stream("loan_status") == 3
+    assert mirror.sync_stream("loan_status") == 0
+
+    items, next_start = mirror.get_stream_page("loan_status", 0, 10)
+    assert [item["key"] for item in items] == ["A", "B", "A"]
+    assert next_start is None
+    assert [item["data"] for item in mirror.get_stream_key_items("loan_status", "A")] == ["00", "02"]
+
+
+def test_keyed_page_waits_for_the_first_sync(db, chain):
+    _publish(chain, "loan_status", ["A", "B", "B", "A", "B", "A", "A"])
+    chain.calls.clear()
+
+    with pytest.raises(mirror.StreamNotMirrored):
+        mirror.get_stream_page("loan_status", 0, 2, key="A")
+    # No inline walk of the stream on the request path
+    assert chain.calls == []
+
+    mirror.sync_stream("loan_status")
+    first, cursor = mirror.get_stream_page("loan_status", 0, 2, key="A")
+    # Cursor points past the second "A" item in the stream (position 3)
+    assert [item["data"] for item in first] == ["00", "03"]
+    assert cursor == 4
+    assert _walk("loan_status", 2, key="A") == ["00", "03", "05", "06"]
+    assert _walk("loan_status", 3) == ["00", "01", "02", "03", "04", "05", "06"]
+
+
+def test_unkeyed_cursor_survives_the_first_sync(db, chain):
+    _publish(chain, "loan_status", ["A", "B", "C", "D"])
+
+    first, cursor = mirror.get_stream_page("loan_status", 0, 2)
+    mirror.sync_stream("loan_status")
+    second, _ = mirror.get_stream_page("loan_status", cursor, 2)
+
+    assert [item["data"] for item in first + second] == ["00", "01", "02", "03"]
+
+
+def test_unmirrored_key_falls_back_to_the_node(db, chain):
+    _publish(chain, "loan_status", ["A"])
+    mirror.sync_stream("loan_status")
+    _publish(chain, "loan_status", ["Z"])
+
+    assert [item["txid"] for item in mirror.get_stream_key_items("loan_status", "Z")] == [chain.items("loan_status")[1]["txid"]]
+
+
+def test_key_lookup_sees_items_published_since_the_last_pass(db, chain):
+    _publish(chain, "loan_status", ["A"])
+    mirror.sync_stream("loan_status")
+    chain("publish", ["loan_status", ["A"], "ff"])
+
+    # The key has mirror rows, but the mirror is behind the node
+    assert [item["data"] for item in mirror.get_stream_key_items("loan_status", "A")] == ["00", "ff"]
+
+    mirror.sync_stream("loan_status")
+    chain.calls.clear()
+    assert [item["data"] for item in mirror.get_stream_key_items("loan_status", "A")] == ["00", "ff"]
+    assert [method for method, _ in chain.calls] == ["liststreams"]
+
+
+def test_confirmations_are_refreshed_until_settled(db, chain):
+    _publish(chain, "loan_status", ["A", "B"])
+    mirror.sync_stream("loan_status")
+    chain.confirm(confirmations=mirror.MIRROR_SETTLED_CONFIRMATIONS)
+
+    mirror.sync_stream("loan_status")
+    items, _ = mirror.get_stream_page("loan_status", 0, 10)
+
+    assert {item["confirmations"] for item in items} == {mirror.MIRROR_SETTLED_CONFIRMATIONS}
+    assert db.get_min_unsettled_seq("loan_status", mirror.MIRROR_SETTLED_CONFIRMATIONS) is None
+
+
+def test_refresh_reads_a_bounded_window_per_pass(db, chain, monkeypatch):
+    monkeypatch.setattr(mirror, "MIRROR_REFRESH_LIMIT", 3)
+    monkeypatch.setattr(mirror, "_refresh_cursors", {})
+    _publish(chain, "loan_status", [f"K{i}" for i in range(8)])
+    mirror.sync_stream("loan_status")
+    chain.confirm(confirmations=mirror.MIRROR_SETTLED_CONFIRMATIONS)
+
+    refresh_counts = []
+    for _ in range(3):
+        chain.calls.clear()
+        mirror.sync_stream("loan_status")
+        refresh_counts += [params[2] for method, params in chain.calls if method == "liststreamitems" and params[3] < 8]
+
+    # The first sync already refreshed 0-2; passes continue at 3, 6, then wrap to 0
+    assert refresh_counts == [3, 2, 3]
+    assert db.get_min_unsettled_seq("loan_status", mirror.MIRROR_SETTLED_CONFIRMATIONS) is None
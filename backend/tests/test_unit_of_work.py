@@ -0,0 +1,202 @@
+import threading
+import time
+
+import pytest
+
+from schemas.lender_schemas import LenderAcceptanceSchema
+from schemas.repayment_schemas import RepaymentSchema
+from schemas.transaction_schemas import TransactionReceiptSchema
+from services import loan_service, repayment_service, transaction_service
+from services.score_history_service import get_history
+
+ACCEPTED_AT = 1_700_000_000
+
+
+def _seed_loan(db, loan_id="LN-1", status="LISTED", lender_id=None):
+    db.put_item("loans", loan_id, {
+        "loan_id": loan_id,
+        "user_id": "borrower",
+        "lender_id": lender_id,
+        "amount": 10000,
+        "interest_rate": 12,
+        "tenure_months": 6,
+        "total_payable": 10500,
+        "status": status,
+        "created_at": ACCEPTED_AT,
+    })
+    for lender in ("lender-a", "lender-b"):
+        db.put_item("kyc", lender, {"status": "APPROVED"})
+
+
+def _race(*calls):
+    """Run the calls together; returns (successes, errors)"""
+    barrier = threading.Barrier(len(calls))
+    successes, errors = [], []
+
+    def run(call):
+        barrier.wait()
+        try:
+            successes.append(call())
+        except Exception as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=run, args=(call,)) for call in calls]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return successes, errors
+
+
+def _count(db, table):
+    with db._cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+
+def test_transaction_rolls_back_every_write(db):
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.put_item("loans", "LN-1", {"status": "LISTED"})
+            db.put_item("kyc", "user", {"status": "APPROVED"})
+            raise RuntimeError("boom")
+
+    assert db.get_item("loans", "LN-1") is None
+    assert db.get_item("kyc", "user") is None
+
+
+def test_concurrent_acceptances_activate_loan_once(db):
+    _seed_loan(db)
+
+    successes, errors = _race(*[
+        lambda lender=lender: loan_service.accept_loan(
+            LenderAcceptanceSchema(loan_id="LN-1", lender_id=lender, accepted_at=ACCEPTED_AT)
+        )
+        for lender in ("lender-a", "lender-b")
+    ])
+
+    assert len(successes) == 1
+    assert errors == ["Loan is not available for acceptance"]
+    assert db.get_item("loans", "LN-1")["status"] == "ACTIVE"
+    assert _count(db, "installments") == 6
+    assert _count(db, "loan_acceptances") == 1
+
+
+def test_failed_acceptance_writes_nothing(db):
+    _seed_loan(db)
+    db.put_item("kyc", "lender-a", {"status": "PENDING"})
+
+    with pytest.raises(Exception, match="KYC"):
+        loan_service.accept_loan(LenderAcceptanceSchema(loan_id="LN-1", lender_id="lender-a", accepted_at=ACCEPTED_AT))
+
+    assert db.get_item("loans", "LN-1")["status"] == "LISTED"
+    assert _count(db, "installments") == 0
+    assert _count(db, "chain_outbox") == 0
+
+
+def test_concurrent_fund_transfers_fund_loan_once(db):
+    _seed_loan(db)
+
+    def fund(lender, txn_id):
+        return transaction_service.process_fund_transfer(
+            TransactionReceiptSchema(
+                loan_id="LN-1",
+                transaction_id=txn_id,
+                amount=10000,
+                sender_account="A",
+                receiver_account="B",
+                timestamp=ACCEPTED_AT,
+                success=True,
+            ),
+            lender,
+        )
+
+    successes, errors = _race(lambda: fund("lender-a", "TX-A"), lambda: fund("lender-b", "TX-B"))
+
+    assert len(successes) == 1
+    assert len(errors) == 1
+    assert db.get_item("financial_data", "borrower")["total_transactions"] == 1
+    assert _count(db, "installments") == 6
+
+
+def test_failed_fund_transfer_keeps_counter(db):
+    _seed_loan(db)
+
+    with pytest.raises(Exception, match="Transaction failed"):
+        transaction_service.process_fund_transfer(
+            TransactionReceiptSchema(
+                loan_id="LN-1",
+                transaction_id="TX-A",
+                amount=10000,
+                sender_account="A",
+                receiver_account="B",
+                timestamp=ACCEPTED_AT,
+                success=False,
+            ),
+            "lender-a",
+        )
+
+    assert db.get_item("financial_data", "borrower")["failed_transactions"] == 1
+    assert db.get_item("loans", "LN-1")["status"] == "LISTED"
+
+
+def test_concurrent_final_repayments_close_loan_once(db):
+    _seed_loan(db, status="ACTIVE", lender_id="lender-a")
+    db.put_item("financial_data", "borrower", {
+        "monthly_income": 40000, "monthly_expense": 10000, "total_transactions": 1,
+        "failed_transactions": 0, "avg_transaction_amount": 10000, "missed_payments": 0,
+        "loan_outstanding": 10000, "account_age_months": 0,
+    })
+
+    def repay(repayment_id):
+        return repayment_service.process_repayment(
+            RepaymentSchema(
+                loan_id="LN-1",
+                repayment_id=repayment_id,
+                amount=10500,
+                repayment_type="FULL",
+                paid_by="borrower",
+                timestamp=ACCEPTED_AT,
+            )
+        )
+
+    successes, errors = _race(lambda: repay("R-1"), lambda: repay("R-2"))
+
+    assert len(successes) == 1
+    assert errors == ["Loan is not active"]
+    assert db.get_item("loans", "LN-1")["status"] == "REPAID"
+    # The principal comes off loan_outstanding once, not twice
+    assert db.get_item("financial_data", "borrower")["loan_outstanding"] == 0
+    assert len(get_history("borrower")) == 1
+    assert _count(db, "repayments") == 1
+
+
+def test_concurrent_borrow_requests_create_one_loan(db, monkeypatch):
+    from schemas.loan_schemas import BorrowRequestSchema
+
+    db.put_item("kyc", "borrower", {"status": "APPROVED", "basic_info": {"first_name": "B"}})
+
+    def slow_pdf(**kwargs):
+        # Both requests pass the early check before either one inserts
+        time.sleep(0.2)
+        return "/tmp/agreement.pdf"
+
+    monkeypatch.setattr(loan_service, "generate_loan_agreement_pdf", slow_pdf)
+
+    def borrow():
+        return loan_service.create_borrow_request(BorrowRequestSchema(
+            user_id="borrower",
+            amount=10000,
+            tenure_months=6,
+            purpose="Education",
+            emi_amount=1700,
+            agreed_to_rules=True,
+            net_amount_received=9700,
+            submitted_at=ACCEPTED_AT,
+        ))
+
+    successes, errors = _race(borrow, borrow)
+
+    assert len(successes) == 1
+    assert errors == ["You already have an active loan or request"]
+    assert len(db.find_loans(user_id="borrower")) == 1
@@ -0,0 +1,9 @@
+"""
+PLATFORM CONSTANTS
+------------------
+Business values shared by several services, defined once so quotes,
+fund transfers and request schemas cannot drift apart.
+"""
+
+# Deducted from the principal when a loan is funded
+PLATFORM_FEE_PERCENT = 3.0
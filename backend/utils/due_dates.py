@@ -0,0 +1,34 @@
+import datetime
+from typing import Optional
+
+# Loan months are 30 days throughout the platform
+LOAN_MONTH_SECONDS = 30 * 24 * 60 * 60
+
+
+def to_epoch(value) -> Optional[int]:
+    """
+    Normalize a stored timestamp to unix seconds.
+    Accepts ints / floats, numeric strings and ISO-8601 strings
+    (naive ISO strings are local time, as written by datetime.fromtimestamp).
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime.datetime):
+        return int(value.timestamp())
+
+    text = str(value).strip()
+    try:
+        return int(float(text))
+    except ValueError:
+        pass
+    return int(datetime.datetime.fromisoformat(text.replace("Z", "+00:00")).timestamp())
+
+
+def compute_due_at(start_timestamp, tenure_months) -> Optional[int]:
+    """Final repayment deadline: start + tenure * 30 days"""
+    start = to_epoch(start_timestamp)
+    if start is None or not tenure_months:
+        return None
+    return start + int(tenure_months) * LOAN_MONTH_SECONDS
@@ -1,5 +1,7 @@
 import math
 
+from utils.due_dates import LOAN_MONTH_SECONDS
+
 
 def calculate_emi(
     principal: float,
@@ -22,6 +24,14 @@ def calculate_emi(
     # Convert annual rate (%) to monthly decimal rate
     monthly_rate = (annual_interest_rate / 100) / 12
 
+    # Interest-free: the formula is 0/0, EMI is a straight split
+    if monthly_rate == 0:
+        emi = round(principal / tenure_months, 2)
+        return {
+            "emi": emi,
+            "total_payable": round(emi * tenure_months, 2),
+        }
+
     # EMI formula
     emi = (
         principal
@@ -77,3 +87,26 @@ def generate_emi_schedule(
         )
 
     return schedule
+
+
+def generate_installments(
+    principal: float,
+    annual_interest_rate: float,
+    tenure_months: int,
+    start_timestamp: int,
+):
+    """
+    EMI schedule with a due date per installment (unix seconds):
+    installment N is due N loan-months after start.
+    The last due date equals the loan's due_at.
+    """
+    return [
+        {
+            "installment_no": row["month"],
+            "due_at": start_timestamp + row["month"] * LOAN_MONTH_SECONDS,
+            "emi": row["emi"],
+            "principal": row["principal_paid"],
+            "interest": row["interest_paid"],
+        }
+        for row in generate_emi_schedule(principal, annual_interest_rate, tenure_months)
+    ]
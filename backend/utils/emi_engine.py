@@ -0,0 +1,180 @@
+"""
+VECTORIZED EMI ENGINE
+---------------------
+NumPy version of utils/emi_calculator for arrays of loans at once
+(portfolio analytics, stress tests, bulk quotes).
+
+Results match calculate_emi / generate_emi_schedule to the paisa:
+- same formula and operation order as the scalar code
+- rounding to 2 decimals follows Python's round() (utils/rounding)
+- zero interest -> principal / tenure (no division by zero)
+
+verify_against_scalar() checks a sample against the scalar functions;
+`python -m utils.emi_engine` from backend/ runs it plus a 100k-loan benchmark.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+from utils.rounding import near_half, round2
+
+
+def _as_arrays(principal, annual_interest_rate, tenure_months):
+    principal = np.atleast_1d(np.asarray(principal, dtype=np.float64))
+    rate = np.atleast_1d(np.asarray(annual_interest_rate, dtype=np.float64))
+    tenure = np.atleast_1d(np.asarray(tenure_months, dtype=np.int64))
+    principal, rate, tenure = np.broadcast_arrays(principal, rate, tenure)
+
+    if (principal <= 0).any() or (tenure <= 0).any():
+        raise ValueError("Invalid principal or tenure")
+    return principal, rate, tenure
+
+
+def calculate_emis(principal, annual_interest_rate, tenure_months) -> Dict[str, np.ndarray]:
+    """
+    Vectorized calculate_emi. Inputs broadcast against each other.
+    Returns {"emi": array, "total_payable": array}.
+    """
+    principal, rate, tenure = _as_arrays(principal, annual_interest_rate, tenure_months)
+
+    monthly_rate = (rate / 100) / 12
+    interest_free = monthly_rate == 0
+
+    # Same operation order as the scalar formula
+    growth = np.power(1 + monthly_rate, tenure)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        emi = (principal * monthly_rate * growth) / (growth - 1)
+    emi = np.where(interest_free, principal / tenure, emi)
+
+    rounded = round2(emi)
+
+    # np.power may differ from math.pow by an ulp; where that could flip the
+    # rounding, take the scalar result outright
+    boundary = np.nonzero(near_half(emi))[0]
+    if boundary.size:
+        from utils.emi_calculator import calculate_emi
+        for i in boundary:
+            rounded[i] = calculate_emi(float(principal[i]), float(rate[i]), int(tenure[i]))["emi"]
+
+    emi = rounded
+    return {
+        "emi": emi,
+        "total_payable": round2(emi * tenure),
+    }
+
+
+def generate_schedules(principal, annual_interest_rate, tenure_months) -> Dict[str, np.ndarray]:
+    """
+    Vectorized generate_emi_schedule as columnar matrices of shape
+    (loans, max tenure). Months beyond a loan's tenure are 0 and
+    `mask` is False there.
+
+    Returns emi (loans,), principal_paid / interest_paid /
+    remaining_balance (loans, months) and mask (loans, months).
+    """
+    principal, rate, tenure = _as_arrays(principal, annual_interest_rate, tenure_months)
+    emi = calculate_emis(principal, rate, tenure)["emi"]
+
+    monthly_rate = (rate / 100) / 12
+    months = int(tenure.max())
+    n = principal.shape[0]
+
+    # Built month-major so each step writes one contiguous row
+    principal_paid = np.empty((months, n))
+    interest_paid = np.empty((months, n))
+    remaining = np.empty((months, n))
+    mask = np.arange(1, months + 1)[None, :] <= tenure[:, None]
+
+    # The balance recursion is sequential in time but vectorized across loans;
+    # rows past a loan's tenure are computed and then zeroed by the mask
+    # Differences of two already-rounded amounts sit on the 0.01 grid (up to
+    # float noise), never near a .5 boundary, so plain np.round is exact there.
+    # Only the first balance step involves the raw principal.
+    balance = principal.copy()
+    for m in range(months):
+        interest_paid[m] = round2(balance * monthly_rate)
+        principal_paid[m] = np.round(emi - interest_paid[m], 2)
+        step = balance - principal_paid[m]
+        balance = np.maximum(np.round(step, 2) if m else round2(step), 0.0)
+        remaining[m] = balance
+
+    principal_paid = np.where(mask, principal_paid.T, 0.0)
+    interest_paid = np.where(mask, interest_paid.T, 0.0)
+    remaining = np.where(mask, remaining.T, 0.0)
+
+    return {
+        "emi": emi,
+        "principal_paid": principal_paid,
+        "interest_paid": interest_paid,
+        "remaining_balance": remaining,
+        "mask": mask,
+    }
+
+
+def verify_against_scalar(sample_size: int = 2000, seed: Optional[int] = 0) -> Dict[str, int]:
+    """
+    Compare the engine with calculate_emi / generate_emi_schedule on random
+    loans (including zero interest). Returns mismatch counts (all 0 = identical).
+    """
+    from utils.emi_calculator import calculate_emi, generate_emi_schedule
+
+    rng = np.random.default_rng(seed)
+    principal = np.round(rng.uniform(1_000, 1_000_000, sample_size), 2)
+    rate = np.round(rng.uniform(0, 36, sample_size), 2)
+    rate[::10] = 0.0
+    tenure = rng.integers(1, 61, sample_size)
+
+    emis = calculate_emis(principal, rate, tenure)
+    schedules = generate_schedules(principal, rate, tenure)
+
+    emi_mismatches = 0
+    schedule_mismatches = 0
+    for i in range(sample_size):
+        p, r, t = float(principal[i]), float(rate[i]), int(tenure[i])
+
+        scalar = calculate_emi(p, r, t)
+        if scalar["emi"] != emis["emi"][i] or scalar["total_payable"] != emis["total_payable"][i]:
+            emi_mismatches += 1
+
+        for row in generate_emi_schedule(p, r, t):
+            m = row["month"] - 1
+            if (
+                row["principal_paid"] != schedules["principal_paid"][i, m]
+                or row["interest_paid"] != schedules["interest_paid"][i, m]
+                or row["remaining_balance"] != schedules["remaining_balance"][i, m]
+            ):
+                schedule_mismatches += 1
+                break
+
+    return {
+        "loans": sample_size,
+        "emi_mismatches": emi_mismatches,
+        "schedule_mismatches": schedule_mismatches,
+    }
+
+
+# =========================
+# BENCHMARK
+# =========================
+
+if __name__ == "__main__":
+    import time
+
+    print("verify:", verify_against_scalar())
+
+    rng = np.random.default_rng(42)
+    n = 100_000
+    principal = np.round(rng.uniform(5_000, 500_000, n), 2)
+    rate = np.round(rng.uniform(0, 24, n), 2)
+    tenure = rng.choice([3, 6, 12, 24, 36], n)
+
+    started = time.perf_counter()
+    calculate_emis(principal, rate, tenure)
+    emi_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    generate_schedules(principal, rate, tenure)
+    schedule_ms = (time.perf_counter() - started) * 1000
+
+    print(f"{n:,} loans: EMIs {emi_ms:.1f} ms, full amortization {schedule_ms:.1f} ms")
@@ -0,0 +1,41 @@
+"""
+VECTORIZED ROUNDING
+-------------------
+round(x, 2) for NumPy arrays with Python's semantics, shared by the EMI
+engine and the batch credit model so both match their scalar versions
+to the paisa.
+
+np.round works on the binary value scaled by 100 and can disagree with
+round() on values that sit on a .5 boundary. Values whose scaled fraction
+is within ROUNDING_GUARD of .5 are re-rounded with round() one by one.
+"""
+
+import numpy as np
+
+ROUNDING_GUARD = 1e-6
+
+
+def near_half(values: np.ndarray) -> np.ndarray:
+    """True where values * 100 is within float noise of a .5 rounding boundary"""
+    scaled = values * 100
+    # A few ulps of the scaled value, but never less than ROUNDING_GUARD
+    guard = np.abs(scaled)
+    guard *= 1e-15
+    np.maximum(guard, ROUNDING_GUARD, out=guard)
+
+    distance = scaled - np.floor(scaled)
+    distance -= 0.5
+    np.abs(distance, out=distance)
+    return distance < guard
+
+
+def round2(values: np.ndarray) -> np.ndarray:
+    """Elementwise round(x, 2) with Python's semantics"""
+    values = np.asarray(values, dtype=np.float64)
+    rounded = np.round(values, 2)
+
+    close = near_half(values)
+    if close.any():
+        idx = np.nonzero(close)
+        rounded[idx] = [round(float(v), 2) for v in values[idx]]
+    return rounded
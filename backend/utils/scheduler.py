@@ -0,0 +1,106 @@
+"""
+BACKGROUND SCHEDULER
+--------------------
+In-process periodic jobs (daemon threads) started from the app lifespan.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict
+
+
+class PeriodicJob:
+    """
+    Runs `func` every `interval_seconds` on its own daemon thread.
+    With `run_at_start` the first run happens as soon as the job starts
+    instead of one full interval later (long-interval jobs after a restart).
+    Errors are logged and counted; the job keeps running.
+    """
+
+    def __init__(self, name: str, interval_seconds: float, func: Callable[[], Any], run_at_start: bool = False):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.func = func
+        self.run_at_start = run_at_start
+
+        self._stop = threading.Event()
+        self._thread = None
+
+        # ---- Metrics ----
+        self.runs = 0
+        self.failures = 0
+        self.last_run_at = None
+        self.last_duration_ms = None
+        self.last_error = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=f"job-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def run_once(self):
+        started = time.monotonic()
+        try:
+            self.func()
+            self.last_error = None
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            print(f"[SCHEDULER] Job {self.name} failed: {e}")
+        finally:
+            self.runs += 1
+            self.last_run_at = int(time.time())
+            self.last_duration_ms = round((time.monotonic() - started) * 1000, 2)
+
+    def _loop(self):
+        if self.run_at_start and not self._stop.is_set():
+            self.run_once()
+        while not self._stop.wait(self.interval_seconds):
+            self.run_once()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval_seconds": self.interval_seconds,
+            "run_at_start": self.run_at_start,
+            "running": bool(self._thread and self._thread.is_alive()),
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_run_at": self.last_run_at,
+            "last_duration_ms": self.last_duration_ms,
+            "last_error": self.last_error,
+        }
+
+
+_jobs: Dict[str, PeriodicJob] = {}
+
+
+def register_job(
+    name: str,
+    interval_seconds: float,
+    func: Callable[[], Any],
+    run_at_start: bool = False,
+) -> PeriodicJob:
+    job = PeriodicJob(name, interval_seconds, func, run_at_start)
+    _jobs[name] = job
+    return job
+
+
+def start_jobs():
+    for job in _jobs.values():
+        job.start()
+
+
+def stop_jobs():
+    for job in _jobs.values():
+        job.stop()
+
+
+def get_job_stats() -> Dict[str, Any]:
+    return {name: job.stats() for name, job in _jobs.items()}
@@ -0,0 +1,67 @@
+"""
+SCORE HISTORY ENCODING
+----------------------
+Compact row format for credit_score_history.
+
+- reason -> 1-byte code (REASON_CODES)
+- feature snapshot -> 12-byte little-endian struct: ratios as hundredths
+  (the model already rounds them to 2 decimals, so this is lossless)
+  plus account age in months; NULL when a score has no snapshot
+"""
+
+import struct
+from typing import Optional
+
+REASON_CODES = {
+    "OTHER": 0,
+    "NIGHTLY": 1,
+    "FUND_TRANSFER": 2,
+    "FUND_TRANSFER_FAILED": 3,
+    "REPAYMENT": 4,
+    "DEFAULT": 5,
+    "KYC_INITIAL": 6,
+    "REPAYMENT_REWARD": 7,
+    "FINANCIAL_PROFILE": 8,
+}
+REASON_NAMES = {code: name for name, code in REASON_CODES.items()}
+
+# expense_ratio, utilization_ratio (uint32 hundredths), failure_rate (uint16
+# hundredths), account_age_months (uint16)
+_FEATURES = struct.Struct("<IIHH")
+_UINT32_MAX = 2**32 - 1
+_UINT16_MAX = 2**16 - 1
+
+
+def _hundredths(value: float, upper: int) -> int:
+    return min(max(round(value * 100), 0), upper)
+
+
+def encode_reason(reason: str) -> int:
+    return REASON_CODES.get(reason, REASON_CODES["OTHER"])
+
+
+def decode_reason(code: int) -> str:
+    return REASON_NAMES.get(code, "OTHER")
+
+
+def pack_features(features: Optional[dict]) -> Optional[bytes]:
+    if not features:
+        return None
+    return _FEATURES.pack(
+        _hundredths(features["expense_ratio"], _UINT32_MAX),
+        _hundredths(features["utilization_ratio"], _UINT32_MAX),
+        _hundredths(features["failure_rate"], _UINT16_MAX),
+        min(max(int(features["account_age_months"]), 0), _UINT16_MAX),
+    )
+
+
+def unpack_features(blob: Optional[bytes]) -> Optional[dict]:
+    if not blob:
+        return None
+    expense, utilization, failure, age = _FEATURES.unpack(blob)
+    return {
+        "expense_ratio": expense / 100,
+        "failure_rate": failure / 100,
+        "utilization_ratio": utilization / 100,
+        "account_age_months": age,
+    }